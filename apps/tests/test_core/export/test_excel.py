@@ -0,0 +1,79 @@
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from openpyxl import load_workbook
+
+from core.export.excel import (
+    iter_csv,
+    iter_xlsx,
+    stream_csv_export,
+    stream_xlsx_export,
+)
+
+HEADERS = ["name", "count", "price", "created_at"]
+
+ROWS = [
+    ["a", 1, Decimal("1.50"), datetime.datetime(2024, 1, 2, 3, 4, 5)],
+    ["中文", 2, 2.25, datetime.date(2024, 1, 3)],
+    ["<&>", None, True, datetime.time(1, 2, 3)],
+]
+
+
+def load_xlsx(data: bytes):
+    return load_workbook(io.BytesIO(data)).active
+
+
+def test_iter_xlsx():
+    sheet = load_xlsx(b"".join(iter_xlsx(iter(ROWS), headers=HEADERS, sheet_title="数据", chunk_size=1)))
+    assert sheet.title == "数据"
+    assert list(sheet.values) == [
+        tuple(HEADERS),
+        ("a", 1, 1.5, datetime.datetime(2024, 1, 2, 3, 4, 5)),
+        ("中文", 2, 2.25, datetime.datetime(2024, 1, 3)),
+        ("<&>", None, True, datetime.time(1, 2, 3)),
+    ]
+
+
+def test_iter_xlsx_non_finite():
+    rows = [[float("nan"), float("inf"), float("-inf"), Decimal("NaN"), Decimal("Infinity"), 1]]
+    sheet = load_xlsx(b"".join(iter_xlsx(rows)))
+    assert list(sheet.values) == [(None, None, None, None, None, 1)]
+
+
+@pytest.mark.parametrize("sheet_title", ["", "a" * 32, "a/b", "a[1]", "a:b", "a*", "a?", "a\\b"])
+def test_iter_xlsx_invalid_sheet_title(sheet_title):
+    with pytest.raises(ValueError):
+        iter_xlsx([], sheet_title=sheet_title)
+
+
+def test_iter_csv():
+    data = b"".join(iter_csv(iter(ROWS), headers=HEADERS, chunk_size=1)).decode("utf-8-sig")
+    assert list(csv.reader(io.StringIO(data))) == [
+        HEADERS,
+        ["a", "1", "1.50", "2024-01-02 03:04:05"],
+        ["中文", "2", "2.25", "2024-01-03"],
+        ["<&>", "", "True", "01:02:03"],
+    ]
+
+
+def test_iter_tsv():
+    data = b"".join(iter_csv([["a\tb", 1]], delimiter="\t")).decode("utf-8-sig")
+    assert list(csv.reader(io.StringIO(data), delimiter="\t")) == [["a\tb", "1"]]
+
+
+def test_stream_xlsx_export():
+    response = stream_xlsx_export(iter(ROWS), "导出.xlsx", headers=HEADERS)
+    assert response["Content-Type"] == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    assert "%E5%AF%BC%E5%87%BA.xlsx" in response["Content-Disposition"]
+    sheet = load_xlsx(b"".join(response.streaming_content))
+    assert sheet.max_row == len(ROWS) + 1
+
+
+def test_stream_csv_export():
+    response = stream_csv_export(iter(ROWS), "export.tsv", headers=HEADERS, delimiter="\t")
+    assert response["Content-Type"] == "text/tab-separated-values; charset=utf-8"
+    data = b"".join(response.streaming_content).decode("utf-8-sig")
+    assert list(csv.reader(io.StringIO(data), delimiter="\t"))[0] == HEADERS
@@ -0,0 +1,94 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.db import models
+
+from apps.http_client.models import RequestApiConfig, RequestSystemConfig
+from core.sync_model.sync import bulk_sync_data_to_model, get_fingerprint
+
+
+class TestGetFingerprint:
+    def test_decimal(self):
+        fields = [models.DecimalField(name="price", max_digits=10, decimal_places=2)]
+        expect = get_fingerprint([Decimal("1.50")], fields, set())
+        assert get_fingerprint([1.5], fields, set()) == expect
+        assert get_fingerprint(["1.5"], fields, set()) == expect
+        assert get_fingerprint([1.51], fields, set()) != expect
+
+    def test_integer_and_float(self):
+        fields = [models.IntegerField(name="count"), models.FloatField(name="rate")]
+        assert get_fingerprint([1, 2], fields, set()) == get_fingerprint([1.0, 2.0], fields, set())
+
+    def test_foreign_key(self):
+        field = RequestApiConfig._meta.get_field("system")
+        assert get_fingerprint([1], [field], set()) == get_fingerprint(["1"], [field], set())
+        assert get_fingerprint([1], [field], set()) != get_fingerprint([2], [field], set())
+
+    def test_datetime_fields(self):
+        fields = [models.DateTimeField(name="updated_at")]
+        value = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        expect = get_fingerprint([value], fields, {"updated_at"})
+        assert get_fingerprint(["2024-01-01T00:00:00Z"], fields, {"updated_at"}) == expect
+
+
+@pytest.mark.django_db
+class TestBulkSyncDataToModel:
+    @pytest.fixture
+    def systems(self):
+        return [
+            RequestSystemConfig.objects.create(name="system_1", code="system_1"),
+            RequestSystemConfig.objects.create(name="system_2", code="system_2"),
+        ]
+
+    @staticmethod
+    def get_api(system, code, name, request_body=None):
+        return RequestApiConfig(
+            system=system, code=code, name=name, path=f"/{code}/", method="GET", request_body=request_body or {}
+        )
+
+    def test_sync(self, systems):
+        system_1, system_2 = systems
+        for api in [
+            self.get_api(system_1, "unchanged", "unchanged", {"a": 1}),
+            self.get_api(system_1, "renamed", "old name"),
+            self.get_api(system_1, "moved", "moved"),
+            self.get_api(system_1, "deleted", "deleted"),
+        ]:
+            api.save()
+
+        new_models = [
+            self.get_api(system_1, "unchanged", "unchanged", {"a": 1}),
+            self.get_api(system_1, "renamed", "new name"),
+            self.get_api(system_2, "moved", "moved"),
+            self.get_api(system_2, "created", "created"),
+        ]
+        sync_fields = ["system", "name", "path", "request_body"]
+        result = bulk_sync_data_to_model(RequestApiConfig, new_models, "code", sync_fields)
+        assert (result["created"], result["updated"], result["deleted"]) == (1, 2, 1)
+
+        actual = {api.code: (api.system_id, api.name) for api in RequestApiConfig.objects.all()}
+        assert actual == {
+            "unchanged": (system_1.id, "unchanged"),
+            "renamed": (system_1.id, "new name"),
+            "moved": (system_2.id, "moved"),
+            "created": (system_2.id, "created"),
+        }
+
+        # 数据没有变化时不再更新
+        new_models = [self.get_api(RequestSystemConfig(id=api.system_id), api.code, api.name) for api in new_models]
+        result = bulk_sync_data_to_model(RequestApiConfig, new_models, "code", ["system", "name"])
+        assert (result["created"], result["updated"], result["deleted"]) == (0, 0, 0)
+
+    def test_upsert(self, systems):
+        new_models = [
+            RequestSystemConfig(name="system 1", code="system_1"),
+            RequestSystemConfig(name="system 2 renamed", code="system_2"),
+            RequestSystemConfig(name="system 3", code="system_3"),
+        ]
+        result = bulk_sync_data_to_model(
+            RequestSystemConfig, new_models, "code", ["name"], sync_filter={"code__startswith": "system"}, upsert=True
+        )
+        assert (result["created"], result["updated"], result["deleted"]) == (1, 2, 0)
+        actual = dict(RequestSystemConfig.objects.values_list("code", "name"))
+        assert actual == {"system_1": "system 1", "system_2": "system 2 renamed", "system_3": "system 3"}
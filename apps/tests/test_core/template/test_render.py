@@ -0,0 +1,68 @@
+import pytest
+from django.utils import translation
+
+from core.templates.render import (
+    Jinja2Renderer,
+    get_string_environment,
+    get_string_template,
+    is_plain_text,
+    jinja_render,
+)
+
+
+@pytest.mark.parametrize(
+    "template_value, expect",
+    [
+        ("hello", True),
+        ("", True),
+        ("{{ name }}", False),
+        ("{% if name %}{% endif %}", False),
+        ("{# comment #}", False),
+        # jinja2 会去掉末尾的一个换行符，需要渲染
+        ("hello\n", False),
+    ],
+)
+def test_is_plain_text(template_value, expect):
+    assert is_plain_text(template_value) is expect
+
+
+class TestJinja2Renderer:
+    def test_plain_text(self):
+        get_string_template.cache_clear()
+        assert Jinja2Renderer.render("hello {name}", {"name": "world"}) == "hello {name}"
+        # 纯文本不编译模板
+        assert get_string_template.cache_info().currsize == 0
+
+    def test_trailing_newline(self):
+        assert Jinja2Renderer.render("hello\n", {}) == "hello"
+        assert Jinja2Renderer.render("hello\n\n", {}) == "hello\n"
+
+    def test_render(self):
+        get_string_template.cache_clear()
+        assert Jinja2Renderer.render("hello {{ name }}", {"name": "world"}) == "hello world"
+        assert Jinja2Renderer.render("hello {{ name }}", {"name": "jinja"}) == "hello jinja"
+        # 相同的模板只编译一次
+        assert get_string_template.cache_info().hits == 1
+        assert get_string_template.cache_info().misses == 1
+
+    def test_globals(self):
+        assert Jinja2Renderer.render("{{ json.dumps(value) }}", {"value": [1]}) == "[1]"
+        assert Jinja2Renderer.render("{{ re.sub('a', 'b', value) }}", {"value": "aa"}) == "bb"
+
+    def test_context_overrides_globals(self):
+        assert Jinja2Renderer.render("{{ json }}-{{ re }}", {"json": "a", "re": "b"}) == "a-b"
+        # 上下文不会修改共享环境的全局变量
+        assert Jinja2Renderer.render("{{ json.dumps(1) }}", {}) == "1"
+
+    def test_gettext_follows_active_language(self):
+        # 共享环境在激活语言之前创建
+        get_string_environment()
+        with translation.override("en"):
+            assert Jinja2Renderer.render('{{ _("Yes") }}', {}) == "Yes"
+        with translation.override("zh-hans"):
+            assert Jinja2Renderer.render('{{ _("Yes") }}', {}) == "是"
+
+
+def test_jinja_render():
+    template_value = {"a": "{{ value }}", "b": ["{{ value + 1 }}", "plain", 1]}
+    assert jinja_render(template_value, {"value": 1}) == {"a": "1", "b": ["2", "plain", 1]}
@@ -165,3 +165,86 @@ async def test_expiry_multi():
 
     # Channel should be cleaned up.
     assert len(channel_layer.channels) == 0
+
+
+@pytest.mark.asyncio
+async def test_group_send_shared_message():
+    """
+    Tests that group members get their own copy of the message and can not
+    see each other's changes.
+    """
+    channel_layer = InMemoryChannelLayer()
+    message = {"type": "message.1", "data": {"value": 1}}
+    await channel_layer.group_add("test-group", "test-gr-chan-1")
+    await channel_layer.group_add("test-group", "test-gr-chan-2")
+    await channel_layer.group_send("test-group", message)
+    message["type"] = "message.2"
+
+    message["data"]["value"] = 2
+
+    message_1 = await channel_layer.receive("test-gr-chan-1")
+    message_1["type"] = "changed"
+    message_1["data"]["value"] = 3
+    message_2 = await channel_layer.receive("test-gr-chan-2")
+    assert message_2 == {"type": "message.1", "data": {"value": 1}}
+    assert channel_layer.stats["sent"] == 2
+    assert channel_layer.stats["received"] == 2
+
+
+@pytest.mark.asyncio
+async def test_channel_capacity():
+    """
+    Makes sure channel_capacity patterns override the default capacity.
+    """
+    channel_layer = InMemoryChannelLayer(capacity=3, channel_capacity={"small-*": 1})
+    await channel_layer.send("small-channel", {"type": "test.message"})
+    with pytest.raises(ChannelFull):
+        await channel_layer.send("small-channel", {"type": "test.message"})
+    assert channel_layer.stats["channel_full"] == 1
+    assert channel_layer.stats["max_queue_size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expiry_group():
+    """
+    Tests that expired messages and group memberships remove the channel from groups.
+    """
+    channel_layer = InMemoryChannelLayer(expiry=0.1, group_expiry=0.2)
+    await channel_layer.group_add("test-group-1", "test-gr-chan-1")
+    await channel_layer.group_add("test-group-2", "test-gr-chan-1")
+    await channel_layer.group_add("test-group-1", "test-gr-chan-2")
+    await channel_layer.group_send("test-group-2", {"type": "message.1"})
+
+    await asyncio.sleep(0.15)
+    await channel_layer.group_send("test-group-1", {"type": "message.2"})
+    # test-gr-chan-1 has an expired message, so it's removed from all groups
+    assert channel_layer.groups == {
+        "test-group-1": {"test-gr-chan-2": channel_layer.groups["test-group-1"]["test-gr-chan-2"]}
+    }
+    assert channel_layer.stats["expired"] == 1
+
+    await asyncio.sleep(0.1)
+    await channel_layer.group_send("test-group-1", {"type": "message.3"})
+    assert channel_layer.groups == {}
+
+
+@pytest.mark.asyncio
+async def test_group_expiry_heap_compaction():
+    """
+    Makes sure re-joined and discarded memberships do not pile up in the expiry heap.
+    """
+    channel_layer = InMemoryChannelLayer()
+    await channel_layer.group_add("test-group", "test-gr-chan-1")
+    for _ in range(100):
+        await channel_layer.group_add("test-group", "test-gr-chan-2")
+        await channel_layer.group_add("test-group", "test-gr-chan-2")
+        await channel_layer.group_discard("test-group", "test-gr-chan-2")
+    assert len(channel_layer._group_expiry_heap) <= 4
+    assert list(channel_layer.groups["test-group"]) == ["test-gr-chan-1"]
+
+
+@pytest.mark.asyncio
+async def test_group_send_asgi_channel():
+    channel_layer = InMemoryChannelLayer()
+    with pytest.raises(AssertionError):
+        await channel_layer.group_send("test-group", {"type": "test.message", "__asgi_channel__": "test"})
@@ -1,9 +1,13 @@
 import asyncio
 import fnmatch
+import heapq
+import itertools
+import pickle
 import random
 import re
 import string
 import time
+from collections import defaultdict
 from copy import deepcopy
 from typing import Dict, List, Optional
 
@@ -43,7 +47,7 @@ class BaseChannelLayer:
         self.expiry = expiry
         # 通道的最大容量
         self.capacity = capacity
-        self.channel_capacity = channel_capacity or {}
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
 
     def compile_capacities(self, channel_capacity: Dict) -> List:
         """
@@ -131,6 +135,10 @@ class BaseChannelLayer:
 class InMemoryChannelLayer(BaseChannelLayer):
     """
     In-memory channel layer implementation
+
+    消息和组成员的过期时间保存在最小堆中，每次清理只处理已经到期的记录，
+    不需要遍历所有的通道和组成员。
+    组消息只序列化一次，每个成员接收时反序列化得到独立的副本。
     """
 
     def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None, **kwargs):
@@ -138,6 +146,31 @@ class InMemoryChannelLayer(BaseChannelLayer):
         self.channels = {}
         self.groups = {}
         self.group_expiry = group_expiry
+        # 通道所在的组，用于消息过期时快速将通道移出所有组
+        self.channel_groups = defaultdict(set)
+        # 消息过期堆 [(过期时间, 序号, 通道名)]
+        self._message_expiry_heap = []
+        # 组成员过期堆 [(加入时间, 序号, 组名, 通道名)]
+        self._group_expiry_heap = []
+        # 组成员过期堆中已失效（退出组或重新加入组）的记录数
+        self._group_expiry_stale = 0
+        self._counter = itertools.count()
+        self.stats = self._init_stats()
+
+    @staticmethod
+    def _init_stats():
+        return {
+            # 发送成功的消息数
+            "sent": 0,
+            # 接收的消息数
+            "received": 0,
+            # 过期丢弃的消息数
+            "expired": 0,
+            # 通道已满被拒绝的消息数
+            "channel_full": 0,
+            # 队列积压的最大消息数
+            "max_queue_size": 0,
+        }
 
     # Channel layer API
 
@@ -154,14 +187,29 @@ class InMemoryChannelLayer(BaseChannelLayer):
         # name in message
         assert "__asgi_channel__" not in message
 
-        # 每个通道创建一个异步队列
-        queue = self.channels.setdefault(channel_name, asyncio.Queue())
+        self._put(channel_name, deepcopy(message), serialized=False)
+
+    def _put(self, channel_name: str, message, serialized: bool):
+        """
+        将消息放入通道队列
+
+        :param serialized: 消息是否为多个通道共享的序列化数据，接收时反序列化
+        """
+        queue = self.channels.get(channel_name)
+        if queue is None:
+            # 每个通道创建一个有界的异步队列
+            queue = self.channels[channel_name] = asyncio.Queue(maxsize=self.get_capacity(channel_name))
         # 队列已满抛出异常
-        if queue.qsize() >= self.capacity:
+        if queue.full():
+            self.stats["channel_full"] += 1
             raise ChannelFull(channel_name)
 
         # 将消息发送到队列，并设置过期时间
-        await queue.put((time.time() + self.expiry, deepcopy(message)))
+        expires_at = time.time() + self.expiry
+        queue.put_nowait((expires_at, message, serialized))
+        heapq.heappush(self._message_expiry_heap, (expires_at, next(self._counter), channel_name))
+        self.stats["sent"] += 1
+        self.stats["max_queue_size"] = max(self.stats["max_queue_size"], queue.qsize())
 
     async def receive(self, channel_name):
         """
@@ -172,16 +220,21 @@ class InMemoryChannelLayer(BaseChannelLayer):
         assert self.valid_channel_name(channel_name)
         self._clean_expired()
 
-        queue = self.channels.setdefault(channel_name, asyncio.Queue())
+        queue = self.channels.get(channel_name)
+        if queue is None:
+            queue = self.channels[channel_name] = asyncio.Queue(maxsize=self.get_capacity(channel_name))
 
         # Do a plain direct receive
         try:
-            _, message = await queue.get()
+            _, message, serialized = await queue.get()
         finally:
             # 队列为空则注销此通道
-            if queue.empty():
+            if queue.empty() and self.channels.get(channel_name) is queue:
                 del self.channels[channel_name]
 
+        self.stats["received"] += 1
+        if serialized:
+            return pickle.loads(message)
         return message
 
     async def new_channel(self, prefix="specific."):
@@ -198,35 +251,52 @@ class InMemoryChannelLayer(BaseChannelLayer):
 
     def _clean_expired(self):
         """
-        Goes through all messages and groups and removes those that are expired.
+        Removes expired messages and group memberships.
         Any channel with an expired message is removed from all groups.
         """
+        now = time.time()
+
         # Channel cleanup
-        for channel_name, queue in list(self.channels.items()):
+        # 堆中的记录可能对应已经被接收的消息，此时队首消息未过期，直接跳过
+        heap = self._message_expiry_heap
+        while heap and heap[0][0] < now:
+            _, _, channel_name = heapq.heappop(heap)
+            queue = self.channels.get(channel_name)
+            if queue is None:
+                continue
             # 队列非空，且存在过期数据
-            while not queue.empty() and queue._queue[0][0] < time.time():
+            while not queue.empty() and queue._queue[0][0] < now:
                 # 立即从队列中获取一个过期元素，而不等待元素可用
                 queue.get_nowait()
+                self.stats["expired"] += 1
                 # Any removal prompts group discard
                 self._remove_from_groups(channel_name)
-                # Is the channel now empty and needs deleting?
-                if queue.empty():
-                    del self.channels[channel_name]
+            # Is the channel now empty and needs deleting?
+            if queue.empty() and not queue._getters:
+                del self.channels[channel_name]
 
         # Group Expiration
-        timeout = int(time.time()) - self.group_expiry
-        for group in self.groups:
-            for channel_name in list(self.groups.get(group, set())):
-                # If join time is older than group_expiry end the group membership
-                if self.groups[group][channel_name] and int(self.groups[group][channel_name]) < timeout:
-                    # Delete from group
-                    del self.groups[group][channel_name]
+        # If join time is older than group_expiry end the group membership
+        timeout = now - self.group_expiry
+        heap = self._group_expiry_heap
+        while heap and heap[0][0] < timeout:
+            joined_at, _, group, channel_name = heapq.heappop(heap)
+            channels = self.groups.get(group)
+            # 退出组或重新加入组后，旧的过期记录失效
+            if channels and channels.get(channel_name) == joined_at:
+                self._discard(group, channel_name)
+            else:
+                self._group_expiry_stale -= 1
 
     # Flush extension
 
     async def flush(self):
         self.channels = {}
         self.groups = {}
+        self.channel_groups = defaultdict(set)
+        self._message_expiry_heap = []
+        self._group_expiry_heap = []
+        self._group_expiry_stale = 0
 
     async def close(self):
         # Nothing to go
@@ -236,9 +306,40 @@ class InMemoryChannelLayer(BaseChannelLayer):
         """
         Removes a channel from all groups. Used when a message on it expires.
         """
-        for channels in self.groups.values():
-            if channel_name in channels:
-                del channels[channel_name]
+        for group in list(self.channel_groups.get(channel_name, ())):
+            if self._discard(group, channel_name):
+                self._mark_group_expiry_stale()
+
+    def _discard(self, group, channel_name) -> bool:
+        """
+        将通道移出组，返回通道是否在组中
+        """
+        removed = False
+        channels = self.groups.get(group)
+        if channels is not None:
+            removed = channels.pop(channel_name, None) is not None
+            if not channels:
+                del self.groups[group]
+        groups = self.channel_groups.get(channel_name)
+        if groups is not None:
+            groups.discard(group)
+            if not groups:
+                del self.channel_groups[channel_name]
+        return removed
+
+    def _mark_group_expiry_stale(self):
+        """
+        记录组成员过期堆中失效的记录，失效记录多于有效记录时重建堆
+        """
+        self._group_expiry_stale += 1
+        if self._group_expiry_stale * 2 > len(self._group_expiry_heap):
+            self._group_expiry_heap = [
+                (joined_at, next(self._counter), group, channel_name)
+                for group, channels in self.groups.items()
+                for channel_name, joined_at in channels.items()
+            ]
+            heapq.heapify(self._group_expiry_heap)
+            self._group_expiry_stale = 0
 
     # Groups extension
 
@@ -250,30 +351,40 @@ class InMemoryChannelLayer(BaseChannelLayer):
         assert self.valid_group_name(group_name), "Group name not valid"
         assert self.valid_channel_name(channel_name), "Channel name not valid"
         # Add to group dict
-        self.groups.setdefault(group_name, {})
-        self.groups[group_name][channel_name] = time.time()
+        joined_at = time.time()
+        channels = self.groups.setdefault(group_name, {})
+        rejoined = channel_name in channels
+        channels[channel_name] = joined_at
+        self.channel_groups[channel_name].add(group_name)
+        heapq.heappush(self._group_expiry_heap, (joined_at, next(self._counter), group_name, channel_name))
+        # 重新加入组，旧的过期记录失效
+        if rejoined:
+            self._mark_group_expiry_stale()
 
     async def group_discard(self, group_name, channel_name):
         # Both should be text and valid
         assert self.valid_channel_name(channel_name), "Invalid channel name"
         assert self.valid_group_name(group_name), "Invalid group name"
         # Remove from group set
-        if group_name in self.groups:
-            if channel_name in self.groups[group_name]:
-                del self.groups[group_name][channel_name]
-            if not self.groups[group_name]:
-                del self.groups[group_name]
+        if self._discard(group_name, channel_name):
+            self._mark_group_expiry_stale()
 
     async def group_send(self, group, message):
         # Check types
         assert isinstance(message, dict), "Message is not a dict"
         assert self.valid_group_name(group), "Invalid group name"
+        assert "__asgi_channel__" not in message
         # Run clean
         self._clean_expired()
+        channels = list(self.groups.get(group, {}))
+        if not channels:
+            return
+        # 只序列化一次消息，每个成员接收时反序列化得到独立的副本
+        payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
         # Send to each channel
-        for channel in self.groups.get(group, set()):
+        for channel in channels:
             try:
-                await self.send(channel, message)
+                self._put(channel, payload, serialized=True)
             except ChannelFull:
                 pass
 
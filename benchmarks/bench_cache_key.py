@@ -0,0 +1,61 @@
+"""
+缓存 key 参数哈希基准
+
+使用典型的 resource 请求参数，对比 count_md5 与 canonical_hash 的耗时
+
+运行：
+    python benchmarks/bench_cache_key.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xTool.codec import canonical_hash, count_md5  # noqa
+
+REPEAT = 2000
+
+PAYLOADS = {
+    "scalar args": ((2,), {}),
+    "small request": (
+        ({"bk_biz_id": 2, "username": "admin", "page": 1, "page_size": 20},),
+        {},
+    ),
+    "filter request": (
+        (
+            {
+                "bk_biz_id": 2,
+                "conditions": [
+                    {"key": "ip", "method": "eq", "value": ["10.0.0.%d" % i for i in range(20)]},
+                    {"key": "bk_cloud_id", "method": "eq", "value": [0]},
+                ],
+                "fields": ["bk_host_id", "bk_host_innerip", "bk_cloud_id", "bk_os_type", "bk_host_name"],
+                "page": {"start": 0, "limit": 500, "sort": "bk_host_id"},
+            },
+        ),
+        {"use_cache": True},
+    ),
+    "bulk ids": ((list(range(1000)),), {"with_detail": False}),
+}
+
+
+def bench(func, args, kwargs):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func(args)
+        func(kwargs)
+    return (time.perf_counter() - start) / REPEAT * 1e6
+
+
+def main():
+    print("{:<16} {:>14} {:>18}".format("payload", "count_md5 us", "canonical_hash us"))
+    for name, (args, kwargs) in PAYLOADS.items():
+        md5_cost = bench(count_md5, args, kwargs)
+        canonical_cost = bench(canonical_hash, args, kwargs)
+        print("{:<16} {:>14.2f} {:>18.2f}".format(name, md5_cost, canonical_cost))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+缓存淘汰策略命中率基准
+
+回放生成的访问轨迹，对比各个缓存策略的命中率：
+- zipf: 按 zipf 分布访问，模拟热点数据
+- scan: zipf 访问中穿插一次性的顺序扫描，模拟批量同步等任务
+- loop: 循环访问略大于缓存容量的数据
+
+运行：
+    python benchmarks/bench_cache_policy.py
+"""
+
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xTool.cache.cachetools import (  # noqa
+    FIFOCache,
+    LFUCache,
+    LRUCache,
+    WTinyLFUCache,
+)
+
+MAXSIZE = 1000
+KEYS = 50000
+ACCESSES = 200000
+
+
+def zipf_trace(rand, count, alpha=0.9):
+    weights = [1.0 / (i**alpha) for i in range(1, KEYS + 1)]
+    cum_weights = list(itertools.accumulate(weights))
+    total = cum_weights[-1]
+    return [bisect.bisect(cum_weights, rand.random() * total) for _ in range(count)]
+
+
+def scan_trace(rand):
+    trace = []
+    scan_key = KEYS
+    hot = zipf_trace(rand, ACCESSES // 2)
+    for i in range(0, len(hot), 5000):
+        trace.extend(hot[i : i + 5000])
+        # 每 5000 次访问后扫描 5000 个不会再访问的 key
+        trace.extend(range(scan_key, scan_key + 5000))
+        scan_key += 5000
+    return trace
+
+
+def loop_trace():
+    return [i % int(MAXSIZE * 1.2) for i in range(ACCESSES)]
+
+
+def replay(cache, trace):
+    hits = 0
+    start = time.perf_counter()
+    for key in trace:
+        try:
+            cache[key]
+            hits += 1
+        except KeyError:
+            cache[key] = key
+    elapsed = time.perf_counter() - start
+    return hits / len(trace), elapsed / len(trace) * 1e6
+
+
+def main():
+    rand = random.Random(0)
+    traces = {
+        "zipf": zipf_trace(rand, ACCESSES),
+        "scan": scan_trace(rand),
+        "loop": loop_trace(),
+    }
+    policies = {
+        "LRUCache": LRUCache,
+        "LFUCache": LFUCache,
+        "FIFOCache": FIFOCache,
+        "WTinyLFUCache": WTinyLFUCache,
+    }
+    print("{:<8} {:<16} {:>10} {:>10}".format("trace", "policy", "hit ratio", "us/op"))
+    for trace_name, trace in traces.items():
+        for policy_name, policy in policies.items():
+            hit_ratio, cost = replay(policy(MAXSIZE), trace)
+            print("{:<8} {:<16} {:>10.2%} {:>10.2f}".format(trace_name, policy_name, hit_ratio, cost))
+
+
+if __name__ == "__main__":
+    main()
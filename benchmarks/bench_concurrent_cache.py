@@ -0,0 +1,80 @@
+"""
+多线程缓存装饰器基准
+
+多个线程按 zipf 分布读取 key，未命中时模拟一次 1ms 的 IO，
+对比全局加锁的 lru_cache/ttl_cache 与分段加锁的 concurrent_lru_cache/concurrent_ttl_cache 的吞吐和实际调用次数
+
+运行：
+    python benchmarks/bench_concurrent_cache.py
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xTool.cache.cachetools.func import (  # noqa
+    concurrent_lru_cache,
+    concurrent_ttl_cache,
+    lru_cache,
+    ttl_cache,
+)
+
+MAXSIZE = 1024
+KEYS = 4096
+OPS_PER_THREAD = 20000
+THREADS = (1, 4, 8, 16)
+
+
+def make_keys(seed):
+    rand = random.Random(seed)
+    return [min(int(rand.paretovariate(1.2)), KEYS) for _ in range(OPS_PER_THREAD)]
+
+
+def bench(decorator, threads):
+    calls = []
+
+    @decorator
+    def load(key):
+        calls.append(key)
+        time.sleep(0.001)
+        return key
+
+    workloads = [make_keys(i) for i in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(keys):
+        barrier.wait()
+        for key in keys:
+            load(key)
+
+    workers = [threading.Thread(target=worker, args=(keys,)) for keys in workloads]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * OPS_PER_THREAD / elapsed, len(calls)
+
+
+def main():
+    decorators = {
+        "lru_cache": lambda: lru_cache(MAXSIZE),
+        "concurrent_lru_cache": lambda: concurrent_lru_cache(MAXSIZE),
+        "ttl_cache": lambda: ttl_cache(MAXSIZE, ttl=600),
+        "concurrent_ttl_cache": lambda: concurrent_ttl_cache(MAXSIZE, ttl=600),
+    }
+    print("{:<22} {:>8} {:>12} {:>8}".format("decorator", "threads", "ops/s", "calls"))
+    for threads in THREADS:
+        for name, make_decorator in decorators.items():
+            ops, calls = bench(make_decorator(), threads)
+            print("{:<22} {:>8} {:>12.0f} {:>8}".format(name, threads, ops, calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+xTool.eval 表达式计算基准
+
+对同一组嵌套的 AND/OR 表达式，在大量 ObjectSet 上对比：
+逐个调用 eval 的树遍历、编译后的闭包以及按列计算的 eval_many
+
+运行：
+    python benchmarks/bench_eval.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xTool.collections.object import ObjectSet  # noqa
+from xTool.eval.expression import compile_expression, eval_many, make_expression  # noqa
+
+OBJECT_COUNT = 50000
+
+EXPRESSION = {
+    "op": "OR",
+    "content": [
+        {
+            "op": "AND",
+            "content": [
+                {"op": "in", "field": "host.os", "value": ["linux", "aix", "solaris"]},
+                {"op": "not_eq", "field": "host.env", "value": ["prod", "staging"]},
+                {"op": "gte", "field": "host.cpu", "value": 8},
+            ],
+        },
+        {"op": "starts_with", "field": "host.name", "value": "db-"},
+        {"op": "contains", "field": "host.tags", "value": ["gpu", "ssd"]},
+    ],
+}
+
+
+def make_obj_sets():
+    obj_sets = []
+    for i in range(OBJECT_COUNT):
+        obj_set = ObjectSet()
+        obj_set.add_object(
+            "host",
+            {
+                "os": random.choice(["linux", "windows", "aix", "darwin"]),
+                "env": random.choice(["prod", "test", "dev", "staging"]),
+                "cpu": random.choice([2, 4, 8, 16, 32]),
+                "name": random.choice(["db-", "web-", "cache-"]) + str(i),
+                "tags": random.sample(["gpu", "ssd", "hdd", "arm", "x86"], 2),
+            },
+        )
+        obj_sets.append(obj_set)
+    return obj_sets
+
+
+def bench(name, func):
+    start = time.perf_counter()
+    result = func()
+    cost = time.perf_counter() - start
+    print("{:<24} {:>8.1f} ms {:>8.2f} us/obj".format(name, cost * 1000, cost * 1e6 / OBJECT_COUNT))
+    return result
+
+
+def main():
+    random.seed(0)
+    obj_sets = make_obj_sets()
+
+    expected = bench("tree walk eval", lambda: [make_expression(EXPRESSION).eval(o) for o in obj_sets])
+    expression = make_expression(EXPRESSION)
+    bench("tree walk (reused)", lambda: [expression.eval(o) for o in obj_sets])
+    fn = compile_expression(EXPRESSION)
+    compiled = bench("compiled closure", lambda: [fn(o) for o in obj_sets])
+    many = bench("eval_many", lambda: eval_many(EXPRESSION, obj_sets))
+    assert expected == compiled == many
+    print("matched: {}/{}".format(sum(expected), OBJECT_COUNT))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+HTTP 服务器压测基准
+
+在子进程中通过 xTool.asynchronous.servers.server.serve 启动服务器，处理函数返回一个小的 json 响应，
+类似 wrk，多个 keep-alive 连接在固定时间内循环发送请求，统计每秒请求数和延迟：
+- depth 为每个连接一次连续发送的请求数，大于 1 时需要开启 KEEP_ALIVE_PIPELINING
+
+运行：
+    python benchmarks/bench_http_server.py
+"""
+
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xTool.asynchronous.servers.server import serve  # noqa
+from xTool.config.configuration import DEFAULT_CONFIG  # noqa
+from xTool.response import json, text  # noqa
+
+HOST = "127.0.0.1"
+DURATION = 5
+CONNECTIONS = 50
+# (depth, 是否开启 pipelining)
+SCENARIOS = ((1, False), (1, True), (8, True), (32, True))
+
+REQUEST = b"GET /hello HTTP/1.1\r\nHost: bench\r\nUser-Agent: bench\r\nAccept: */*\r\n\r\n"
+
+
+class BenchApp:
+    """serve 需要的最小应用"""
+
+    def __init__(self, pipelining):
+        self.config = SimpleNamespace(**DEFAULT_CONFIG)
+        self.config.ACCESS_LOG = False
+        self.config.KEEP_ALIVE_PIPELINING = pipelining
+        self.debug = False
+        self.is_request_stream = False
+        self.request_class = None
+        self.router = None
+        self.error_handler = SimpleNamespace(
+            response=lambda request, exception: text(str(exception), status=getattr(exception, "status_code", 500))
+        )
+
+    async def handle_request(self, request, write_callback, stream_callback):
+        write_callback(json({"hello": "world"}))
+
+    def stop(self):
+        asyncio.get_event_loop().stop()
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, pipelining):
+    process = multiprocessing.get_context("fork").Process(
+        target=serve,
+        args=(HOST, port, BenchApp(pipelining)),
+        kwargs={"before_start": [], "after_start": [], "before_stop": [], "after_stop": []},
+        daemon=True,
+    )
+    process.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("server did not start")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+
+
+async def client(port, depth, deadline, latencies):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    batch = REQUEST * depth
+    count = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        writer.write(batch)
+        for _ in range(depth):
+            await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        count += depth
+    writer.close()
+    return count
+
+
+async def load(port, depth):
+    latencies = []
+    deadline = time.monotonic() + DURATION
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(client(port, depth, deadline, latencies) for _ in range(CONNECTIONS)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return sum(counts) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    print(f"connections={CONNECTIONS} duration={DURATION}s")
+    print(f"{'depth':>6} {'pipelining':>11} {'req/s':>10} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for depth, pipelining in SCENARIOS:
+        port = get_free_port()
+        process = start_server(port, pipelining)
+        try:
+            rps, p50, p99 = asyncio.run(load(port, depth))
+        finally:
+            process.terminate()
+            process.join()
+        print(f"{depth:>6} {str(pipelining):>11} {rps:>10.0f} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
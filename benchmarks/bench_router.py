@@ -0,0 +1,112 @@
+"""
+Router 动态路由匹配基准
+
+注册数千个带类型参数的路由，使用高基数的 url（每次请求的 ID 都不同）
+对比前缀树匹配与逐个正则匹配
+
+运行：
+    python benchmarks/bench_router.py
+"""
+
+import os
+import random
+import string
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xTool.net.routers.router import Router, url_hash  # noqa
+
+ROUTE_COUNT = 5000
+REQUEST_COUNT = 20000
+
+PARAM_VALUE_GENERATORS = {
+    "int": lambda: str(random.randrange(10**9)),
+    "uuid": lambda: str(uuid.uuid4()),
+    "string": lambda: "".join(random.choices(string.ascii_letters, k=8)),
+    "path": lambda: "/".join("".join(random.choices(string.ascii_lowercase, k=4)) for _ in range(3)),
+}
+
+
+def handler(*args, **kwargs):
+    pass
+
+
+def random_word():
+    return "".join(random.choices(string.ascii_lowercase, k=6))
+
+
+def build_routes():
+    routes = []
+    for _ in range(ROUTE_COUNT):
+        parts = []
+        params = []
+        for index in range(random.randint(2, 5)):
+            if random.random() < 0.6:
+                parts.append(random_word())
+                continue
+            param_type = random.choice(["int", "int", "uuid", "string"])
+            parts.append(f"<p{index}:{param_type}>")
+            params.append((index, param_type))
+        if random.random() < 0.05:
+            parts.append("<rest:path>")
+            params.append((len(parts) - 1, "path"))
+        routes.append((parts, params))
+    return routes
+
+
+def generate_url(parts, params):
+    url_parts = list(parts)
+    for index, param_type in params:
+        url_parts[index] = PARAM_VALUE_GENERATORS[param_type]()
+    return "/" + "/".join(url_parts)
+
+
+def legacy_get(router, url, method):
+    """旧实现：逐个路由执行正则"""
+    for route in router.routes_dynamic[url_hash(url)]:
+        match = route.pattern.match(url)
+        if match and method in route.methods:
+            break
+    else:
+        for route in router.routes_always_check:
+            match = route.pattern.match(url)
+            if match and method in route.methods:
+                break
+        else:
+            raise LookupError(url)
+    return {p.name: p.cast(value) for value, p in zip(match.groups(1), route.parameters)}
+
+
+def main():
+    random.seed(0)
+    router = Router()
+    routes = build_routes()
+    for parts, _ in routes:
+        try:
+            router.add("/" + "/".join(parts), ["GET"], handler, strict_slashes=True)
+        except Exception:
+            pass
+    dynamic_routes = [route for route in routes if route[1]]
+    urls = [generate_url(*random.choice(dynamic_routes)) for _ in range(REQUEST_COUNT)]
+
+    # 不使用 lru_cache，只比较匹配本身的开销
+    start = time.perf_counter()
+    for url in urls:
+        router._get_dynamic(url, "GET")
+    tree_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for url in urls:
+        legacy_get(router, url, "GET")
+    legacy_seconds = time.perf_counter() - start
+
+    print(f"routes={len(router.routes_all)} requests={REQUEST_COUNT}")
+    print(f"  tree: {tree_seconds / REQUEST_COUNT * 1e6:10.2f} us/request")
+    print(f" regex: {legacy_seconds / REQUEST_COUNT * 1e6:10.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
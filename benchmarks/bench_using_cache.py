@@ -0,0 +1,109 @@
+"""
+UsingCache 读取路径微基准
+
+对比旧的逐个读取路径（zlib + orjson，线程缓存保存重新序列化的 JSON）
+与批量读取路径（get_many，线程缓存保存解码后的对象）
+
+运行：
+    python benchmarks/bench_using_cache.py
+"""
+
+import os
+import sys
+import timeit
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+import django  # noqa
+
+django.setup()
+
+import orjson as json  # noqa
+from django.utils.encoding import force_bytes  # noqa
+
+from bk_resource.utils.cache import CacheTypeItem, UsingCache, cache, mem_cache  # noqa
+from bk_resource.utils.local import local  # noqa
+
+KEY_COUNT = 100
+NUMBER = 200
+
+PAYLOAD = {
+    "result": True,
+    "code": 0,
+    "message": "success",
+    "data": [{"id": i, "name": f"host-{i}", "ip": f"10.0.{i // 256}.{i % 256}", "tags": ["a", "b"]} for i in range(50)],
+}
+
+
+def legacy_get_value(cache_key):
+    value = getattr(local, cache_key, None)
+    if value:
+        return json.loads(value)
+    value = mem_cache.get(cache_key, default=None) or cache.get(cache_key, default=None)
+    if value is None:
+        return None
+    try:
+        value = zlib.decompress(value)
+    except Exception:
+        pass
+    value = json.loads(force_bytes(value))
+    setattr(local, cache_key, json.dumps(value))
+    return value
+
+
+def clear_local(cache_keys):
+    for cache_key in cache_keys:
+        try:
+            delattr(local, cache_key)
+        except AttributeError:
+            pass
+
+
+def main():
+    cache_keys = [f"bench_using_cache:{i}" for i in range(KEY_COUNT)]
+    codecs = {
+        "zlib": [(15, "zlib")],
+        "lz4": [(15, "lz4")],
+        "zstd": [(15, "zstd")],
+        "lz4+zstd": [(15, "lz4"), (16 * 1024, "zstd")],
+    }
+    for name, compress_codecs in codecs.items():
+        try:
+            using_cache = UsingCache(CacheTypeItem("bench", 60), user_related=False, compress_codecs=compress_codecs)
+        except ImportError as e:
+            print(f"{name:>10}: skipped ({e})")
+            continue
+        using_cache.local_cache_enable = True
+        using_cache.set_many({cache_key: PAYLOAD for cache_key in cache_keys})
+        size = len(using_cache.codec.encode(PAYLOAD))
+
+        def cold_many():
+            clear_local(cache_keys)
+            using_cache.get_many(cache_keys)
+
+        def cold_legacy():
+            clear_local(cache_keys)
+            for cache_key in cache_keys:
+                legacy_get_value(cache_key)
+
+        results = {
+            "get_many(cold)": timeit.timeit(cold_many, number=NUMBER),
+            "get_many(local)": timeit.timeit(lambda: using_cache.get_many(cache_keys), number=NUMBER),
+        }
+        if name == "zlib":
+            clear_local(cache_keys)
+            results["legacy(cold)"] = timeit.timeit(cold_legacy, number=NUMBER)
+            results["legacy(local)"] = timeit.timeit(
+                lambda: [legacy_get_value(cache_key) for cache_key in cache_keys], number=NUMBER
+            )
+        clear_local(cache_keys)
+
+        print(f"{name:>10}: payload={size}B")
+        for label, seconds in results.items():
+            print(f"{label:>26}: {seconds / NUMBER / KEY_COUNT * 1e6:8.2f} us/key")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import abc
-from typing import Union
+import queue
+import threading
+from functools import partial
+from typing import Iterator, Tuple, Union
 
 import arrow
 import orjson as json
@@ -14,7 +17,12 @@ from bk_resource.tasks import run_perform_request
 from bk_resource.tools import format_serializer_errors, get_processes
 from bk_resource.utils.logger import logger
 from bk_resource.utils.request import get_request_username
-from bk_resource.utils.thread_backend import ThreadPool
+from bk_resource.utils.thread_backend import (
+    ThreadPool,
+    get_shared_pool,
+    get_shared_pool_size,
+    in_shared_pool_worker,
+)
 
 __doc__ = """
 Non-ORM for DRF 的架构：
@@ -54,6 +62,11 @@ class Empty:
     pass
 
 
+# 每个 Resource 类的批量请求并发信号量
+_bulk_semaphores = {}
+_bulk_semaphores_lock = threading.Lock()
+
+
 class Resource(metaclass=abc.ABCMeta):
     RequestSerializer = None
     ResponseSerializer = None
@@ -76,6 +89,11 @@ class Resource(metaclass=abc.ABCMeta):
     # 绑定 request 对象到请求参数中
     bind_request = False
 
+    # 批量请求时该Resource同时执行的最大任务数（所有并发调用共享），默认为线程池大小
+    bulk_request_concurrency = None
+    # 批量请求时每个线程任务处理的请求数量，默认读取settings配置
+    bulk_request_chunk_size = None
+
     # swagger扩展信息
     name = ""
     tags = []
@@ -270,44 +288,132 @@ class Resource(metaclass=abc.ABCMeta):
 
         return validated_response_data
 
-    def bulk_request(self, request_data_iterable=None, ignore_exceptions=False):
+    @classmethod
+    def get_bulk_semaphore(cls) -> threading.BoundedSemaphore:
         """
-        基于多线程的批量并发请求
+        获取该Resource类的批量请求并发信号量
         """
+        semaphore = _bulk_semaphores.get(cls)
+        if semaphore is not None:
+            return semaphore
+        with _bulk_semaphores_lock:
+            semaphore = _bulk_semaphores.get(cls)
+            if semaphore is None:
+                concurrency = cls.bulk_request_concurrency or get_shared_pool_size()
+                semaphore = _bulk_semaphores[cls] = threading.BoundedSemaphore(concurrency)
+        return semaphore
+
+    def _bulk_request_chunk(self, chunk, _request=None):
+        """
+        在线程池中执行一组请求，单个请求的异常不影响同组的其他请求
+        """
+        outcomes = []
+        for index, request_data in chunk:
+            try:
+                outcomes.append((index, True, self.request(request_data, _request=_request)))
+            except Exception as e:
+                outcomes.append((index, False, e))
+        return outcomes
 
-        # 预检查
-        if not isinstance(request_data_iterable, (list, tuple)):
-            raise TypeError("'request_data_iterable' object is not iterable")
+    def _iter_bulk_outcomes(self, request_data_iterable, chunk_size=None):
+        """
+        分组提交到共享线程池，按完成顺序返回 (请求序号, 是否成功, 结果或异常)
+        """
 
         # 模块引入，放在文件头可能导致 django 未完全初始化异常
         from core.utils.request_provider import get_local_request
 
-        # 初始化
-        futures = []
         _request = get_local_request()
+        chunk_size = chunk_size or self.bulk_request_chunk_size or bk_resource_settings.RESOURCE_BULK_REQUEST_CHUNK_SIZE
+        chunk_size = max(int(chunk_size or 1), 1)
+        indexed_data = list(enumerate(request_data_iterable))
+        chunks = [indexed_data[i : i + chunk_size] for i in range(0, len(indexed_data), chunk_size)]
+
+        # 在共享线程池的工作线程中嵌套调用时，使用独立线程池避免死锁
+        if in_shared_pool_worker():
+            with ThreadPool(processes=get_processes()) as pool:
+                for outcomes in pool.imap(partial(self._bulk_request_chunk, _request=_request), chunks):
+                    yield from outcomes
+            return
 
-        # 线程池执行任务
-        with ThreadPool(processes=get_processes()) as pool:
-            for request_data in request_data_iterable:
-                futures.append(pool.apply_async(self.request, args=(request_data,), kwds={"_request": _request}))
-            pool.close()
-            pool.join()
+        pool = get_shared_pool()
+        semaphore = self.get_bulk_semaphore()
+        outcome_queue = queue.Queue()
+
+        def on_done(outcomes):
+            semaphore.release()
+            for outcome in outcomes:
+                outcome_queue.put(outcome)
+
+        def on_error(chunk, error):
+            semaphore.release()
+            for index, _ in chunk:
+                outcome_queue.put((index, False, error))
+
+        # 有界提交：每个Resource类同时执行的任务数不超过并发限制，完成一组再提交下一组
+        pending = 0
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and semaphore.acquire(blocking=not pending):
+                chunk = chunks[next_chunk]
+                next_chunk += 1
+                pool.apply_async(
+                    self._bulk_request_chunk,
+                    args=(chunk,),
+                    kwds={"_request": _request},
+                    callback=on_done,
+                    error_callback=partial(on_error, chunk),
+                )
+                pending += len(chunk)
 
-        # 获取结果
-        results = []
-        exceptions = []
-        for future in futures:
-            try:
-                results.append(future.get())
-            except Exception as e:
+            outcome = outcome_queue.get()
+            pending -= 1
+            yield outcome
+
+    def bulk_request_iter(
+        self, request_data_iterable=None, ignore_exceptions=False, chunk_size=None
+    ) -> Iterator[Tuple[int, object]]:
+        """
+        基于共享线程池的批量并发请求，按完成顺序流式返回 (请求序号, 结果)
+        忽略错误时，失败请求的结果为 None
+        """
+
+        # 预检查
+        if not isinstance(request_data_iterable, (list, tuple)):
+            raise TypeError("'request_data_iterable' object is not iterable")
+
+        for index, success, value in self._iter_bulk_outcomes(request_data_iterable, chunk_size=chunk_size):
+            if not success:
                 # 判断是否忽略错误
                 if not ignore_exceptions:
-                    raise e
-                exceptions.append(e)
-                results.append(None)
+                    raise value
+                logger.error("bulk request failed: %s", value, exc_info=value)
+                value = None
+            yield index, value
+
+    def bulk_request(self, request_data_iterable=None, ignore_exceptions=False, chunk_size=None):
+        """
+        基于多线程的批量并发请求
+        """
+
+        # 预检查
+        if not isinstance(request_data_iterable, (list, tuple)):
+            raise TypeError("'request_data_iterable' object is not iterable")
+
+        # 获取结果
+        results = [None] * len(request_data_iterable)
+        exceptions = []
+        for index, success, value in self._iter_bulk_outcomes(request_data_iterable, chunk_size=chunk_size):
+            if success:
+                results[index] = value
+                continue
+            # 判断是否忽略错误
+            if not ignore_exceptions:
+                raise value
+            exceptions.append(value)
 
         # 如果全部报错，则必须抛出错误
-        if exceptions and len(exceptions) == len(futures):
+        if exceptions and len(exceptions) == len(results):
             raise exceptions[0]
 
         return results
@@ -1,4 +1,5 @@
 import abc
+import asyncio
 from typing import Dict
 
 import requests
@@ -10,6 +11,14 @@ from bk_resource.contrib.cache import CacheResource
 from bk_resource.exceptions import APIRequestError
 from bk_resource.settings import bk_resource_settings
 from bk_resource.utils.logger import logger
+from bk_resource.utils.transport import async_transport_registry, transport_registry
+
+try:
+    from httpx import HTTPStatusError
+
+    HTTP_STATUS_ERRORS = (HTTPError, HTTPStatusError)
+except ImportError:
+    HTTP_STATUS_ERRORS = (HTTPError,)
 
 
 class ApiResourceProtocol(metaclass=abc.ABCMeta):
@@ -74,6 +83,8 @@ class APIResource(ApiResourceProtocol, CacheResource, metaclass=abc.ABCMeta):
     TIMEOUT = 60
     IS_STANDARD_FORMAT = True
     url_keys = []
+    # 每个域名的最大连接数，为 None 时使用 RESOURCE_HTTP_POOL_MAXSIZE
+    http_pool_maxsize = None
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -81,15 +92,29 @@ class APIResource(ApiResourceProtocol, CacheResource, metaclass=abc.ABCMeta):
             "%s method 仅支持GET或POST或PUT或PATCH或DELETE，当前为%s"
         ) % (self.module_name, self.method.upper())
         self.method = self.method.upper()
-        self.session = requests.session()
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        同一模块、同一域名的 resource 共享连接池
+        """
+        if self._session is not None:
+            return self._session
+        key = transport_registry.make_key(self.module_name, self.base_url)
+        return transport_registry.get_session(key, self.http_pool_maxsize)
+
+    @session.setter
+    def session(self, session: requests.Session) -> None:
+        self._session = session
 
     def request(self, request_data=None, **kwargs):
         request_data = request_data or kwargs
         return super().request(request_data, **kwargs)
 
-    def perform_request(self, validated_request_data):
+    def build_request_kwargs(self, validated_request_data):
         """
-        发起http请求
+        构造请求的url和请求头，同步和异步请求共用，返回请求参数和处理后的请求数据
         """
         validated_request_data = dict(validated_request_data)
         validated_request_data = self.build_request_data(validated_request_data)
@@ -107,37 +132,127 @@ class APIResource(ApiResourceProtocol, CacheResource, metaclass=abc.ABCMeta):
             "headers": headers,
             "verify": bk_resource_settings.REQUEST_VERIFY,
         }
+        return kwargs, validated_request_data
 
+    def build_request_body(self, kwargs, validated_request_data):
+        """
+        将请求数据放入请求参数并调用 before_request，同步和异步请求共用，错误转换为 APIRequestError
+        """
+        if self.method == "GET":
+            kwargs["params"] = validated_request_data
+        else:
+            non_file_data, file_data = self.split_request_data(validated_request_data)
+            if not file_data:
+                # 不存在文件数据，则按照json方式去请求
+                kwargs["json"] = non_file_data
+            else:
+                # 若存在文件数据，则将非文件数据和文件数据分开传参
+                kwargs["files"] = file_data
+                kwargs["data"] = non_file_data
+        return self.before_request(kwargs)
+
+    def raise_request_error(self, err):
+        logger.exception(f"APIRequestFailed => {err}")
+        err_message = err.__doc__ or err.__class__.__name__
+        raise APIRequestError(
+            module_name=self.module_name,
+            url=self.action,
+            result=err_message,
+        ) from err
+
+    def perform_request(self, validated_request_data):
+        """
+        发起http请求
+        """
+        kwargs, validated_request_data = self.build_request_kwargs(validated_request_data)
         try:
+            kwargs = self.build_request_body(kwargs, validated_request_data)
             if self.method == "GET":
-                kwargs["params"] = validated_request_data
-                kwargs = self.before_request(kwargs)
                 request_url = kwargs.pop("url")
                 if "method" in kwargs:
                     del kwargs["method"]
                 response = self.session.get(request_url, **kwargs)
             else:
-                non_file_data, file_data = self.split_request_data(validated_request_data)
-                if not file_data:
-                    # 不存在文件数据，则按照json方式去请求
-                    kwargs["json"] = non_file_data
-                else:
-                    # 若存在文件数据，则将非文件数据和文件数据分开传参
-                    kwargs["files"] = file_data
-                    kwargs["data"] = non_file_data
-
-                kwargs = self.before_request(kwargs)
                 response = self.session.request(**kwargs)
         except Exception as err:
-            logger.exception(f"APIRequestFailed => {err}")
-            err_message = err.__doc__ or err.__class__.__name__
-            raise APIRequestError(
-                module_name=self.module_name,
-                url=self.action,
-                result=err_message,
-            ) from err
+            self.raise_request_error(err)
+        return self.parse_response(response)
+
+    async def async_request(self, request_data=None, **kwargs):
+        """
+        异步执行请求，不使用缓存
+        """
+        request_data = request_data or kwargs
+        validated_request_data = self.validate_request_data(request_data)
+        validated_request_data = self.build_extra_params(request_data, validated_request_data)
+
+        # 注入request
+        if kwargs.get("_request") and not validated_request_data.get("_request"):
+            validated_request_data["_request"] = kwargs["_request"]
+
+        response_data = await self.async_perform_request(validated_request_data)
+
+        return self.validate_response_data(response_data)
+
+    async def async_perform_request(self, validated_request_data):
+        """
+        使用当前事件循环共享的 httpx.AsyncClient 发起http请求
+        """
+        kwargs, validated_request_data = self.build_request_kwargs(validated_request_data)
+        try:
+            kwargs = self.build_request_body(kwargs, validated_request_data)
+            # httpx 在创建 client 时指定 verify
+            kwargs.pop("verify", None)
+            # 非字典的请求体在 httpx 中使用 content 参数
+            if isinstance(kwargs.get("data"), (str, bytes)):
+                kwargs["content"] = kwargs.pop("data")
+            client = async_transport_registry.get_client()
+            response = await client.request(**kwargs)
+        except Exception as err:
+            self.raise_request_error(err)
         return self.parse_response(response)
 
+    async def abulk_request(self, request_data_iterable=None, ignore_exceptions=False, concurrency=None):
+        """
+        基于协程的批量并发请求，错误处理与 bulk_request 一致
+        """
+
+        # 预检查
+        if not isinstance(request_data_iterable, (list, tuple)):
+            raise TypeError("'request_data_iterable' object is not iterable")
+
+        concurrency = (
+            concurrency or self.bulk_request_concurrency or bk_resource_settings.RESOURCE_ASYNC_BULK_REQUEST_CONCURRENCY
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(request_data):
+            async with semaphore:
+                return await self.async_request(request_data)
+
+        tasks = [request(request_data) for request_data in request_data_iterable]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = []
+        exceptions = []
+        for outcome in outcomes:
+            if not isinstance(outcome, Exception):
+                results.append(outcome)
+                continue
+            # 判断是否忽略错误
+            if not ignore_exceptions:
+                raise outcome
+            # 不在 except 块中，需要显式传入异常
+            logger.error("bulk request failed: %s", outcome, exc_info=outcome)
+            exceptions.append(outcome)
+            results.append(None)
+
+        # 如果全部报错，则必须抛出错误
+        if exceptions and len(exceptions) == len(results):
+            raise exceptions[0]
+
+        return results
+
     def build_url(self, validated_request_data):
         """
         最终请求的url，可以由子类进行重写
@@ -160,9 +275,10 @@ class APIResource(ApiResourceProtocol, CacheResource, metaclass=abc.ABCMeta):
     def before_request(self, kwargs):
         return kwargs
 
-    def parse_response(self, response: requests.Response):
+    def parse_response(self, response):
         """
         在提供数据给response_serializer之前，对数据作最后的处理，子类可进行重写
+        response 为 requests.Response 或 httpx.Response
         """
         try:
             result_json = response.json()
@@ -172,7 +288,7 @@ class APIResource(ApiResourceProtocol, CacheResource, metaclass=abc.ABCMeta):
 
         try:
             response.raise_for_status()
-        except HTTPError as err:
+        except HTTP_STATUS_ERRORS as err:
             logger.exception(gettext("【%s】请求API错误：%s，url: %s ") % (self.module_name, err, response.request.url))
             content = str(err.response.content)
             if isinstance(result_json, dict):
@@ -17,6 +17,14 @@ class CacheResource(Resource, metaclass=abc.ABCMeta):
     cache_user_related: bool = None
     # 是否使用压缩
     cache_compress = True
+    # 缓存未命中时是否只允许一个调用方执行请求
+    cache_single_flight = False
+    # 单飞模式是否使用分布式锁
+    cache_distributed_lock = False
+    # 软过期时间，超过后返回旧数据并在后台刷新
+    cache_soft_timeout = None
+    # 计算缓存 key 中参数哈希的函数，默认为 count_md5
+    cache_key_hash_func = None
 
     def __init__(self, *args, **kwargs):
         # 若cache_type为None则视为关闭缓存功能
@@ -55,6 +63,11 @@ class CacheResource(Resource, metaclass=abc.ABCMeta):
             compress=self.cache_compress,
             is_cache_func=self.cache_write_trigger,
             func_key_generator=func_key_generator,
+            single_flight=self.cache_single_flight,
+            distributed_lock=self.cache_distributed_lock,
+            soft_timeout=self.cache_soft_timeout,
+            # 通过类获取，避免函数被绑定为方法
+            key_hash_func=self.__class__.cache_key_hash_func,
         )(self.request)
 
     def cache_write_trigger(self, res):
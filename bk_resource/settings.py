@@ -15,6 +15,10 @@ class BkResourceSettings(UserSettings):
         DEFAULT_API_DIR="api",
         DEFAULT_RESOURCE_DIRS=[],
         LOCAL_CACHE_ENABLE=False,
+        CACHE_LOCK_REDIS_CONF=None,
+        CACHE_LOCK_TIMEOUT=10,
+        CACHE_COMPRESS_CODECS=None,
+        CACHE_KEY_HASH_FUNC="xTool.codec.count_md5",
         INTERFACE_COMMON_PARAMS={
             "bk_app_code": settings.APP_CODE,
             "bk_app_secret": settings.SECRET_KEY,
@@ -32,6 +36,14 @@ class BkResourceSettings(UserSettings):
         REQUEST_BKAPI_COOKIE_FIELDS=["blueking_language", "django_language"],
         REQUEST_LANGUGAE_HEADER_KEY="blueking-language",
         RESOURCE_BULK_REQUEST_PROCESSES=None,
+        RESOURCE_BULK_REQUEST_POOL_SIZE=None,
+        RESOURCE_BULK_REQUEST_CHUNK_SIZE=1,
+        RESOURCE_HTTP_POOL_CONNECTIONS=10,
+        RESOURCE_HTTP_POOL_MAXSIZE=20,
+        RESOURCE_HTTP_POOL_BLOCK=False,
+        RESOURCE_HTTP_MAX_RETRIES=0,
+        RESOURCE_ASYNC_HTTP_MAX_CONNECTIONS=100,
+        RESOURCE_ASYNC_BULK_REQUEST_CONCURRENCY=10,
     )
 
     LAZY_IMPORT_SETTINGS = (
@@ -40,6 +52,7 @@ class BkResourceSettings(UserSettings):
         "DEFAULT_STANDARD_RESPONSE_BUILDER",
         "DEFAULT_SWAGGER_SCHEMA_CLASS",
         "REQUEST_LOG_HANDLER",
+        "CACHE_KEY_HASH_FUNC",
     )
 
 
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Dict
+
+import pytest
+
+from bk_resource.base import Resource
+
+
+class MockBulkResource(Resource):
+    support_data_collect = False
+    bulk_request_concurrency = 2
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def perform_request(self, validated_request_data: Dict):
+        cls = self.__class__
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.01)
+        with cls.lock:
+            cls.active -= 1
+        if validated_request_data.get("error"):
+            raise ValueError(validated_request_data["error"])
+        return validated_request_data["value"]
+
+
+class TestBulkRequest:
+    def test_bulk_request(self):
+        actual = MockBulkResource().bulk_request([{"value": i} for i in range(10)])
+        assert actual == list(range(10))
+        assert MockBulkResource.peak <= MockBulkResource.bulk_request_concurrency
+
+    def test_bulk_request__chunk_size(self):
+        actual = MockBulkResource().bulk_request([{"value": i} for i in range(10)], chunk_size=3)
+        assert actual == list(range(10))
+
+    def test_bulk_request__ignore_exceptions(self):
+        request_data = [{"value": 1}, {"error": "error"}]
+        with pytest.raises(ValueError):
+            MockBulkResource().bulk_request(request_data)
+        actual = MockBulkResource().bulk_request(request_data, ignore_exceptions=True)
+        assert actual == [1, None]
+        with pytest.raises(ValueError):
+            MockBulkResource().bulk_request([{"error": "error"}], ignore_exceptions=True)
+
+    def test_bulk_request_iter(self):
+        actual = sorted(MockBulkResource().bulk_request_iter([{"value": i} for i in range(5)]))
+        assert actual == [(i, i) for i in range(5)]
+
+    def test_bulk_request__type_error(self):
+        with pytest.raises(TypeError):
+            MockBulkResource().bulk_request({"value": 1})
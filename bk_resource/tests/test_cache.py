@@ -0,0 +1,182 @@
+import logging
+import sys
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from bk_resource.utils.cache import (
+    CacheCodec,
+    CacheTypeItem,
+    InstanceCache,
+    KeyLocks,
+    RedisKeyLocks,
+    UsingCache,
+)
+from xTool.codec import canonical_hash
+from xTool.lock import lock_stats
+
+
+class TestKeyLocks:
+    def test_acquire(self):
+        locks = KeyLocks()
+        with locks.acquire("key") as acquired:
+            assert acquired
+            with locks.acquire("key", timeout=0) as acquired:
+                assert not acquired
+            with locks.acquire("other", timeout=0) as acquired:
+                assert acquired
+        assert not locks._locks
+
+
+class TestRedisKeyLocks:
+    def test_acquire(self):
+        client = fakeredis.FakeStrictRedis(decode_responses=True)
+        locks = RedisKeyLocks(client, ttl=10, interval=0.01)
+        with locks.acquire("key") as acquired:
+            assert acquired
+            with locks.acquire("key", timeout=0) as acquired:
+                assert not acquired
+            with locks.acquire("key", timeout=0.05) as acquired:
+                assert not acquired
+            with locks.acquire("other", timeout=0) as acquired:
+                assert acquired
+        assert not client.exists("key")
+        assert not client.exists("other")
+        # 按名称汇总统计，不会为每个 key 保存一份
+        assert lock_stats.get("key") == {}
+        assert lock_stats.get("bk_resource_cache")["acquired"] >= 2
+
+    def test_release_only_own_lock(self):
+        client = fakeredis.FakeStrictRedis(decode_responses=True)
+        locks = RedisKeyLocks(client, ttl=10)
+        with locks.acquire("key") as acquired:
+            assert acquired
+            # 锁过期后被其他调用方持有
+            client.set("key", "other")
+        assert client.get("key") == "other"
+
+
+class TestUsingCache:
+    def test_single_flight(self):
+        calls = []
+
+        def func(value):
+            calls.append(value)
+            time.sleep(0.1)
+            return {"value": value}
+
+        cached_func = UsingCache(CacheTypeItem("test_single_flight", 60), user_related=False, single_flight=True)(func)
+        threads = [threading.Thread(target=cached_func, args=(1,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert calls == [1]
+        assert cached_func(1) == {"value": 1}
+
+    def test_soft_timeout(self):
+        calls = []
+
+        def func(value):
+            calls.append(value)
+            return {"value": value, "count": len(calls)}
+
+        cached_func = UsingCache(CacheTypeItem("test_soft_timeout", 60), user_related=False, soft_timeout=0.1)(func)
+        assert cached_func(1) == {"value": 1, "count": 1}
+        time.sleep(0.2)
+        # 软过期后先返回旧数据，再在后台刷新
+        assert cached_func(1) == {"value": 1, "count": 1}
+        time.sleep(0.2)
+        assert cached_func(1) == {"value": 1, "count": 2}
+
+    def test_soft_timeout_refresh_error(self, caplog):
+        calls = []
+
+        def func(value):
+            calls.append(value)
+            if len(calls) > 1:
+                raise ValueError(value)
+            return {"value": value}
+
+        cached_func = UsingCache(
+            CacheTypeItem("test_soft_timeout_refresh_error", 60), user_related=False, soft_timeout=0.1
+        )(func)
+        assert cached_func(1) == {"value": 1}
+        time.sleep(0.2)
+        with caplog.at_level(logging.ERROR, logger="bk_resource"):
+            assert cached_func(1) == {"value": 1}
+            time.sleep(0.2)
+        (record,) = [record for record in caplog.records if "background refresh failed" in record.getMessage()]
+        # 后台刷新失败时记录异常堆栈
+        assert isinstance(record.exc_info[1], ValueError)
+
+    def test_get_many(self):
+        using_cache = UsingCache(CacheTypeItem("test_get_many", 60), user_related=False)
+        data = {"key_1": {"value": 1}, "key_2": [1, 2, 3] * 10}
+        using_cache.set_many(data)
+        actual = using_cache.get_many(["key_1", "key_2", "key_3"])
+        assert actual == data
+
+    def test_many(self):
+        calls = []
+
+        def func(value):
+            calls.append(value)
+            return {"value": value}
+
+        cached_func = UsingCache(CacheTypeItem("test_many", 60), user_related=False)(func)
+        assert cached_func(1) == {"value": 1}
+        actual = cached_func.many([1, 2, (3,), 2])
+        assert actual == [{"value": 1}, {"value": 2}, {"value": 3}, {"value": 2}]
+        assert calls == [1, 2, 3]
+
+    def test_key_hash_func(self):
+        using_cache = UsingCache(CacheTypeItem("test_key_hash_func", 60), user_related=False)
+        assert using_cache._cache_key(len, ([1, 2],), {}) == using_cache._cache_key(len, ([2, 1],), {})
+
+        using_cache = UsingCache(
+            CacheTypeItem("test_key_hash_func", 60), user_related=False, key_hash_func=canonical_hash
+        )
+        assert canonical_hash(({"a": 1},)) in using_cache._cache_key(len, ({"a": 1},), {})
+
+
+class TestCacheCodec:
+    def test_encode(self):
+        pytest.importorskip("zstandard")
+        pytest.importorskip("lz4.frame")
+        codec = CacheCodec([(15, "zlib"), (100, "zstd")])
+        value = {"value": "a" * 10}
+        assert codec.encode({"a": 1}) == b'{"a":1}'
+        assert codec.decode(codec.encode(value)) == value
+        value = {"value": "a" * 100}
+        assert codec.encode(value).startswith(CacheCodec.ZSTD_MAGIC)
+        assert codec.decode(codec.encode(value)) == value
+        assert CacheCodec([(15, "lz4")]).decode(codec.encode(value)) == value
+
+    def test_unknown_compressor(self):
+        with pytest.raises(ValueError):
+            CacheCodec([(15, "brotli")])
+
+    def test_missing_compressor(self, monkeypatch):
+        CacheCodec.get_compressor.cache_clear()
+        monkeypatch.setitem(sys.modules, "zstandard", None)
+        monkeypatch.delitem(sys.modules, "xTool.crypto.compress.zstd_compress", raising=False)
+        try:
+            with pytest.raises(ImportError, match="compress"):
+                CacheCodec([(15, "zstd")])
+        finally:
+            CacheCodec.get_compressor.cache_clear()
+
+
+class TestInstanceCache:
+    def test_set(self):
+        cache = InstanceCache()
+        cache.set("a", 1)
+        cache.set("b", 2, seconds=0.05)
+        time.sleep(0.1)
+        # seconds 为 0 时永不过期
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert InstanceCache.instance() is InstanceCache.instance()
@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bk_resource.contrib.api import APIResource
+from bk_resource.exceptions import APIRequestError
+from bk_resource.utils.transport import (
+    TransportRegistry,
+    async_transport_registry,
+    transport_registry,
+)
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 500 if "error" in self.path else 200
+        body = json.dumps({"result": True, "code": 0, "data": self.path}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), JsonHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}".format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestTransportRegistry:
+    def test_get_session(self):
+        registry = TransportRegistry()
+        key = registry.make_key("test", "http://example.com/api/")
+        assert key == "test:http://example.com"
+        session = registry.get_session(key)
+        assert registry.get_session(key) is session
+        assert session.adapters["http://"] is registry.get_adapter(key)
+        assert (registry.hits, registry.misses) == (2, 1)
+
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(registry.get_session(key)))
+        thread.start()
+        thread.join()
+        assert sessions[0] is not session
+        assert sessions[0].adapters["http://"] is session.adapters["http://"]
+
+    def test_api_resource(self, server):
+        class MockApiResource(APIResource):
+            module_name = "test_transport"
+            base_url = server
+            action = "/ping"
+            method = "GET"
+            support_data_collect = False
+
+        for _ in range(3):
+            assert MockApiResource().request() == "/ping"
+        stats = transport_registry.stats()[transport_registry.make_key("test_transport", server)]
+        assert stats == {"requests": 3, "new_connections": 1, "reused_connections": 2}
+
+
+@pytest.fixture
+def echo_resource(server):
+    class EchoApiResource(APIResource):
+        module_name = "test_async_transport"
+        base_url = server
+        action = "/echo/{key}"
+        url_keys = ["key"]
+        method = "GET"
+        support_data_collect = False
+
+    return EchoApiResource()
+
+
+class TestAsyncRequest:
+    @pytest.mark.asyncio
+    async def test_async_request(self, echo_resource):
+        assert await echo_resource.async_request({"key": "a"}) == "/echo/a?key=a"
+        client = async_transport_registry.get_client()
+        assert async_transport_registry.get_client() is client
+        await async_transport_registry.aclose()
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_abulk_request(self, echo_resource):
+        actual = await echo_resource.abulk_request([{"key": i} for i in range(5)], concurrency=2)
+        assert actual == ["/echo/{0}?key={0}".format(i) for i in range(5)]
+
+        request_data = [{"key": "a"}, {"key": "error"}]
+        with pytest.raises(APIRequestError):
+            await echo_resource.abulk_request(request_data)
+        assert await echo_resource.abulk_request(request_data, ignore_exceptions=True) == ["/echo/a?key=a", None]
+        await async_transport_registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_abulk_request_logs_traceback(self, echo_resource, caplog):
+        request_data = [{"key": "a"}, {"key": "error"}]
+        with caplog.at_level(logging.ERROR, logger="bk_resource"):
+            await echo_resource.abulk_request(request_data, ignore_exceptions=True)
+        (record,) = [record for record in caplog.records if record.msg == "bulk request failed: %s"]
+        assert isinstance(record.exc_info[1], APIRequestError)
+        await async_transport_registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_async_request_wraps_split_error(self, server):
+        class PostApiResource(APIResource):
+            module_name = "test_async_transport"
+            base_url = server
+            action = "/post"
+            method = "POST"
+            support_data_collect = False
+
+            @staticmethod
+            def split_request_data(data):
+                raise ValueError("invalid request data")
+
+        resource = PostApiResource()
+        with pytest.raises(APIRequestError):
+            resource.request({"key": "a"})
+        with pytest.raises(APIRequestError):
+            await resource.async_request({"key": "a"})
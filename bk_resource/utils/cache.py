@@ -1,11 +1,14 @@
 import functools
+import threading
 import time
 import zlib
-from typing import Any, Callable
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import orjson as json
 from django.core.cache import cache, caches
 from django.utils.encoding import force_bytes
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext
 
 from bk_resource.base import Empty
@@ -13,13 +16,167 @@ from bk_resource.settings import bk_resource_settings
 from bk_resource.utils.local import local
 from bk_resource.utils.logger import logger
 from bk_resource.utils.request import get_request_username
-from xTool.codec import count_md5
+from xTool.cache import Cache
+from xTool.cache.constants import CacheBackendType
+from xTool.cache.storage.memory import InstanceCache as BaseInstanceCache
+from xTool.lock import RedisLock
 
 try:
     mem_cache = caches["locmem"]
 except Exception:
     mem_cache = cache
 
+# 软过期数据的包装标记
+SOFT_TTL_FLAG = "__soft_ttl_refresh_at__"
+
+
+class KeyLocks:
+    """
+    进程内按 key 加锁，锁在无人使用时自动回收
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def acquire(self, key: str, timeout: float = -1):
+        with self._guard:
+            lock, count = self._locks.get(key, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[key] = (lock, count + 1)
+
+        acquired = lock.acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+            with self._guard:
+                lock, count = self._locks[key]
+                if count <= 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, count - 1)
+
+
+class RedisKeyLocks:
+    """
+    跨进程按 key 加锁，基于 xTool.lock.RedisLock 实现
+    """
+
+    def __init__(self, client, ttl: int = 60, interval: float = 0.05, name: str = "bk_resource_cache"):
+        """
+        :param interval: 加锁失败时的重试间隔，单位：s
+        :param name: lock_stats 中统计使用的名称，每个缓存 key 都有各自的锁，按名称汇总统计
+        """
+        self.client = client
+        self.ttl = ttl
+        self.interval = interval
+        self.name = name
+
+    @contextmanager
+    def acquire(self, key: str, timeout: float = -1):
+        """
+        :param timeout: 最长等待时间，单位：s，小于 0 时一直等待，等于 0 时不等待
+        """
+        lock = RedisLock(
+            self.client, key, ttl=self.ttl, min_backoff=self.interval, max_backoff=self.interval, name=self.name
+        )
+        acquired = False
+        try:
+            acquired = lock.acquire(blocking=timeout != 0, timeout=None if timeout < 0 else timeout)
+        except Exception as e:
+            # 锁服务异常时退化为不加锁
+            logger.exception(gettext("[Cache]获取分布式锁[key:%s]失败：%s"), key, e)
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except Exception as e:
+                    logger.exception(gettext("[Cache]释放分布式锁[key:%s]失败：%s"), key, e)
+
+
+local_key_locks = KeyLocks()
+
+
+def get_redis_key_locks() -> Optional[RedisKeyLocks]:
+    """
+    获取分布式锁，未配置 CACHE_LOCK_REDIS_CONF 时返回 None
+    """
+    connection_conf = bk_resource_settings.CACHE_LOCK_REDIS_CONF
+    if not connection_conf:
+        return None
+    try:
+        client = Cache(backend=CacheBackendType.CACHE, connection_conf=connection_conf)
+    except Exception as e:
+        # 锁服务异常时退化为进程内锁
+        logger.exception(gettext("[Cache]连接分布式锁服务失败：%s"), e)
+        return None
+    return RedisKeyLocks(client, ttl=bk_resource_settings.CACHE_LOCK_TIMEOUT)
+
+
+class CacheCodec:
+    """
+    缓存编解码：orjson 序列化后按数据长度选择压缩算法
+    解码时根据数据头识别压缩算法，兼容不同配置写入的缓存
+    """
+
+    COMPRESSORS = {
+        "zlib": "xTool.crypto.compress.zlib_compress.ZlibCompress",
+        "zstd": "xTool.crypto.compress.zstd_compress.ZstdCompress",
+        "lz4": "xTool.crypto.compress.lz4_compress.Lz4Compress",
+    }
+    ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+    LZ4_MAGIC = b"\x04\x22\x4d\x18"
+
+    def __init__(self, compress_codecs: List[Tuple[int, str]]):
+        """
+        :param compress_codecs: [(最小数据长度, 压缩算法)]，数据长度超过最小长度时使用对应的压缩算法
+        """
+        self.compress_codecs = sorted(
+            ((min_length, self.get_compressor(name)) for min_length, name in compress_codecs),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def get_compressor(cls, name: str):
+        if name not in cls.COMPRESSORS:
+            raise ValueError(gettext("[Cache]不支持的压缩算法：%s，可选：%s") % (name, ", ".join(cls.COMPRESSORS)))
+        # 按需引入，zstd/lz4 为可选依赖
+        try:
+            return import_string(cls.COMPRESSORS[name])
+        except ImportError as e:
+            raise ImportError(
+                gettext("[Cache]压缩算法 %s 依赖的模块 %s 未安装，请执行 pip install xTool[compress]") % (name, e.name)
+            ) from e
+
+    def encode(self, value: Any) -> bytes:
+        data = json.dumps(value)
+        for min_length, compressor in self.compress_codecs:
+            if len(data) > min_length:
+                return compressor.compress(data)
+        return data
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        data = force_bytes(data)
+        if data.startswith(self.ZSTD_MAGIC):
+            data = self.get_compressor("zstd").decompress(data)
+        elif data.startswith(self.LZ4_MAGIC):
+            data = self.get_compressor("lz4").decompress(data)
+        else:
+            try:
+                data = zlib.decompress(data)
+            except Exception:
+                pass
+        return json.loads(data)
+
 
 class UsingCache:
     min_length = 15
@@ -34,6 +191,11 @@ class UsingCache:
         compress=True,
         is_cache_func=lambda res: True,
         func_key_generator=lambda func: "{}.{}".format(func.__module__, func.__name__),
+        single_flight=False,
+        distributed_lock=False,
+        soft_timeout=None,
+        compress_codecs=None,
+        key_hash_func=None,
     ):
         """
         :param cache_type: 缓存类型
@@ -41,12 +203,21 @@ class UsingCache:
         :param compress: 是否进行压缩
         :param is_cache_func: 缓存函数，当函数返回true时，则进行缓存
         :param func_key_generator: 函数标识key的生成逻辑
+        :param single_flight: 缓存未命中时，同一个key只允许一个调用方执行函数，其余调用方等待结果
+        :param distributed_lock: single_flight 是否使用redis锁在多进程间互斥
+        :param soft_timeout: 软过期时间，单位：s，超过后返回旧数据并在后台刷新缓存
+        :param compress_codecs: 压缩算法列表 [(最小数据长度, 压缩算法)]，按序列化后的数据长度选择压缩算法
+        :param key_hash_func: 计算参数哈希的函数，默认为 count_md5，可使用更快的 xTool.codec.canonical_hash
         """
         self.cache_type = cache_type
         self.backend_cache_type = backend_cache_type
         self.compress = compress
         self.is_cache_func = is_cache_func
         self.func_key_generator = func_key_generator
+        self.single_flight = single_flight
+        self.distributed_lock = distributed_lock
+        self.soft_timeout = soft_timeout
+        self.key_hash_func = key_hash_func or bk_resource_settings.CACHE_KEY_HASH_FUNC
         # 先看用户是否提供了user_related参数
         # 若无，则查看cache_type是否提供了user_related参数
         # 若都没有定义，则user_related默认为True
@@ -59,6 +230,9 @@ class UsingCache:
 
         self.using_cache_type = self._get_using_cache_type()
         self.local_cache_enable = bool(bk_resource_settings.LOCAL_CACHE_ENABLE)
+        self.codec = CacheCodec(
+            compress_codecs or bk_resource_settings.CACHE_COMPRESS_CODECS or [(self.min_length, "zlib")]
+        )
 
     def _get_username(self):
         username = "backend"
@@ -85,8 +259,8 @@ class UsingCache:
                 self.key_prefix,
                 self.using_cache_type.key,
                 self.func_key_generator(task_definition),
-                count_md5(args),
-                count_md5(kwargs),
+                self.key_hash_func(args),
+                self.key_hash_func(kwargs),
                 self._get_username(),
             )
         return None
@@ -100,51 +274,101 @@ class UsingCache:
         local (miss), cache(miss): cache <- result
         local (miss), cache(hit): local <- result
         """
-        # 从线程缓存获取
-        if self.local_cache_enable:
-            value = getattr(local, cache_key, None)
-            if value:
-                return json.loads(value)
+        value, _ = self._get_entry(cache_key, default)
+        return value
 
-        # 从 django 缓存获取
-        value = mem_cache.get(cache_key, default=None) or cache.get(cache_key, default=None)
-        if value is None:
-            return default
+    def _get_entry(self, cache_key: str, default=None) -> Tuple[Any, bool]:
+        """
+        获取缓存及其是否已软过期
+        """
+        entries = self._get_entries([cache_key])
+        if cache_key not in entries:
+            return default, False
+        return entries[cache_key]
 
-        # 解压缩
-        if self.compress:
-            try:
-                value = zlib.decompress(value)
-            except Exception:
-                pass
-            try:
-                value = json.loads(force_bytes(value))
-            except Exception:
-                value = default
+    def _get_entries(self, cache_keys: List[str]) -> Dict[str, Tuple[Any, bool]]:
+        """
+        批量获取缓存及其是否已软过期，未命中的key不在返回结果中
+        """
+        entries = {}
 
-        # 保存到本地缓存
-        if value and self.local_cache_enable:
-            setattr(local, cache_key, json.dumps(value))
+        # 从线程缓存获取，一级缓存保存的是解码后的对象，调用方不应修改返回值
+        if self.local_cache_enable:
+            for cache_key in cache_keys:
+                value = getattr(local, cache_key, None)
+                if value is not None:
+                    entries[cache_key] = (value, False)
 
-        return value
+        # 从 django 缓存获取
+        missing_keys = [cache_key for cache_key in cache_keys if cache_key not in entries]
+        raw_values = {}
+        if missing_keys:
+            raw_values = mem_cache.get_many(missing_keys)
+        if mem_cache is not cache:
+            missing_keys = [cache_key for cache_key in missing_keys if raw_values.get(cache_key) is None]
+            if missing_keys:
+                raw_values.update(cache.get_many(missing_keys))
+
+        for cache_key, value in raw_values.items():
+            if value is None:
+                continue
+
+            # 解压缩
+            if self.compress:
+                try:
+                    value = self.codec.decode(value)
+                except Exception:
+                    continue
+
+            # 解开软过期包装
+            stale = False
+            if isinstance(value, dict) and SOFT_TTL_FLAG in value:
+                stale = value[SOFT_TTL_FLAG] <= time.time()
+                value = value.get("value")
+            if value is None:
+                continue
+
+            # 保存到本地缓存
+            if value and self.local_cache_enable:
+                setattr(local, cache_key, value)
+
+            entries[cache_key] = (value, stale)
+
+        return entries
+
+    def get_many(self, cache_keys: List[str]) -> Dict[str, Any]:
+        """
+        批量获取缓存，每一级缓存只访问一次，未命中的key不在返回结果中
+        """
+        return {cache_key: value for cache_key, (value, _) in self._get_entries(cache_keys).items()}
+
+    def _encode(self, value: Any):
+        if not self.compress:
+            return value
+        return self.codec.encode(value)
 
     def set_value(self, key: str, value: Any, timeout: int = 60):
+        return self.set_many({key: value}, timeout)
+
+    def set_many(self, data: Dict[str, Any], timeout: int = 60):
+        """
+        批量设置缓存，每一级缓存只访问一次
+        """
         # 压缩
-        if self.compress:
+        encoded_data = {}
+        for key, value in data.items():
             try:
-                value = json.dumps(value)
+                encoded_data[key] = self._encode(value)
             except Exception:
                 logger.exception(gettext("[Cache]不支持序列化的类型: %s"), type(value))
-                return False
-
-            if len(value) > self.min_length:
-                value = zlib.compress(value.encode())
+        if not encoded_data:
+            return False
 
         # 保存到 django cache
         try:
             if mem_cache is not cache:
-                mem_cache.set(key, value, 60)
-            cache.set(key, value, timeout)
+                mem_cache.set_many(encoded_data, 60)
+            cache.set_many(encoded_data, timeout)
         except Exception as e:
             try:
                 from core.utils.request_provider import get_request
@@ -155,35 +379,84 @@ class UsingCache:
             # 缓存出错不影响主流程
             logger.exception(
                 gettext("存缓存[key:%s]时报错：%s\n value: %r\nurl: %s"),
-                key,
+                ",".join(encoded_data),
                 e,
-                value,
+                encoded_data,
                 request_path,
             )
+        return True
 
     def _cached(self, task_definition: Callable, args, kwargs):
         """
         【默认缓存模式】
         先检查是否缓存是否存在
-        若存在，则直接返回缓存内容
+        若存在，则直接返回缓存内容；若已软过期，则在后台刷新缓存
         若不存在，则执行函数，并将结果回写到缓存中
         """
         cache_key = self._cache_key(task_definition, args, kwargs)
-        if cache_key:
-            return_value = self.get_value(cache_key)
+        if not cache_key:
+            return self._cacheless(task_definition, args, kwargs)
 
-            if return_value is None:
-                return_value = self._refresh(task_definition, args, kwargs)
-        else:
-            return_value = self._cacheless(task_definition, args, kwargs)
+        return_value, stale = self._get_entry(cache_key)
+        if return_value is None:
+            if self.single_flight:
+                return self._single_flight_refresh(cache_key, task_definition, args, kwargs)
+            return self._refresh(task_definition, args, kwargs, cache_key=cache_key)
+
+        if stale:
+            self._background_refresh(cache_key, task_definition, args, kwargs)
         return return_value
 
-    def _refresh(self, task_definition: Callable, args, kwargs):
+    @contextmanager
+    def _lock(self, key: str, timeout: float = -1):
+        """
+        进程内锁保证同一进程只有一个线程竞争分布式锁
+        """
+        with local_key_locks.acquire(key, timeout) as acquired:
+            redis_key_locks = get_redis_key_locks() if self.distributed_lock and acquired else None
+            if redis_key_locks is None:
+                yield acquired
+                return
+            with redis_key_locks.acquire(key, timeout) as acquired:
+                yield acquired
+
+    def _single_flight_refresh(self, cache_key: str, task_definition: Callable, args, kwargs):
+        """
+        【单飞模式】
+        同一个key只有一个调用方执行函数，其余调用方等待后直接读取缓存
+        等待超时则自行执行函数
+        """
+        with self._lock(f"{cache_key}:lock", bk_resource_settings.CACHE_LOCK_TIMEOUT):
+            # 等待期间其他调用方可能已经回写了缓存
+            return_value = self.get_value(cache_key)
+            if return_value is not None:
+                return return_value
+            return self._refresh(task_definition, args, kwargs, cache_key=cache_key)
+
+    def _background_refresh(self, cache_key: str, task_definition: Callable, args, kwargs):
+        """
+        在后台线程刷新已软过期的缓存，同一个key同时只有一个刷新任务
+        """
+        # 模块引入，避免循环引用
+        from bk_resource.utils.thread_backend import get_shared_pool
+
+        def refresh():
+            with self._lock(f"{cache_key}:refresh", timeout=0) as acquired:
+                if acquired:
+                    self._refresh(task_definition, args, kwargs, cache_key=cache_key)
+
+        # error_callback 不在 except 块中执行，需要显式传入异常
+        get_shared_pool().apply_async(
+            refresh,
+            error_callback=lambda e: logger.error("[Cache] background refresh failed: %s", e, exc_info=e),
+        )
+
+    def _refresh(self, task_definition: Callable, args, kwargs, cache_key: str = None):
         """
         【强制刷新模式】
         不使用缓存的数据，将函数执行返回结果回写缓存
         """
-        cache_key = self._cache_key(task_definition, args, kwargs)
+        cache_key = cache_key or self._cache_key(task_definition, args, kwargs)
 
         return_value = self._cacheless(task_definition, args, kwargs)
 
@@ -191,10 +464,52 @@ class UsingCache:
         # 或者不缓存空数据且数据为空时
         # 需要进行缓存
         if self.is_cache_func(return_value):
-            self.set_value(cache_key, return_value, self.using_cache_type.timeout)
+            self.set_value(cache_key, self._wrap_soft_ttl(return_value), self.using_cache_type.timeout)
 
         return return_value
 
+    def _wrap_soft_ttl(self, value: Any) -> Any:
+        """
+        配置了软过期时间时，将刷新时间与数据一起保存
+        """
+        if not self.soft_timeout:
+            return value
+        return {SOFT_TTL_FLAG: time.time() + self.soft_timeout, "value": value}
+
+    def _cached_many(self, task_definition: Callable, params_list):
+        """
+        【批量缓存模式】
+        params_list 中每一项为一次调用的位置参数，批量读取缓存
+        未命中的逐个执行函数，并将结果批量回写到缓存中
+        """
+        params_list = [tuple(params) if isinstance(params, (tuple, list)) else (params,) for params in params_list]
+        if not self.using_cache_type:
+            return [self._cacheless(task_definition, params, {}) for params in params_list]
+
+        cache_keys = [self._cache_key(task_definition, params, {}) for params in params_list]
+        entries = self._get_entries(cache_keys)
+
+        results = []
+        computed = {}
+        missing = {}
+        for cache_key, params in zip(cache_keys, params_list):
+            if cache_key in entries:
+                return_value, stale = entries[cache_key]
+                if stale:
+                    self._background_refresh(cache_key, task_definition, params, {})
+            elif cache_key in computed:
+                return_value = computed[cache_key]
+            else:
+                return_value = computed[cache_key] = self._cacheless(task_definition, params, {})
+                if self.is_cache_func(return_value):
+                    missing[cache_key] = self._wrap_soft_ttl(return_value)
+            results.append(return_value)
+
+        if missing:
+            self.set_many(missing, self.using_cache_type.timeout)
+
+        return results
+
     def _cacheless(self, task_definition, args, kwargs):
         """
         【忽略缓存模式】
@@ -219,11 +534,17 @@ class UsingCache:
             return_value = self._cacheless(task_definition, args, kwargs)
             return return_value
 
+        @functools.wraps(task_definition)
+        def many_wrapper(params_list):
+            return_value = self._cached_many(task_definition, params_list)
+            return return_value
+
         # 为函数设置各种调用模式
         default_wrapper = cached_wrapper
         default_wrapper.cached = cached_wrapper
         default_wrapper.refresh = refresh_wrapper
         default_wrapper.cacheless = cacheless_wrapper
+        default_wrapper.many = many_wrapper
 
         return default_wrapper
 
@@ -252,7 +573,7 @@ class CacheTypeItem:
         return CacheTypeItem(self.key, timeout, self.user_related, self.label)
 
 
-class InstanceCache:
+class InstanceCache(BaseInstanceCache):
     _instance = Empty()
 
     @classmethod
@@ -261,48 +582,12 @@ class InstanceCache:
             cls._instance = cls()
         return cls._instance
 
-    def __init__(self):
-        self.__cache = {}
-
-    def clear(self):
-        self.__cache = {}
-
     def set(self, key, value, seconds=0, use_round=False):
         """
         :param key:
         :param value:
-        :param seconds:
+        :param seconds: 为 0 时永不过期
         :param use_round: 时间是否需要向上取整，取整用于缓存时间同步
         :return:
         """
-        if not seconds:
-            timeout = 0
-        else:
-            if not use_round:
-                timeout = time.time() + seconds
-            else:
-                timeout = (time.time() + seconds) // seconds * seconds
-        self.__cache[key] = (value, timeout)
-
-    def __get_raw(self, key):
-        value = self.__cache.get(key)
-        if not value:
-            return None
-        if value[1] and time.time() > value[1]:
-            del self.__cache[key]
-            return None
-        return value
-
-    def exists(self, key):
-        value = self.__get_raw(key)
-        return value is not None
-
-    def get(self, key):
-        value = self.__get_raw(key)
-        return value and value[0]
-
-    def delete(self, key):
-        try:
-            del self.__cache[key]
-        except KeyError:
-            pass
+        self._set(key, value, self.get_expire_time(seconds, use_round) if seconds else 0)
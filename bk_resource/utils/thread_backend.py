@@ -1,3 +1,6 @@
+import atexit
+import os
+import threading
 from functools import partial
 from multiprocessing.pool import ThreadPool as _ThreadPool
 from threading import Thread
@@ -132,3 +135,73 @@ class ThreadPool(_ThreadPool):
     def imap_unordered(self, func, iterable, chunksize=1):
         func = partial(run_func_with_local, func, local)
         return super().imap_unordered(self.get_func_with_local(func), iterable, chunksize=chunksize)
+
+
+# 进程级共享线程池，避免每次批量请求都创建和销毁线程池
+_shared_pool = None
+_shared_pool_pid = None
+_shared_pool_size = None
+_shared_pool_lock = threading.Lock()
+# 标记当前线程是否为共享线程池的工作线程
+_worker_local = threading.local()
+
+
+def _mark_shared_pool_worker():
+    _worker_local.in_shared_pool = True
+
+
+def in_shared_pool_worker() -> bool:
+    """
+    当前线程是否为共享线程池的工作线程
+    在工作线程中再次向共享线程池提交任务并等待结果，线程池满载时会导致死锁
+    """
+    return getattr(_worker_local, "in_shared_pool", False)
+
+
+def get_shared_pool() -> ThreadPool:
+    """
+    获取进程级共享线程池（懒加载）
+    fork 后的子进程会重新创建线程池
+    """
+    global _shared_pool, _shared_pool_pid, _shared_pool_size
+
+    pid = os.getpid()
+    if _shared_pool is not None and _shared_pool_pid == pid:
+        return _shared_pool
+
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool_pid != pid:
+            # 模块引入，避免循环引用
+            from bk_resource.settings import bk_resource_settings
+            from bk_resource.tools import get_processes
+
+            processes = bk_resource_settings.RESOURCE_BULK_REQUEST_POOL_SIZE
+            if not processes or not isinstance(processes, int):
+                processes = get_processes()
+            _shared_pool = ThreadPool(processes=processes, initializer=_mark_shared_pool_worker)
+            _shared_pool_pid = pid
+            _shared_pool_size = processes
+    return _shared_pool
+
+
+def get_shared_pool_size() -> int:
+    """
+    获取共享线程池的线程数
+    """
+    get_shared_pool()
+    return _shared_pool_size
+
+
+@atexit.register
+def close_shared_pool():
+    """
+    关闭共享线程池
+    """
+    global _shared_pool, _shared_pool_pid
+
+    with _shared_pool_lock:
+        pool, pid = _shared_pool, _shared_pool_pid
+        _shared_pool, _shared_pool_pid = None, None
+    # 子进程不关闭父进程创建的线程池
+    if pool is not None and pid == os.getpid():
+        pool.terminate()
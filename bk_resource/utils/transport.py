@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bk_resource.settings import bk_resource_settings
+
+
+class TransportRegistry:
+    """
+    进程内共享的 http 连接池
+
+    按 key（通常是 模块名 + 域名）共享 HTTPAdapter，urllib3 的连接池是线程安全的，
+    每个线程使用自己的 Session 挂载共享的 HTTPAdapter，避免多线程共用 Session 的 cookie 等状态
+    """
+
+    def __init__(self):
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(module_name: Optional[str], base_url: Optional[str]) -> str:
+        parts = urlsplit(base_url or "")
+        return "{}:{}://{}".format(module_name, parts.scheme, parts.netloc)
+
+    @staticmethod
+    def create_adapter(pool_maxsize: Optional[int] = None) -> HTTPAdapter:
+        return HTTPAdapter(
+            pool_connections=bk_resource_settings.RESOURCE_HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or bk_resource_settings.RESOURCE_HTTP_POOL_MAXSIZE,
+            pool_block=bk_resource_settings.RESOURCE_HTTP_POOL_BLOCK,
+            max_retries=bk_resource_settings.RESOURCE_HTTP_MAX_RETRIES,
+        )
+
+    def get_adapter(self, key: str, pool_maxsize: Optional[int] = None) -> HTTPAdapter:
+        adapter = self._adapters.get(key)
+        if adapter is not None:
+            self.hits += 1
+            return adapter
+        with self._lock:
+            adapter = self._adapters.get(key)
+            if adapter is None:
+                self.misses += 1
+                adapter = self.create_adapter(pool_maxsize)
+                self._adapters[key] = adapter
+            else:
+                self.hits += 1
+        return adapter
+
+    def get_session(self, key: str, pool_maxsize: Optional[int] = None) -> requests.Session:
+        """
+        获得当前线程中 key 对应的 Session
+        """
+        adapter = self.get_adapter(key, pool_maxsize)
+        sessions = getattr(self._local, "sessions", None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        session = sessions.get(key)
+        # 连接池被 close 后重新创建了 HTTPAdapter，需要重新挂载
+        if session is None or session.adapters.get("https://") is not adapter:
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            sessions[key] = session
+        return session
+
+    def stats(self) -> Dict:
+        """
+        连接池统计：请求数、新建连接数、复用连接数
+        """
+        result = {}
+        for key, adapter in list(self._adapters.items()):
+            requests_count = 0
+            connections_count = 0
+            pools = adapter.poolmanager.pools
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+            result[key] = {
+                "requests": requests_count,
+                "new_connections": connections_count,
+                "reused_connections": max(requests_count - connections_count, 0),
+            }
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            adapters, self._adapters = self._adapters, {}
+        for adapter in adapters.values():
+            adapter.close()
+
+
+transport_registry = TransportRegistry()
+
+
+class AsyncTransportRegistry:
+    """
+    每个事件循环共享一个 httpx.AsyncClient
+
+    AsyncClient 的连接绑定在创建它的事件循环上，不能跨事件循环使用
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def create_client():
+        # 可选依赖，只有使用异步请求时才需要安装
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=bk_resource_settings.RESOURCE_ASYNC_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=bk_resource_settings.RESOURCE_HTTP_POOL_MAXSIZE,
+        )
+        # 与 requests 一致，自动跟随重定向
+        return httpx.AsyncClient(
+            verify=bk_resource_settings.REQUEST_VERIFY, limits=limits, trust_env=False, follow_redirects=True
+        )
+
+    def get_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = self.create_client()
+        return client
+
+    async def aclose(self) -> None:
+        """
+        关闭当前事件循环的 AsyncClient
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+async_transport_registry = AsyncTransportRegistry()
@@ -1,15 +1,41 @@
+import csv
+import datetime
+import io
+import math
+import tempfile
+import zipfile
+from decimal import Decimal
 from io import BytesIO
+from typing import Iterable, Iterator, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
 
 from django.http import StreamingHttpResponse
 from django.http.response import HttpResponse
 from django.utils.encoding import escape_uri_path
 from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+from openpyxl.workbook.child import INVALID_TITLE_REGEX
 
 __all__ = [
     "export_to_excel",
     "stream_large_export",
+    "iter_xlsx",
+    "iter_csv",
+    "stream_xlsx_export",
+    "stream_csv_export",
 ]
 
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# 流式输出时每次 yield 的最小字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+# stream_large_export 的临时文件超过该大小后写入磁盘
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# 工作表名称的最大长度
+SHEET_TITLE_MAX_LENGTH = 31
+
 
 def save_virtual_workbook(wb: Workbook) -> bytes:
     """
@@ -60,27 +86,275 @@ def export_to_excel(wb: Workbook, excel_name: str) -> HttpResponse:
     # 设置 Content-Disposition 头部，使浏览器下载文件
     # 使用 filename* 以支持非ASCII字符的文件名
     # 对文件名进行 URL 编码，确保特殊字符不会破坏 HTTP 头部
-    response["Content-Disposition"] = f"attachment;filename={escape_uri_path(excel_name)}"
+    set_attachment(response, excel_name)
+
+    return response
+
+
+def set_attachment(response: HttpResponse, file_name: str) -> None:
+    """设置下载文件名 ."""
+    response["Content-Disposition"] = f"attachment;filename={escape_uri_path(file_name)}"
 
     # 可选：设置 Access-Control-Expose-Headers，允许跨域请求中暴露 Content-Disposition 头部
     # 使得前端 JavaScript 可以读取该头部信息（例如，获取下载的文件名）
     # 强制浏览器下载文件而非直接打开
     response["Access-Control-Expose-Headers"] = "content-disposition"
 
-    return response
-
 
 # 对于超大文件（>100MB）的进一步优化
 def stream_large_export(workbook: Workbook) -> StreamingHttpResponse:
     def file_iterator():
-        buffer = BytesIO()
-        workbook.save(buffer)
-        buffer.seek(0)
-        while chunk := buffer.read(8192):  # 分块读取
-            yield chunk
-        buffer.close()
+        # 超过 SPOOL_MAX_SIZE 后写入磁盘，避免文件内容和 workbook 同时常驻内存
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+            workbook.save(buffer)
+            buffer.seek(0)
+            while chunk := buffer.read(8192):  # 分块读取
+                yield chunk
 
     return StreamingHttpResponse(
         file_iterator(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        content_type=XLSX_CONTENT_TYPE,
     )
+
+
+class _StreamBuffer(io.RawIOBase):
+    """不可 seek 的写缓冲，zipfile 写入后由生成器取出已压缩的数据"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        self.size += len(b)
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={sheet_title} sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# cellXfs：0 默认，1 日期，2 日期时间，3 时间
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_XLSX_SHEET_HEADER = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_XLSX_SHEET_FOOTER = b"</sheetData></worksheet>"
+
+
+def _xlsx_cell(ref: str, value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, float):
+        # xlsx 不支持 nan/inf，写入空单元格
+        if not math.isfinite(value):
+            return ""
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            return ""
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, datetime.datetime):
+        value = to_excel(value.replace(tzinfo=None))
+        return f'<c r="{ref}" s="2"><v>{value}</v></c>'
+    if isinstance(value, datetime.date):
+        return f'<c r="{ref}" s="1"><v>{to_excel(value)}</v></c>'
+    if isinstance(value, datetime.time):
+        return f'<c r="{ref}" s="3"><v>{to_excel(value.replace(tzinfo=None))}</v></c>'
+    value = escape(ILLEGAL_CHARACTERS_RE.sub("", str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{value}</t></is></c>'
+
+
+def _check_sheet_title(sheet_title: str) -> None:
+    """校验工作表名称，与 openpyxl 的规则一致 ."""
+    if not sheet_title or len(sheet_title) > SHEET_TITLE_MAX_LENGTH:
+        raise ValueError(f"Sheet title must be 1 to {SHEET_TITLE_MAX_LENGTH} characters: {sheet_title!r}")
+    if INVALID_TITLE_REGEX.search(sheet_title):
+        raise ValueError(f"Sheet title contains invalid characters []:*?/\\ : {sheet_title!r}")
+
+
+def iter_xlsx(
+    rows: Iterable[Sequence],
+    headers: Optional[Sequence] = None,
+    sheet_title: str = "Sheet1",
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    逐行生成 xlsx 文件内容，只生成一个工作表
+
+    不经过 openpyxl 的 Workbook，直接以流的方式写入 zip 文件，行数据写入后即可输出，
+    内存占用与行数无关，适合配合 queryset.iterator() 导出大量数据
+
+    :param rows: 行迭代器，每行是一个单元格值的序列
+    :param headers: 表头
+    :param sheet_title: 工作表名称
+    :param chunk_size: 每次输出的最小字节数
+    """
+    # 在生成器外校验，保证调用时即可抛出异常
+    _check_sheet_title(sheet_title)
+    return _iter_xlsx(rows, headers, sheet_title, chunk_size)
+
+
+def _iter_xlsx(
+    rows: Iterable[Sequence], headers: Optional[Sequence], sheet_title: str, chunk_size: int
+) -> Iterator[bytes]:
+    column_letters = []
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(sheet_title=quoteattr(sheet_title)))
+        zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _XLSX_STYLES)
+        yield buffer.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_XLSX_SHEET_HEADER)
+            if headers is not None:
+                rows = _chain_headers(headers, rows)
+            for row_index, row in enumerate(rows, 1):
+                if len(row) > len(column_letters):
+                    column_letters.extend(get_column_letter(i) for i in range(len(column_letters) + 1, len(row) + 1))
+                cells = "".join(_xlsx_cell(f"{column_letters[i]}{row_index}", value) for i, value in enumerate(row))
+                sheet.write(f'<row r="{row_index}">{cells}</row>'.encode())
+                if buffer.size >= chunk_size:
+                    yield buffer.drain()
+            sheet.write(_XLSX_SHEET_FOOTER)
+
+    yield buffer.drain()
+
+
+def _chain_headers(headers: Sequence, rows: Iterable[Sequence]) -> Iterator[Sequence]:
+    yield headers
+    yield from rows
+
+
+class _Echo:
+    """csv.writer 的写入对象，直接返回写入的内容"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(
+    rows: Iterable[Sequence],
+    headers: Optional[Sequence] = None,
+    delimiter: str = ",",
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    逐行生成 csv/tsv 文件内容，接口与 iter_xlsx 一致
+
+    以 utf-8 BOM 开头，便于 Excel 识别编码
+    """
+    writer = csv.writer(_Echo(), delimiter=delimiter)
+    if headers is not None:
+        rows = _chain_headers(headers, rows)
+    lines = ["\ufeff"]
+    size = 0
+    for row in rows:
+        line = writer.writerow(row)
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(lines).encode("utf-8")
+            lines = []
+            size = 0
+    yield "".join(lines).encode("utf-8")
+
+
+def stream_xlsx_export(
+    rows: Iterable[Sequence],
+    file_name: str,
+    headers: Optional[Sequence] = None,
+    sheet_title: str = "Sheet1",
+) -> StreamingHttpResponse:
+    """流式导出 xlsx 文件 ."""
+    response = StreamingHttpResponse(iter_xlsx(rows, headers, sheet_title), content_type=XLSX_CONTENT_TYPE)
+    set_attachment(response, file_name)
+    return response
+
+
+def stream_csv_export(
+    rows: Iterable[Sequence],
+    file_name: str,
+    headers: Optional[Sequence] = None,
+    delimiter: str = ",",
+) -> StreamingHttpResponse:
+    """流式导出 csv 文件，delimiter 为制表符时导出 tsv 文件 ."""
+    content_type = "text/tab-separated-values" if delimiter == "\t" else "text/csv"
+    response = StreamingHttpResponse(iter_csv(rows, headers, delimiter), content_type=f"{content_type}; charset=utf-8")
+    set_attachment(response, file_name)
+    return response
@@ -1,3 +1,5 @@
+import functools
+import threading
 from typing import Optional
 
 from django.conf import settings
@@ -5,6 +7,43 @@ from django.conf import settings
 from xTool.cache import Cache
 from xTool.lock import share_lock as _share_lock
 
+try:
+    from prometheus_client import Histogram
+
+    from xTool.prometheus.metrics import LATENCY_BUCKETS
+
+    LOCK_SECONDS = Histogram(
+        "share_lock_seconds",
+        "share_lock wait and hold seconds",
+        ["lock", "name"],
+        buckets=LATENCY_BUCKETS,
+    )
+except ImportError:
+    LOCK_SECONDS = None
+
+_lock_cache = None
+_lock_cache_lock = threading.Lock()
+
+
+def get_lock_cache():
+    """获得进程内共享的 redis 客户端，第一次加锁时才创建连接 ."""
+    global _lock_cache
+    if _lock_cache is None:
+        with _lock_cache_lock:
+            if _lock_cache is None:
+                _lock_cache = Cache(connection_conf=settings.REDIS_CELERY_CONF)
+    return _lock_cache
+
+
+def make_metrics_hook(lock_name: str):
+    """按被装饰的函数记录耗时，避免 hash_param 生成的 key 导致指标维度过多 ."""
+
+    def observe(key: str, name: str, seconds: float) -> None:
+        if LOCK_SECONDS is not None:
+            LOCK_SECONDS.labels(lock=lock_name, name=name).observe(seconds)
+
+    return observe
+
 
 def share_lock(
     ttl: int = 600,
@@ -12,9 +51,31 @@ def share_lock(
     hash_param: bool = False,
     typed: bool = False,
     key_prefix="share_lock",
+    blocking: bool = False,
+    timeout: Optional[float] = None,
+    renew: bool = False,
 ):
     def wrapper(func):
-        cache = Cache(connection_conf=settings.REDIS_CELERY_CONF)
-        return _share_lock(cache, ttl, identify, hash_param, typed, key_prefix)(func)
+        locked_func = None
+
+        @functools.wraps(func)
+        def _inner(*args, **kwargs):
+            nonlocal locked_func
+            if locked_func is None:
+                locked_func = _share_lock(
+                    get_lock_cache(),
+                    ttl,
+                    identify,
+                    hash_param,
+                    typed,
+                    key_prefix,
+                    blocking=blocking,
+                    timeout=timeout,
+                    renew=renew,
+                    metrics_hook=make_metrics_hook(identify or f"{key_prefix}:{func.__module__}:{func.__name__}"),
+                )(func)
+            return locked_func(*args, **kwargs)
+
+        return _inner
 
     return wrapper
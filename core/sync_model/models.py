@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import Any, Set
 
-from django.db.models import Model
+from django.db.backends.utils import format_number
+from django.db.models import DecimalField, Field, Model
 from django.utils import timezone
 
 from core.utils import from_iso_format
@@ -11,13 +12,32 @@ def get_model_value(model: Model, field: str, datetime_fields: Set) -> Any:
     """获得模型的值 ."""
     # 获得模型中字段的值
     value = getattr(model, field)
+    return normalize_value(field, value, datetime_fields)
+
+
+def normalize_value(field: str, value: Any, datetime_fields: Set) -> Any:
+    """转换为用于比较的值 ."""
     # 如果同步的是datetime类型的字段，转换为本地时区的时间字符串
     if datetime_fields and value and field in datetime_fields:
         if isinstance(value, str):
-            value = from_iso_format(value)
-        if isinstance(value, datetime):
+            # from_iso_format 已经转换为本地时区的 naive 时间，不能再次转换时区
+            value = from_iso_format(value).strftime("%Y-%m-%dT%H:%M:%S")
+        elif isinstance(value, datetime):
             current_timezone = timezone.get_current_timezone()
             value_at_current_timezone = value.astimezone(current_timezone)
             value = timezone.make_naive(value_at_current_timezone).strftime("%Y-%m-%dT%H:%M:%S")
 
     return value
+
+
+def prepare_value(field: Field, value: Any, datetime_fields: Set) -> Any:
+    """转换为数据库中保存的值，使模型实例的属性值和 values_list 查询的值可以比较 ."""
+    if field.name in datetime_fields:
+        return normalize_value(field.name, value, datetime_fields)
+    if value is None:
+        return value
+    value = field.get_prep_value(field.to_python(value))
+    if value is not None and isinstance(field, DecimalField):
+        # 按字段精度格式化，1.5 和 Decimal("1.50") 的值相同
+        value = format_number(value, field.max_digits, field.decimal_places)
+    return value
@@ -1,10 +1,14 @@
+import hashlib
+import json
+import time
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Set, Type
 
-from django.db import transaction
-from django.db.models import Model
+from django.db import connections, transaction
+from django.db.models import Field, Model
 
 from apps.logger import logger
-from core.sync_model.models import get_model_value
+from core.sync_model.models import get_model_value, prepare_value
 from xTool.misc import chunks
 
 
@@ -56,7 +60,7 @@ def update_models(
     unique_value_updated = list(unique_value_updated)
     for unique_value_chunk_updated in chunks(unique_value_updated, chunk_updated_size):
         # 批量更新在一次事务中提交
-        with transaction.atomic:
+        with transaction.atomic():
             for unique_value in unique_value_chunk_updated:
                 old_resource_model = old_unique_field_map[unique_value]
                 new_resource_model = new_unique_field_map[unique_value]
@@ -83,8 +87,28 @@ def sync_data_to_model(
     chunk_created_size: int = 50,
     chunk_updated_size: int = 200,
     chunk_deleted_size: int = 1000,
-):
-    """同步数据到指定的数据表 ."""
+    bulk: bool = False,
+    upsert: bool = False,
+) -> Optional[Dict]:
+    """同步数据到指定的数据表 .
+
+    :param bulk: 使用 bulk_sync_data_to_model 批量比较和更新
+    :param upsert: 仅 bulk 模式有效，见 bulk_sync_data_to_model
+    """
+    if bulk:
+        return bulk_sync_data_to_model(
+            resource,
+            resource_models,
+            sync_unique_field,
+            sync_fields,
+            sync_filter=sync_filter,
+            datetime_fields=datetime_fields,
+            chunk_created_size=chunk_created_size,
+            chunk_updated_size=chunk_updated_size,
+            chunk_deleted_size=chunk_deleted_size,
+            upsert=upsert,
+        )
+
     if datetime_fields:
         datetime_fields = set(datetime_fields)
     else:
@@ -120,3 +144,117 @@ def sync_data_to_model(
         datetime_fields,
         chunk_updated_size,
     )
+
+
+def get_fingerprint(values: List, fields: List[Field], datetime_fields: Set) -> bytes:
+    """计算同步字段的指纹，指纹相同认为数据没有变化 .
+
+    :param values: 字段的值，外键字段为关联的ID
+    :param fields: 模型字段
+    """
+    data = [prepare_value(field, value, datetime_fields) for field, value in zip(fields, values)]
+    content = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
+
+
+@contextmanager
+def timing(timings: Dict, phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+
+def bulk_sync_data_to_model(
+    resource: Type[Model],
+    resource_models: List,
+    sync_unique_field: str,
+    sync_fields: List,
+    sync_filter: Optional[Dict] = None,
+    datetime_fields: List = None,
+    chunk_created_size: int = 500,
+    chunk_updated_size: int = 500,
+    chunk_deleted_size: int = 1000,
+    upsert: bool = False,
+) -> Dict:
+    """批量同步数据到指定的数据表 .
+
+    本地数据只查询唯一键和同步字段，按指纹比较是否变化，
+    变化的记录使用 bulk_update 分批更新，每批在一个事务中提交
+
+    :param upsert: 新增和变化的记录使用 bulk_create(update_conflicts=True) 写入，
+        要求 sync_unique_field 有唯一约束
+    :return: 各阶段的记录数和耗时
+    """
+    datetime_fields = set(datetime_fields) if datetime_fields else set()
+    timings = {}
+    # 外键字段按 attname 读取关联的ID，模型实例和 values_list 的值一致
+    fields = [resource._meta.get_field(field) for field in sync_fields]
+    attnames = [field.attname for field in fields]
+
+    # 本地记录的自增ID和指纹
+    with timing(timings, "fetch"):
+        history_models = resource.objects.filter(**sync_filter) if sync_filter else resource.objects.all()
+        old_fingerprints = {}
+        for row in history_models.values_list("id", sync_unique_field, *attnames).iterator():
+            old_fingerprints[row[1]] = (row[0], get_fingerprint(row[2:], fields, datetime_fields))
+
+    with timing(timings, "diff"):
+        new_unique_field_map = get_unique_field_map(resource_models, sync_unique_field)
+        models_created = []
+        models_updated = []
+        for unique_value, new_resource_model in new_unique_field_map.items():
+            old = old_fingerprints.get(unique_value)
+            if old is None:
+                models_created.append(new_resource_model)
+                continue
+            old_id, old_fingerprint = old
+            values = [getattr(new_resource_model, attname) for attname in attnames]
+            if get_fingerprint(values, fields, datetime_fields) != old_fingerprint:
+                if not upsert:
+                    # 补齐自增ID
+                    new_resource_model.id = old_id
+                models_updated.append(new_resource_model)
+        delete_ids = [
+            old_id for unique_value, (old_id, _) in old_fingerprints.items() if unique_value not in new_unique_field_map
+        ]
+
+    with timing(timings, "create"):
+        if upsert:
+            # MySQL 不支持指定冲突的唯一键，按表的唯一索引判断冲突
+            features = connections[resource.objects.db].features
+            unique_fields = [sync_unique_field] if features.supports_update_conflicts_with_target else None
+            # 已存在的记录按唯一键冲突更新，不需要区分新增和变化
+            for models in chunks(models_created + models_updated, chunk_created_size):
+                with transaction.atomic():
+                    resource.objects.bulk_create(
+                        models,
+                        update_conflicts=True,
+                        unique_fields=unique_fields,
+                        update_fields=sync_fields,
+                    )
+        else:
+            for models in chunks(models_created, chunk_created_size):
+                with transaction.atomic():
+                    resource.objects.bulk_create(models)
+
+    with timing(timings, "update"):
+        if not upsert:
+            for models in chunks(models_updated, chunk_updated_size):
+                # 只更新指定字段，防止其他的同步进程覆盖同一个字段
+                with transaction.atomic():
+                    resource.objects.bulk_update(models, sync_fields)
+
+    with timing(timings, "delete"):
+        for ids in chunks(delete_ids, chunk_deleted_size):
+            resource.objects.filter(id__in=ids).delete()
+
+    result = {
+        "created": len(models_created),
+        "updated": len(models_updated),
+        "deleted": len(delete_ids),
+        "timings": timings,
+    }
+    logger.info("bulk sync %s: %s", resource.__name__, result)
+    return result
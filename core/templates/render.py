@@ -1,11 +1,19 @@
 import json
 import re
+import threading
+from functools import lru_cache
 from typing import Dict, List, Union
 
 from django.utils import translation
-from jinja2 import FileSystemLoader
+from jinja2 import FileSystemLoader, Template
 from jinja2.sandbox import SandboxedEnvironment as Environment
 
+# 字符串模板编译结果的缓存数量
+TEMPLATE_CACHE_SIZE = 1024
+
+_string_environment = None
+_string_environment_lock = threading.Lock()
+
 
 def jinja2_environment(**options: Dict) -> Environment:
     """
@@ -27,6 +35,45 @@ def jinja2_environment(**options: Dict) -> Environment:
     return env
 
 
+def get_string_environment() -> Environment:
+    """
+    获得渲染字符串模板的共享环境
+
+    gettext 使用 django 当前激活的语言翻译，所有语言可以共用同一个环境
+    """
+    global _string_environment
+    if _string_environment is None:
+        with _string_environment_lock:
+            if _string_environment is None:
+                env = jinja2_environment()
+                env.globals.update({"json": json, "re": re})
+                _string_environment = env
+    return _string_environment
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_string_template(template_value: str) -> Template:
+    """
+    编译字符串模板，相同的模板只编译一次
+    """
+    return get_string_environment().from_string(template_value)
+
+
+def is_plain_text(template_value: str) -> bool:
+    """
+    判断字符串是否不需要渲染
+
+    不包含模板语法时渲染结果与原字符串相同，
+    但 jinja2 会去掉末尾的一个换行符，这种情况仍然需要渲染
+    """
+    return (
+        "{{" not in template_value
+        and "{%" not in template_value
+        and "{#" not in template_value
+        and not template_value.endswith("\n")
+    )
+
+
 class Jinja2Renderer:
     """
     Jinja2字符串模板渲染器
@@ -49,10 +96,10 @@ class Jinja2Renderer:
         注意:
             此方法仅支持在模板中使用json和re模块
         """
-        # 创建基础环境并添加必要的模块到全局变量
-        env = jinja2_environment()
-        # 渲染模板，将json和re模块以及用户提供的上下文一起传入
-        return env.from_string(template_value).render({"json": json, "re": re, **context})
+        if is_plain_text(template_value):
+            return template_value
+        # json和re模块已添加到共享环境的全局变量，上下文中的同名变量优先
+        return get_string_template(template_value).render(context)
 
 
 def jinja_render(template_value, context) -> Union[str, Dict, List]:
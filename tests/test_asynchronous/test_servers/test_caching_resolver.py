@@ -0,0 +1,86 @@
+import asyncio
+import socket
+
+import pytest
+
+from xTool.asynchronous.servers.resolver import AbstractResolver, CachingResolver
+
+
+class FakeResolver(AbstractResolver):
+    def __init__(self, hosts, delay=0.0):
+        self.hosts = hosts
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise OSError("DNS lookup failed")
+        return [{"hostname": host, "host": address, "port": port, "family": family} for address in self.hosts]
+
+    async def close(self):
+        pass
+
+
+def get_hosts(addrs):
+    return [addr["host"] for addr in addrs]
+
+
+@pytest.mark.asyncio
+async def test_round_robin():
+    fake_resolver = FakeResolver(["127.0.0.1", "127.0.0.2"])
+    resolver = CachingResolver(fake_resolver, ttl=10)
+    assert get_hosts(await resolver.resolve("example.com", 80)) == ["127.0.0.1", "127.0.0.2"]
+    assert get_hosts(await resolver.resolve("example.com", 80)) == ["127.0.0.2", "127.0.0.1"]
+    assert fake_resolver.calls == 1
+    assert resolver.stats["hits"] == 1
+    assert resolver.stats["misses"] == 1
+    await resolver.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce():
+    fake_resolver = FakeResolver(["127.0.0.1"], delay=0.05)
+    resolver = CachingResolver(fake_resolver, ttl=10)
+    results = await asyncio.gather(*(resolver.resolve("example.com", 80) for _ in range(10)))
+    assert all(get_hosts(addrs) == ["127.0.0.1"] for addrs in results)
+    assert fake_resolver.calls == 1
+    await resolver.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_ahead():
+    fake_resolver = FakeResolver(["127.0.0.1"])
+    resolver = CachingResolver(fake_resolver, ttl=0.2, refresh_ahead=0.5)
+    await resolver.resolve("example.com", 80)
+    await asyncio.sleep(0.12)
+    fake_resolver.hosts = ["127.0.0.2"]
+    # 返回缓存的地址，同时在后台刷新
+    assert get_hosts(await resolver.resolve("example.com", 80)) == ["127.0.0.1"]
+    await asyncio.sleep(0.01)
+    assert get_hosts(await resolver.resolve("example.com", 80)) == ["127.0.0.2"]
+    assert fake_resolver.calls == 2
+    assert resolver.stats["refreshes"] == 1
+    await resolver.close()
+
+
+@pytest.mark.asyncio
+async def test_serve_stale():
+    fake_resolver = FakeResolver(["127.0.0.1"])
+    resolver = CachingResolver(fake_resolver, ttl=0.05)
+    await resolver.resolve("example.com", 80)
+    await asyncio.sleep(0.1)
+    fake_resolver.fail = True
+    assert get_hosts(await resolver.resolve("example.com", 80)) == ["127.0.0.1"]
+    assert resolver.stats["stale_hits"] == 1
+    assert resolver.stats["errors"] == 1
+
+    with pytest.raises(OSError):
+        await resolver.resolve("example.org", 80)
+
+    resolver = CachingResolver(fake_resolver, ttl=0.05, serve_stale=False)
+    with pytest.raises(OSError):
+        await resolver.resolve("example.com", 80)
+    await resolver.close()
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import signal
+import socket
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from xTool.asynchronous.servers.reuseport import (
+    ReusePortSupervisor,
+    WorkerMetrics,
+    bind_reuseport_socket,
+)
+from xTool.config.configuration import DEFAULT_CONFIG
+from xTool.response import text
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT is not supported")
+
+
+def echo_pid_worker(server_settings, metrics):
+    """每个连接返回工作进程的进程ID"""
+    stopped = []
+    signal.signal(signal.SIGTERM, lambda *args: stopped.append(True))
+    sock = bind_reuseport_socket(server_settings["host"], server_settings["port"])
+    sock.settimeout(0.05)
+    metrics.ready()
+    while not stopped:
+        try:
+            conn, _ = sock.accept()
+        except (socket.timeout, InterruptedError):
+            continue
+        start = time.perf_counter()
+        with conn:
+            conn.recv(1024)
+            conn.sendall(str(os.getpid()).encode())
+        metrics.record(time.perf_counter() - start)
+    sock.close()
+
+
+class PidApp:
+    """serve 需要的最小应用，每个请求返回工作进程的进程ID"""
+
+    def __init__(self):
+        self.config = SimpleNamespace(**DEFAULT_CONFIG)
+        self.config.ACCESS_LOG = False
+        self.config.KEEP_ALIVE = False
+        self.debug = False
+        self.is_request_stream = False
+        self.request_class = None
+        self.router = None
+        self.websocket_enabled = False
+        self.error_handler = SimpleNamespace(
+            response=lambda request, exception: text(str(exception), status=getattr(exception, "status_code", 500))
+        )
+
+    async def handle_request(self, request, write_callback, stream_callback):
+        write_callback(text(str(os.getpid())))
+
+    def stop(self):
+        asyncio.get_event_loop().stop()
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"ping")
+        return int(sock.recv(1024))
+
+
+def http_request(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"GET / HTTP/1.1\r\nHost: test\r\n\r\n")
+        content = b""
+        while True:
+            data = sock.recv(1024)
+            if not data:
+                break
+            content += data
+    head, body = content.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200 OK")
+    return int(body)
+
+
+def wait_for(supervisor, predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        supervisor.poll(0.05)
+        supervisor.reap()
+        if predicate():
+            return True
+    return False
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = ReusePortSupervisor(
+        {"host": "127.0.0.1", "port": get_free_port()},
+        workers=2,
+        target=echo_pid_worker,
+        stats_interval=0.05,
+        stop_timeout=5,
+        restart_delay=0,
+    )
+    supervisor.start()
+    yield supervisor
+    supervisor.stop_all()
+
+
+def test_worker_metrics():
+    metrics = WorkerMetrics()
+    metrics.record(0.1)
+    metrics.record(0.3, error=True)
+    assert (metrics.requests, metrics.errors, metrics.latency_max) == (2, 1, 0.3)
+    assert metrics.latency_total == pytest.approx(0.4)
+    # 没有连接主进程时不发送
+    metrics.send()
+
+
+def test_serve_and_aggregate_stats(supervisor):
+    port = supervisor.server_settings["port"]
+    assert supervisor.wait_ready(supervisor._workers, 10)
+    pids = {worker.pid for worker in supervisor._workers}
+    for _ in range(20):
+        assert request(port) in pids
+    assert wait_for(supervisor, lambda: supervisor.stats()["requests"] == 20)
+    stats = supervisor.stats()
+    assert stats["errors"] == 0
+    assert sum(worker["requests"] for worker in stats["workers"]) == 20
+    if supervisor.cpus:
+        assert [worker["cpu"] for worker in stats["workers"]] == [
+            supervisor.cpus[i % len(supervisor.cpus)] for i in range(2)
+        ]
+        assert os.sched_getaffinity(supervisor._workers[0].pid) == {supervisor._workers[0].cpu}
+
+
+def test_restart_exited_worker(supervisor):
+    port = supervisor.server_settings["port"]
+    assert supervisor.wait_ready(supervisor._workers, 10)
+    request(port)
+    assert wait_for(supervisor, lambda: supervisor.stats()["requests"] == 1)
+    old_pid = supervisor._workers[0].pid
+    os.kill(old_pid, signal.SIGKILL)
+    assert wait_for(
+        supervisor,
+        lambda: supervisor._workers[0] is not None
+        and supervisor._workers[0].pid != old_pid
+        and supervisor._workers[0].ready,
+    )
+    assert supervisor.restarts == 1
+    # 已退出的工作进程的请求数仍然计入汇总
+    assert supervisor.stats()["requests"] == 1
+
+
+def test_rolling_restart(supervisor):
+    port = supervisor.server_settings["port"]
+    assert supervisor.wait_ready(supervisor._workers, 10)
+    for _ in range(10):
+        request(port)
+    assert wait_for(supervisor, lambda: supervisor.stats()["requests"] == 10)
+    old_pids = {worker.pid for worker in supervisor._workers}
+
+    assert supervisor.rolling_restart()
+
+    new_pids = {worker.pid for worker in supervisor._workers}
+    assert not old_pids & new_pids
+    assert all(worker.ready for worker in supervisor._workers)
+    assert request(port) in new_pids
+    assert wait_for(supervisor, lambda: supervisor.stats()["requests"] == 11)
+    assert supervisor.restarts == 0
+
+
+def test_serve_worker():
+    """默认的工作进程入口使用 serve 启动 HttpProtocol 服务"""
+    port = get_free_port()
+    supervisor = ReusePortSupervisor(
+        {"host": "127.0.0.1", "port": port, "app": PidApp()},
+        workers=2,
+        stats_interval=0.05,
+        stop_timeout=5,
+        restart_delay=0,
+    )
+    supervisor.start()
+    try:
+        assert supervisor.wait_ready(supervisor._workers, 10)
+        pids = {worker.pid for worker in supervisor._workers}
+        for _ in range(10):
+            assert http_request(port) in pids
+        assert wait_for(supervisor, lambda: supervisor.stats()["requests"] == 10)
+        assert supervisor.stats()["errors"] == 0
+        assert supervisor.restarts == 0
+    finally:
+        supervisor.stop_all()
+    assert all(worker is None for worker in supervisor._workers)
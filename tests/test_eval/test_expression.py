@@ -1,5 +1,5 @@
 from xTool.collections.object import ObjectSet
-from xTool.eval.expression import make_expression
+from xTool.eval.expression import compile_expression, eval_many, make_expression
 
 
 def test_make_expression_and():
@@ -46,3 +46,43 @@ def test_make_expression():
     d1.add_object("host", {"id": "a1", "name": "b1"})
 
     assert expr.eval(d1)
+
+
+def test_compile_expression():
+    d = {
+        "op": "OR",
+        "content": [
+            {
+                "op": "AND",
+                "content": [
+                    {"op": "in", "field": "host.id", "value": ["a1", "a2"]},
+                    {"op": "not_eq", "field": "host.name", "value": ["b2", "b3"]},
+                ],
+            },
+            {"op": "contains", "field": "host.tags", "value": ["x", "y"]},
+            {"op": "not_in", "field": "host.tags", "value": ["z"]},
+        ],
+    }
+    objs = [
+        {"id": "a1", "name": "b1", "tags": ["z"]},
+        {"id": "a1", "name": "b2", "tags": ["z"]},
+        {"id": "a3", "name": "b1", "tags": ["y", "z"]},
+        {"id": "a3", "name": "b1", "tags": ["w"]},
+        {"id": ["a3", "a2"], "name": ["b1", "b4"], "tags": ["z"]},
+        {"id": ["a3", "a2"], "name": ["b1", "b2"], "tags": []},
+        {"id": [], "name": [], "tags": ["z", "w"]},
+    ]
+    obj_sets = []
+    for obj in objs:
+        obj_set = ObjectSet()
+        obj_set.add_object("host", obj)
+        obj_sets.append(obj_set)
+
+    expected = [make_expression(d).eval(obj_set) for obj_set in obj_sets]
+    assert expected == [True, False, True, True, True, True, False]
+
+    fn = compile_expression(d)
+    assert fn is compile_expression(dict(d))
+    assert [fn(obj_set) for obj_set in obj_sets] == expected
+    assert eval_many(d, obj_sets) == expected
+    assert eval_many(d, []) == []
@@ -61,3 +61,31 @@ from xTool import headers
 )
 def test_parse_headers(input, expected):
     assert headers.parse_content_header(input) == expected
+
+
+@pytest.mark.parametrize(
+    "status, items, body",
+    [
+        (200, [("Content-Type", "application/json"), ("Content-Length", 2), ("Connection", "keep-alive")], b"{}"),
+        (404, [("X-Request-Id", "abc"), ("Keep-Alive", 5)], b""),
+        (299, [("Content-Type", "text/plain; charset=utf-8")], b"ok"),
+    ],
+)
+def test_format_http1_response(status, items, body):
+    expected = b"HTTP/1.1 %d %b\r\n%b\r\n%b" % (
+        status,
+        headers.STATUS_CODES.get(status, b"UNKNOWN"),
+        "".join(f"{name}: {val}\r\n" for name, val in items).encode(),
+        body,
+    )
+    # 第二次使用缓存的状态行和头部行
+    for _ in range(2):
+        assert headers.format_http1_response(status, items, body) == expected
+        assert headers.format_http1_head(status, items) + body == expected
+
+
+def test_content_length_not_cached():
+    for length in range(100):
+        headers.format_http1([("Content-Length", length), ("Content-Type", "application/json")])
+    assert not any(name == "Content-Length" for name, _ in headers._header_lines)
+    assert ("Content-Type", "application/json") in headers._header_lines
@@ -0,0 +1,164 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from xTool.asynchronous.servers.protocols.http_protocol import HttpProtocol
+from xTool.config.configuration import DEFAULT_CONFIG
+from xTool.response import text
+
+
+class PipelineApp:
+    """HttpProtocol 需要的最小应用，返回请求的路径和 body
+
+    路径在 blocked 中的请求等待对应的事件后再响应
+    """
+
+    def __init__(self, **config):
+        self.config = SimpleNamespace(**DEFAULT_CONFIG)
+        self.config.ACCESS_LOG = False
+        self.config.KEEP_ALIVE_PIPELINING = True
+        for name, value in config.items():
+            setattr(self.config, name, value)
+        self.debug = False
+        self.is_request_stream = False
+        self.request_class = None
+        self.router = None
+        self.websocket_enabled = False
+        self.error_handler = SimpleNamespace(
+            response=lambda request, exception: text(str(exception), status=getattr(exception, "status_code", 500))
+        )
+        self.blocked = {}
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+
+    async def handle_request(self, request, write_callback, stream_callback):
+        self.started.append(request.path)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        if request.path in self.blocked:
+            await self.blocked[request.path].wait()
+        self.running -= 1
+        write_callback(text(request.path + request.body.decode()))
+
+
+def get(path, headers=""):
+    return f"GET {path} HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode()
+
+
+async def read_response(reader):
+    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5)
+    lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:] if line)
+    body = await asyncio.wait_for(reader.readexactly(int(headers["Content-Length"])), 5)
+    return headers, body.decode()
+
+
+async def wait_until(predicate):
+    for _ in range(500):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timeout")
+
+
+@asynccontextmanager
+async def connect(app):
+    """启动 HttpProtocol 服务器并建立一个连接"""
+    loop = asyncio.get_running_loop()
+    protocols = []
+
+    def factory():
+        protocol = HttpProtocol(loop=loop, app=app)
+        protocols.append(protocol)
+        return protocol
+
+    server = await loop.create_server(factory, "127.0.0.1", 0)
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.sockets[0].getsockname()[1])
+        await wait_until(lambda: protocols)
+        try:
+            yield reader, writer, protocols[0]
+        finally:
+            writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_pipelined_requests_in_one_write():
+    app = PipelineApp()
+    app.blocked["/a"] = asyncio.Event()
+    async with connect(app) as (reader, writer, _):
+        writer.write(get("/a") + get("/b") + get("/c"))
+        await wait_until(lambda: app.started)
+        await asyncio.sleep(0.05)
+        # 前一个请求响应之前，后面的请求只解析不处理
+        assert app.started == ["/a"]
+        app.blocked["/a"].set()
+        bodies = [(await read_response(reader))[1] for _ in range(3)]
+        assert bodies == ["/a", "/b", "/c"]
+        assert app.started == ["/a", "/b", "/c"]
+        assert app.max_running == 1
+
+
+@pytest.mark.asyncio
+async def test_request_headers_arrive_while_previous_in_flight():
+    app = PipelineApp()
+    app.blocked["/a"] = asyncio.Event()
+    async with connect(app) as (reader, writer, protocol):
+        writer.write(get("/a"))
+        await wait_until(lambda: app.started)
+        # 只发送第二个请求的头部
+        writer.write(b"POST /b HTTP/1.1\r\nHost: test\r\nContent-Length: 5\r\n\r\n")
+        await wait_until(lambda: protocol._pipeline_request is not None)
+        app.blocked["/a"].set()
+        assert (await read_response(reader))[1] == "/a"
+        # 第一个请求响应后，解析器仍然保留正在接收的请求
+        assert protocol.parser is not None
+        assert app.started == ["/a"]
+        writer.write(b"hello")
+        headers, body = await read_response(reader)
+        assert body == "/bhello"
+        assert headers["Connection"] == "keep-alive"
+        writer.write(get("/c"))
+        assert (await read_response(reader))[1] == "/c"
+
+
+@pytest.mark.asyncio
+async def test_connection_close_on_queued_request():
+    app = PipelineApp()
+    app.blocked["/a"] = asyncio.Event()
+    async with connect(app) as (reader, writer, _):
+        writer.write(get("/a") + get("/b", "Connection: close\r\n") + get("/c"))
+        await wait_until(lambda: app.started)
+        app.blocked["/a"].set()
+        headers, body = await read_response(reader)
+        assert (body, headers["Connection"]) == ("/a", "keep-alive")
+        headers, body = await read_response(reader)
+        assert (body, headers["Connection"]) == ("/b", "close")
+        # 连接关闭，之后的请求不再处理
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        assert app.started == ["/a", "/b"]
+
+
+@pytest.mark.asyncio
+async def test_pause_reading_when_pipeline_is_full():
+    app = PipelineApp(REQUEST_BUFFER_QUEUE_SIZE=2)
+    app.blocked["/a"] = asyncio.Event()
+    async with connect(app) as (reader, writer, protocol):
+        writer.write(get("/a") + get("/b"))
+        await wait_until(lambda: len(protocol._pipeline) == 1)
+        assert protocol.transport.is_reading()
+        writer.write(get("/c"))
+        await wait_until(lambda: len(protocol._pipeline) == 2)
+        # 队列已满，暂停读取
+        assert not protocol.transport.is_reading()
+        app.blocked["/a"].set()
+        bodies = [(await read_response(reader))[1] for _ in range(3)]
+        assert bodies == ["/a", "/b", "/c"]
+        assert protocol.transport.is_reading()
+        assert not protocol._pipeline
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from xTool.collections.header import Header
+from xTool.exceptions import InvalidUsage
+from xTool.multipart import MultipartParser, SpooledFile, iter_multipart
+from xTool.request import Request
+
+BOUNDARY = b"----xToolBoundary7MA4YWxk"
+
+BINARY = b"\x00\x01\x02" * 100
+
+BODY = (
+    b"preamble\r\n"
+    b"------xToolBoundary7MA4YWxk\r\n"
+    b'Content-Disposition: form-data; name="test"\r\n'
+    b"\r\n"
+    b"OK\r\n"
+    b"------xToolBoundary7MA4YWxk\r\n"
+    b'Content-Disposition: form-data; name="test"\r\n'
+    b"\r\n"
+    b"OK2\r\n"
+    b"------xToolBoundary7MA4YWxk\r\n"
+    b'Content-Disposition: form-data; name="upload"; filename="a.txt"\r\n'
+    b"Content-Type: text/plain\r\n"
+    b"\r\n"
+    b"line1\r\n--line2\r\n"
+    b"------xToolBoundary7MA4YWxk\r\n"
+    b"Content-Disposition: form-data; name=\"upload\"; filename*=utf-8''%E6%96%87%E4%BB%B6.bin\r\n"
+    b"Content-Type: application/octet-stream\r\n"
+    b"\r\n" + BINARY + b"\r\n"
+    b"------xToolBoundary7MA4YWxk\r\n"
+    b"Content-Disposition: form-data\r\n"
+    b"\r\n"
+    b"no name\r\n"
+    b"------xToolBoundary7MA4YWxk--\r\n"
+)
+
+
+def check_parser(parser):
+    assert parser.done
+    assert parser.fields == {"test": ["OK", "OK2"]}
+    files = parser.files["upload"]
+    assert [f.name for f in files] == ["a.txt", "文件.bin"]
+    assert [f.type for f in files] == ["text/plain", "application/octet-stream"]
+    assert files[0].body == b"line1\r\n--line2"
+    assert files[1].body == BINARY
+    assert all(isinstance(f, SpooledFile) for f in files)
+
+
+def test_parse_whole_body():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(BODY)
+    parser.close()
+    check_parser(parser)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 31, 64, 1000])
+def test_parse_chunks(chunk_size):
+    parser = MultipartParser(BOUNDARY)
+    for i in range(0, len(BODY), chunk_size):
+        parser.feed(BODY[i : i + chunk_size])
+    parser.close()
+    check_parser(parser)
+
+
+def test_spool_to_disk():
+    parser = MultipartParser(BOUNDARY, spool_max_size=16)
+    parser.feed(BODY)
+    part = [part for part in parser.parts if part.filename == "文件.bin"][0]
+    assert part.size == 300
+    assert part.file._rolled
+    assert part.read() == BINARY
+
+
+def test_incomplete_body():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(BODY[:-40])
+    with pytest.raises(InvalidUsage):
+        parser.close()
+
+
+def test_header_too_large():
+    parser = MultipartParser(BOUNDARY, max_header_size=32)
+    with pytest.raises(InvalidUsage):
+        parser.feed(b"------xToolBoundary7MA4YWxk\r\nContent-Disposition: form-data; name=" + b"x" * 64)
+
+
+def test_iter_multipart():
+    async def stream():
+        for i in range(0, len(BODY), 10):
+            await asyncio.sleep(0)
+            yield BODY[i : i + 10]
+
+    async def collect():
+        return [part async for part in iter_multipart(stream(), BOUNDARY)]
+
+    loop = asyncio.new_event_loop()
+    try:
+        parts = loop.run_until_complete(collect())
+    finally:
+        loop.close()
+    assert [(part.name, part.filename) for part in parts] == [
+        ("test", None),
+        ("test", None),
+        ("upload", "a.txt"),
+        ("upload", "文件.bin"),
+    ]
+    assert parts[0].value == "OK"
+    assert parts[2].read() == b"line1\r\n--line2"
+
+
+def test_iter_parts_with_multipart_streaming():
+    """接收请求体时已经增量解析，iter_parts 返回解析完成的 part"""
+    headers = Header({"Content-Type": "multipart/form-data; boundary=" + BOUNDARY.decode()})
+    request = Request(b"/upload", headers, "1.1", "POST", None, None)
+    assert request.enable_multipart_streaming()
+    for i in range(0, len(BODY), 10):
+        request.body_push(BODY[i : i + 10])
+    request.body_finish()
+    assert request.body == b""
+
+    async def collect():
+        return [part async for part in request.iter_parts()]
+
+    loop = asyncio.new_event_loop()
+    try:
+        parts = loop.run_until_complete(collect())
+    finally:
+        loop.close()
+    assert [(part.name, part.filename) for part in parts] == [
+        ("test", None),
+        ("test", None),
+        ("upload", "a.txt"),
+        ("upload", "文件.bin"),
+    ]
+    assert parts[1].value == "OK2"
+    assert parts[3].read() == BINARY
+    assert request.form == {"test": ["OK", "OK2"]}
@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+
+from xTool.exceptions import MethodNotSupported, NotFound
+from xTool.net.routers.router import Router
+from xTool.net.routers.tree import RouteTree
+
+
+def handler(*args, **kwargs):
+    return "handler"
+
+
+def other_handler(*args, **kwargs):
+    return "other_handler"
+
+
+class TestRouteTree:
+    def test_parse(self):
+        assert RouteTree.parse("/a/<id:int>/<name>") == [(False, ""), (False, "a"), (True, "int"), (True, "string")]
+        assert RouteTree.parse("/a/<name:[a-z]+>") is None
+        assert RouteTree.parse("/a/file-<id:int>") is None
+
+    def test_match(self):
+        tree = RouteTree()
+        tree.add("/a/<id:int>", "int_route", 1)
+        tree.add("/a/<name>", "string_route", 0)
+        tree.add("/static/<path:path>/edit", "path_route", 2)
+        assert [item[1] for item in sorted(tree.match("/a/1".split("/")))] == ["string_route", "int_route"]
+        assert tree.match("/a/b".split("/")) == [(0, "string_route", ["b"])]
+        assert tree.match("/static/a/b/edit".split("/")) == [(2, "path_route", ["a/b"])]
+        assert tree.match("/static//edit".split("/")) == []
+
+
+class TestRouter:
+    def test_get(self):
+        router = Router()
+        router.add("/users/<user_id:int>", ["GET"], handler)
+        router.add("/users/<user_id:int>", ["POST"], other_handler)
+        router.add("/users/<name>/profile", ["GET"], handler)
+        router.add("/items/<item_id:uuid>", ["GET"], handler)
+        router.add("/files/<file_path:path>", ["GET"], handler)
+        router.add("/regex/<code:[a-z]{3}>", ["GET"], handler)
+
+        route_handler, args, kwargs, uri, _ = router._get("/users/10", "GET", "")
+        assert route_handler is handler
+        assert kwargs == {"user_id": 10}
+        assert uri == "/users/<user_id:int>"
+        assert router._get("/users/10", "POST", "")[0] is other_handler
+        assert router._get("/users/tom/profile/", "GET", "")[2] == {"name": "tom"}
+
+        item_id = uuid.uuid4()
+        assert router._get(f"/items/{item_id}", "GET", "")[2] == {"item_id": item_id}
+        assert router._get("/files/a/b.txt", "GET", "")[2] == {"file_path": "a/b.txt"}
+        assert router._get("/regex/abc", "GET", "")[2] == {"code": "abc"}
+
+        with pytest.raises(MethodNotSupported):
+            router._get("/users/10", "DELETE", "")
+        with pytest.raises(NotFound):
+            router._get("/users/abc", "POST", "")
+        with pytest.raises(NotFound):
+            router._get("/regex/abcd", "GET", "")
+
+    def test_get__order(self):
+        router = Router()
+        router.add("/<id:int>", ["POST"], other_handler, strict_slashes=True)
+        router.add("/<pk:int>", ["GET", "POST"], handler, strict_slashes=True)
+        router.add("/<name>", ["GET", "PUT"], handler, strict_slashes=True)
+        # 同一组内按注册顺序优先匹配
+        assert router._get("/1", "POST", "") == (other_handler, [], {"id": 1}, "/<id:int>", "other_handler")
+        assert router._get("/1", "GET", "") == (handler, [], {"pk": 1}, "/<pk:int>", "handler")
+        # 参数正则包含 "/" 的路由最后匹配
+        assert router._get("/1", "PUT", "") == (handler, [], {"name": "1"}, "/<name>", "handler")
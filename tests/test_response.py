@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from xTool.asynchronous.servers.protocols.http_protocol import HttpProtocol
+from xTool.config.configuration import DEFAULT_CONFIG
+from xTool.response import sendfile, text
+
+DATA = os.urandom(3 * 1024 * 1024 + 17)
+
+
+class FileApp:
+    """HttpProtocol 需要的最小应用，每个请求都返回 sendfile 响应"""
+
+    def __init__(self, location, _range=None):
+        self.config = SimpleNamespace(**DEFAULT_CONFIG)
+        self.config.ACCESS_LOG = True
+        self.config.KEEP_ALIVE = False
+        self.debug = False
+        self.is_request_stream = False
+        self.request_class = None
+        self.router = None
+        self.websocket_enabled = False
+        self.error_handler = SimpleNamespace(
+            response=lambda request, exception: text(str(exception), status=getattr(exception, "status_code", 500))
+        )
+        self.location = location
+        self._range = _range
+
+    async def handle_request(self, request, write_callback, stream_callback):
+        await stream_callback(sendfile(self.location, _range=self._range))
+
+
+class NoSendfileProtocol(HttpProtocol):
+    """不支持 sendfile 的协议，记录每次写入的数据大小"""
+
+    sendfile = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sizes = []
+
+    async def push_data(self, data):
+        self.sizes.append(len(data))
+        await super().push_data(data)
+
+
+@pytest.fixture
+def location(tmp_path):
+    location = tmp_path / "data.txt"
+    location.write_bytes(DATA)
+    return str(location)
+
+
+async def request(app, protocol_class=HttpProtocol):
+    loop = asyncio.get_running_loop()
+    protocols = []
+
+    def factory():
+        protocol = protocol_class(loop=loop, app=app)
+        protocols.append(protocol)
+        return protocol
+
+    server = await loop.create_server(factory, "127.0.0.1", 0)
+    try:
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /data.txt HTTP/1.1\r\nHost: test\r\n\r\n")
+        content = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+    head, body = content.split(b"\r\n\r\n", 1)
+    lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    return lines[0], headers, body, protocols[0]
+
+
+@pytest.mark.asyncio
+async def test_sendfile(location, caplog):
+    with caplog.at_level(logging.INFO, logger="xTool.access"):
+        status, headers, body, _ = await request(FileApp(location))
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["Content-Length"] == str(len(DATA))
+    assert headers["Content-Type"] == "text/plain"
+    assert "Content-Range" not in headers
+    assert body == DATA
+    assert [record.byte for record in caplog.records] == [len(DATA)]
+
+
+@pytest.mark.asyncio
+async def test_sendfile_range(location, caplog):
+    _range = SimpleNamespace(start=100, end=1099, size=1000, total=len(DATA))
+    with caplog.at_level(logging.INFO, logger="xTool.access"):
+        status, headers, body, _ = await request(FileApp(location, _range))
+    assert status == "HTTP/1.1 206 Partial Content"
+    assert headers["Content-Length"] == "1000"
+    assert headers["Content-Range"] == f"bytes 100-1099/{len(DATA)}"
+    assert body == DATA[100:1100]
+    assert [record.byte for record in caplog.records] == [1000]
+
+
+@pytest.mark.asyncio
+async def test_sendfile_without_protocol_sendfile(location):
+    status, headers, body, protocol = await request(FileApp(location), NoSendfileProtocol)
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["Content-Length"] == str(len(DATA))
+    assert body == DATA
+    # 第一次写入的是响应头，之后块大小从 4096 开始翻倍，最大 1M
+    assert protocol.sizes[1:] == [4096, 8192, 16384, 32768, 65536, 131072, 262144, 524288, 1048576, 1048576, 4113]
+
+
+@pytest.mark.asyncio
+async def test_sendfile_range_without_protocol_sendfile(location):
+    _range = SimpleNamespace(start=100, end=10099, size=10000, total=len(DATA))
+    status, headers, body, protocol = await request(FileApp(location, _range), NoSendfileProtocol)
+    assert status == "HTTP/1.1 206 Partial Content"
+    assert headers["Content-Length"] == "10000"
+    assert body == DATA[100:10100]
+    assert protocol.sizes[1:] == [4096, 5904]
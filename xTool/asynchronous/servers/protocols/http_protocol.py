@@ -1,5 +1,4 @@
 import asyncio
-import sys
 import traceback
 from collections import deque
 from time import time
@@ -17,9 +16,9 @@ from xTool.exceptions import (
     ServiceUnavailable,
 )
 from xTool.log import access_logger, logger
+from xTool.net.servers.signal import Signal
 from xTool.request import EXPECT_HEADER, Request, StreamBuffer
-from xTool.response import HTTPResponse
-from xTool.servers.signal import Signal
+from xTool.response import FileHTTPResponse, HTTPResponse
 
 
 class HttpProtocol(asyncio.Protocol):
@@ -47,6 +46,7 @@ class HttpProtocol(asyncio.Protocol):
         "keep_alive_timeout",
         "request_max_size",
         "request_buffer_queue_size",
+        "request_multipart_spool_size",
         "request_class",
         "is_request_stream",
         "error_handler",
@@ -67,6 +67,12 @@ class HttpProtocol(asyncio.Protocol):
         "_header_fragment",
         "state",
         "_body_chunks",
+        # pipelining
+        "pipelining",
+        "_pipeline",
+        "_pipeline_request",
+        "_parsing",
+        "_parser_keep_alive",
     )
 
     def __init__(
@@ -81,7 +87,6 @@ class HttpProtocol(asyncio.Protocol):
     ):
         asyncio.set_event_loop(loop)
         self.loop = loop
-        deprecated_loop = self.loop if sys.version_info < (3, 7) else None
         self.app = app
         self.transport = None
         self.request = None
@@ -98,10 +103,14 @@ class HttpProtocol(asyncio.Protocol):
         self.response_timeout = self.app.config.RESPONSE_TIMEOUT
         self.keep_alive_timeout = self.app.config.KEEP_ALIVE_TIMEOUT
         self.request_max_size = self.app.config.REQUEST_MAX_SIZE
+        # 为 None 时不增量解析 multipart/form-data
+        self.request_multipart_spool_size = (
+            self.app.config.REQUEST_MULTIPART_SPOOL_SIZE if self.app.config.REQUEST_MULTIPART_STREAMING else None
+        )
         self.request_class = self.app.request_class or Request
         self.is_request_stream = self.app.is_request_stream
         self._is_stream_handler = False
-        self._not_paused = asyncio.Event(loop=deprecated_loop)
+        self._not_paused = asyncio.Event()
         self._total_request_size = 0
         self._request_timeout_handler = None
         self._response_timeout_handler = None
@@ -118,6 +127,14 @@ class HttpProtocol(asyncio.Protocol):
         # 设置Event对象内部的信号标志为真
         self._not_paused.set()
         self._body_chunks = deque()
+        # 同一个连接上连续发送的请求按顺序处理，流式请求不支持
+        self.pipelining = self.app.config.KEEP_ALIVE_PIPELINING and not self.is_request_stream
+        # 已接收完成，等待前一个请求响应后再处理的请求
+        self._pipeline = deque()
+        # 前一个请求未响应时正在接收的请求
+        self._pipeline_request = None
+        self._parsing = False
+        self._parser_keep_alive = None
 
     @property
     def keep_alive(self):
@@ -128,7 +145,12 @@ class HttpProtocol(asyncio.Protocol):
 
         :return: ``True`` if connection is to be kept alive ``False`` else
         """
-        return self._keep_alive and not self.signal.stopped and self.parser.should_keep_alive()
+        if self._parser_keep_alive is not None:
+            # 请求接收完成时记录，解析器可能已经在解析下一个请求
+            should_keep_alive = self._parser_keep_alive
+        else:
+            should_keep_alive = self.parser.should_keep_alive()
+        return self._keep_alive and not self.signal.stopped and should_keep_alive
 
     # -------------------------------------------- #
     # Connection
@@ -243,12 +265,27 @@ class HttpProtocol(asyncio.Protocol):
             # 解析HTTP协议
             self.parser.feed_data(data)
         except HttpParserError:
+            if self.pipelining and self._closing():
+                # 已接收的请求要求关闭连接，忽略之后的数据，等待已接收的请求响应
+                self.transport.pause_reading()
+                return
             # 如果不是合法的HTTP协议，返回400错误
             message = "Bad Request"
             if self.app.debug:
                 message += "\n" + traceback.format_exc()
             self.write_error(InvalidUsage(message))
 
+    def _closing(self):
+        """已接收完成的请求中是否有不保持连接的请求 ."""
+        return self._parser_keep_alive is False or any(not keep_alive for _, keep_alive in self._pipeline)
+
+    def on_message_begin(self):
+        self._parsing = True
+        if self.pipelining and self.request is not None:
+            # 前一个请求的 url 和头部已经解析完成
+            self.url = None
+            self.headers = []
+
     def on_url(self, url):
         if not self.url:
             self.url = url
@@ -271,7 +308,7 @@ class HttpProtocol(asyncio.Protocol):
 
     def on_headers_complete(self):
         """在服务器接收到头部后，创建一个请求对象 ."""
-        self.request = self.request_class(
+        request = self.request_class(
             url_bytes=self.url,
             headers=Header(self.headers),
             version=self.parser.get_http_version(),
@@ -279,6 +316,13 @@ class HttpProtocol(asyncio.Protocol):
             transport=self.transport,
             app=self.app,
         )
+        if self.pipelining and self.request is not None:
+            # 前一个请求还没有响应，接收完成后放入队列
+            self._pipeline_request = request
+            if self.request_multipart_spool_size is not None:
+                request.enable_multipart_streaming(self.request_multipart_spool_size)
+            return
+        self.request = request
         # Remove any existing KeepAlive handler here,
         # It will be recreated if required on the new request.
         if self._keep_alive_timeout_handler:
@@ -293,6 +337,10 @@ class HttpProtocol(asyncio.Protocol):
             if self._is_stream_handler:
                 self.request.stream = StreamBuffer(self.request_buffer_queue_size)
                 self.execute_request_handler()
+                return
+
+        if self.request_multipart_spool_size is not None:
+            self.request.enable_multipart_streaming(self.request_multipart_spool_size)
 
     def expect_handler(self):
         """
@@ -316,7 +364,7 @@ class HttpProtocol(asyncio.Protocol):
             if not self._request_stream_task or self._request_stream_task.done():
                 self._request_stream_task = self.loop.create_task(self.stream_append())
         else:
-            self.request.body_push(body)
+            (self._pipeline_request or self.request).body_push(body)
 
     async def body_append(self, body):
         if self.request is None or self._request_stream_task is None or self._request_stream_task.cancelled():
@@ -346,6 +394,15 @@ class HttpProtocol(asyncio.Protocol):
         if self._request_timeout_handler:
             self._request_timeout_handler.cancel()
             self._request_timeout_handler = None
+        self._parsing = False
+        if self._pipeline_request is not None:
+            request, self._pipeline_request = self._pipeline_request, None
+            request.body_finish()
+            self._pipeline.append((request, self.parser.should_keep_alive()))
+            if len(self._pipeline) >= self.request_buffer_queue_size:
+                self.transport.pause_reading()
+            self.execute_pipelined_request()
+            return
         if self.is_request_stream and self._is_stream_handler:
             self._body_chunks.append(None)
             if not self._request_stream_task or self._request_stream_task.done():
@@ -353,6 +410,8 @@ class HttpProtocol(asyncio.Protocol):
             return
         # 服务器收到全部请求后，将完整的body放到请求对象中
         self.request.body_finish()
+        if self.pipelining:
+            self._parser_keep_alive = self.parser.should_keep_alive()
         # 执行请求处理器
         self.execute_request_handler()
 
@@ -370,6 +429,18 @@ class HttpProtocol(asyncio.Protocol):
             self.request_handler(self.request, self.write_response, self.stream_response)
         )
 
+    def execute_pipelined_request(self):
+        """前一个请求已经响应时，处理队列中的下一个请求 ."""
+        if self.request is not None or not self._pipeline:
+            return
+        if len(self._pipeline) == self.request_buffer_queue_size:
+            self.transport.resume_reading()
+        self.request, self._parser_keep_alive = self._pipeline.popleft()
+        if self._keep_alive_timeout_handler:
+            self._keep_alive_timeout_handler.cancel()
+            self._keep_alive_timeout_handler = None
+        self.execute_request_handler()
+
     # -------------------------------------------- #
     # Responding
     # -------------------------------------------- #
@@ -390,6 +461,8 @@ class HttpProtocol(asyncio.Protocol):
 
             if isinstance(response, HTTPResponse):
                 extra["byte"] = len(response.body)
+            elif isinstance(response, FileHTTPResponse):
+                extra["byte"] = response.count
             else:
                 extra["byte"] = -1
 
@@ -413,7 +486,12 @@ class HttpProtocol(asyncio.Protocol):
             self._response_timeout_handler = None
         try:
             keep_alive = self.keep_alive
-            self.transport.write(response.output(self.request.version, keep_alive, self.keep_alive_timeout))
+            output_buffers = getattr(response, "output_buffers", None)
+            if output_buffers is not None:
+                # 头部和 body 分别写入，不拼接 body
+                self.transport.writelines(output_buffers(self.request.version, keep_alive, self.keep_alive_timeout))
+            else:
+                self.transport.write(response.output(self.request.version, keep_alive, self.keep_alive_timeout))
             self.log_response(response)
         except AttributeError:
             logger.error(
@@ -448,6 +526,11 @@ class HttpProtocol(asyncio.Protocol):
     async def push_data(self, data):
         self.transport.write(data)
 
+    async def sendfile(self, file, offset=0, count=None):
+        """发送文件，普通 socket 使用 os.sendfile 零拷贝发送，SSL 等不支持时由 loop.sendfile 分块读取发送 ."""
+        await self.drain()
+        await self.loop.sendfile(self.transport, file, offset, count)
+
     async def stream_response(self, response):
         """
         Streams a response to the client asynchronously. Attaches
@@ -549,14 +632,18 @@ class HttpProtocol(asyncio.Protocol):
         """This is called when KeepAlive feature is used,
         it resets the connection in order for it to be able
         to handle receiving another request on the same connection."""
-        self.parser = None
+        if not (self.pipelining and (self._parsing or self._pipeline)):
+            self.parser = None
+            self.url = None
+            self.headers = None
         self.request = None
-        self.url = None
-        self.headers = None
+        self._parser_keep_alive = None
         self._request_handler_task = None
         self._request_stream_task = None
         self._total_request_size = 0
         self._is_stream_handler = False
+        if self.pipelining:
+            self.execute_pipelined_request()
 
     def close_if_idle(self):
         """Close the connection if a request is not being sent or received
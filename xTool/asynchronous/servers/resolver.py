@@ -1,11 +1,13 @@
 import asyncio
+import logging
 import socket
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from xTool.asynchronous.aiomisc import get_running_loop
+from xTool.asynchronous.aiomisc import get_and_check_running_loop
+from xTool.net.servers.dns.dns_cache import DNSCacheTable
 
-__all__ = ("ThreadedResolver", "AsyncResolver", "DefaultResolver")
+__all__ = ("ThreadedResolver", "AsyncResolver", "DefaultResolver", "CachingResolver")
 
 try:
     import aiodns
@@ -16,6 +18,8 @@ except ImportError:  # pragma: no cover
 
 aiodns_default = False
 
+logger = logging.getLogger(__name__)
+
 
 class AbstractResolver(ABC):
     """Abstract DNS resolver."""
@@ -35,7 +39,7 @@ class ThreadedResolver(AbstractResolver):
     """
 
     def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
-        self._loop = get_running_loop(loop)
+        self._loop = get_and_check_running_loop(loop)
 
     async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
         """解析host ."""
@@ -76,7 +80,7 @@ class AsyncResolver(AbstractResolver):
         if aiodns is None:
             raise RuntimeError("Resolver requires aiodns library")
 
-        self._loop = get_running_loop(loop)
+        self._loop = get_and_check_running_loop(loop)
         self._resolver = aiodns.DNSResolver(*args, loop=loop, **kwargs)
 
         if not hasattr(self._resolver, "gethostbyname"):
@@ -143,3 +147,93 @@ class AsyncResolver(AbstractResolver):
 
 # 默认使用aiohttp.ThreadResolver, 异步版本在某些情况下会解析失败
 DefaultResolver = AsyncResolver if aiodns_default else ThreadedResolver
+
+
+class CachingResolver(AbstractResolver):
+    """带缓存的解析器
+
+    - 使用 DNSCacheTable 缓存解析结果，每次返回时轮转地址顺序
+    - 缓存存在时间超过 ttl * refresh_ahead 后，在后台刷新，请求不需要等待解析
+    - 同一个 host 的并发解析合并为一次
+    - 解析失败时，如果有过期的缓存则返回过期的缓存
+    """
+
+    def __init__(
+        self,
+        resolver: Optional[AbstractResolver] = None,
+        ttl: float = 10,
+        refresh_ahead: float = 0.8,
+        serve_stale: bool = True,
+    ) -> None:
+        """
+        :param resolver: 被包装的解析器，默认为 DefaultResolver
+        :param ttl: 缓存过期时间，单位是s
+        :param refresh_ahead: 缓存存在时间超过 ttl 的比例后在后台刷新
+        :param serve_stale: 解析失败时是否返回过期的缓存
+        """
+        self._resolver = resolver if resolver is not None else DefaultResolver()
+        self._ttl = ttl
+        self._refresh_after = ttl * refresh_ahead
+        self._serve_stale = serve_stale
+        self._cached_hosts = DNSCacheTable(ttl=ttl)
+        # 正在解析的 host
+        self._inflight = {}  # type: Dict[Tuple[str, int, int], asyncio.Future]
+        self.stats = {"hits": 0, "misses": 0, "stale_hits": 0, "refreshes": 0, "errors": 0}
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
+        key = (host, port, family)
+        if key in self._cached_hosts:
+            if not self._cached_hosts.expired(key):
+                self.stats["hits"] += 1
+                if self._cached_hosts.age(key) >= self._refresh_after and key not in self._inflight:
+                    self.stats["refreshes"] += 1
+                    self._lookup(key)
+                return self._cached_hosts.next_addrs(key)
+
+        self.stats["misses"] += 1
+        try:
+            # shield 避免一个调用方被取消时，其它等待同一个解析结果的调用方也被取消
+            await asyncio.shield(self._lookup(key))
+        except OSError:
+            if not self._serve_stale or key not in self._cached_hosts:
+                raise
+            self.stats["stale_hits"] += 1
+        return self._cached_hosts.next_addrs(key)
+
+    def _lookup(self, key: Tuple[str, int, int]) -> asyncio.Future:
+        """创建或复用解析任务，解析成功后更新缓存 ."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future
+        future = asyncio.ensure_future(self._resolve(key))
+        # 后台刷新失败时没有调用方获取异常，避免 "exception was never retrieved" 警告
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        return future
+
+    async def _resolve(self, key: Tuple[str, int, int]) -> None:
+        try:
+            addrs = await self._resolver.resolve(*key)
+            self._cached_hosts.add(key, addrs)
+        except OSError as exc_info:
+            self.stats["errors"] += 1
+            logger.warning("resolve %s failed: %s", key[0], exc_info)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self, host: Optional[str] = None) -> None:
+        """清除指定 host 或所有的缓存 ."""
+        if host is None:
+            self._cached_hosts.clear()
+            return
+        for key in [key for key in self._cached_hosts._addrs_rr if key[0] == host]:
+            self._cached_hosts.remove(key)
+
+    async def close(self) -> None:
+        futures = list(self._inflight.values())
+        self._inflight.clear()
+        for future in futures:
+            future.cancel()
+        await asyncio.gather(*futures, return_exceptions=True)
+        await self._resolver.close()
@@ -0,0 +1,430 @@
+"""
+SO_REUSEPORT 多进程服务器
+
+serve_multiple 的所有工作进程共享同一个监听 socket，多个进程在同一个 socket 上竞争 accept；
+这里每个工作进程绑定自己的 SO_REUSEPORT 监听 socket，由内核在多个 socket 之间均衡分配连接。
+
+- 工作进程可以绑定到不同的 CPU
+- 工作进程通过 socketpair 定期向主进程上报累计的请求数、错误数和延迟，主进程汇总
+- 主进程重启异常退出的工作进程，收到 SIGHUP 时逐个滚动重启：先启动新进程，新进程开始监听后再停止旧进程
+"""
+
+import multiprocessing
+import os
+import select
+import selectors
+import signal
+import socket
+import struct
+import threading
+import time
+
+from xTool.log import logger
+from xTool.net.servers.helpers import bind_socket
+from xTool.net.servers.pipeline import SocketPairPipeline
+
+__all__ = [
+    "WorkerMetrics",
+    "ReusePortSupervisor",
+    "bind_reuseport_socket",
+    "set_cpu_affinity",
+    "serve_worker",
+]
+
+MSG_READY = 1
+MSG_STATS = 2
+# 消息类型，进程ID，请求数，错误数，延迟总和，最大延迟
+_MESSAGE = struct.Struct("!BIQQdd")
+
+
+class WorkerMetrics:
+    """工作进程的请求统计，由后台线程定期发送给主进程"""
+
+    def __init__(self, connector=None):
+        self.connector = connector
+        self.requests = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def record(self, latency, error=False):
+        self.requests += 1
+        if error:
+            self.errors += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    def pack(self, kind=MSG_STATS):
+        return _MESSAGE.pack(kind, os.getpid(), self.requests, self.errors, self.latency_total, self.latency_max)
+
+    def send(self, kind=MSG_STATS):
+        if self.connector is None:
+            return
+        try:
+            with self._lock:
+                self.connector.send(self.pack(kind))
+        except OSError:
+            # 主进程已经退出
+            self._stop.set()
+
+    def ready(self):
+        """通知主进程已经开始监听"""
+        self.send(MSG_READY)
+
+    def start_reporter(self, interval):
+        def run():
+            while not self._stop.wait(interval):
+                self.send()
+
+        threading.Thread(target=run, name="worker-metrics-reporter", daemon=True).start()
+
+    def stop_reporter(self):
+        self._stop.set()
+        self.send()
+
+    def instrument(self, app):
+        """统计 app 处理每个请求的耗时，响应状态码大于等于 500 或没有响应时记为错误"""
+        handle_request = app.handle_request
+
+        async def instrumented(request, write_callback, stream_callback):
+            start = time.perf_counter()
+            statuses = []
+
+            def write(response):
+                statuses.append(getattr(response, "status", 0))
+                return write_callback(response)
+
+            async def stream(response):
+                statuses.append(getattr(response, "status", 0))
+                return await stream_callback(response)
+
+            try:
+                await handle_request(request, write, stream)
+            finally:
+                self.record(time.perf_counter() - start, error=not statuses or statuses[0] >= 500)
+
+        app.handle_request = instrumented
+        return app
+
+
+def bind_reuseport_socket(host, port, backlog=100):
+    """创建设置了 SO_REUSEPORT 的监听 socket"""
+    family = socket.AF_INET6 if host and ":" in host else socket.AF_INET
+    sock = bind_socket(host, port, family=family, reuse_port=True)
+    sock.listen(backlog)
+    return sock
+
+
+def set_cpu_affinity(cpu):
+    """将当前进程绑定到 cpu，平台不支持时返回 False"""
+    if cpu is None or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as exc_info:
+        logger.warning("Failed to pin worker [%s] to cpu %s: %s", os.getpid(), cpu, exc_info)
+        return False
+    return True
+
+
+def serve_worker(server_settings, metrics):
+    """默认的工作进程入口，绑定自己的 SO_REUSEPORT socket 后调用 serve"""
+    # server 模块导入本模块，在函数中导入避免循环导入
+    from xTool.asynchronous.servers.server import serve
+
+    settings = dict(server_settings)
+    settings["sock"] = bind_reuseport_socket(settings.pop("host"), settings.pop("port"), settings.get("backlog", 100))
+    settings["host"] = settings["port"] = None
+    settings["reuse_port"] = True
+    settings["run_multiple"] = True
+    for name in ("before_start", "after_start", "before_stop", "after_stop"):
+        settings[name] = list(settings.get(name) or [])
+    settings["after_start"].append(lambda loop: metrics.ready())
+    metrics.instrument(settings["app"])
+    serve(**settings)
+
+
+def _worker_main(target, server_settings, connector, cpu, stats_interval):
+    connector.close_other_side()
+    set_cpu_affinity(cpu)
+    metrics = WorkerMetrics(connector)
+    metrics.start_reporter(stats_interval)
+    try:
+        target(server_settings, metrics)
+    finally:
+        metrics.stop_reporter()
+        connector.close()
+
+
+class Worker:
+    """主进程中记录的工作进程"""
+
+    __slots__ = ("index", "cpu", "process", "connector", "buffer", "ready", "closed", "stats")
+
+    def __init__(self, index, cpu, process, connector):
+        self.index = index
+        self.cpu = cpu
+        self.process = process
+        self.connector = connector
+        self.buffer = b""
+        self.ready = False
+        self.closed = False
+        # 请求数，错误数，延迟总和，最大延迟
+        self.stats = (0, 0, 0.0, 0.0)
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+
+class ReusePortSupervisor:
+    """启动并监控多个绑定 SO_REUSEPORT socket 的工作进程
+
+    注意：Linux 上关闭一个 SO_REUSEPORT socket 时，已经分配到该 socket 但还没有 accept 的连接会被重置
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        server_settings,
+        workers,
+        target=serve_worker,
+        cpu_affinity=True,
+        stats_interval=5,
+        ready_timeout=30,
+        stop_timeout=30,
+        restart_delay=1,
+    ):
+        """
+        :param server_settings: 传给 target 的参数，默认为 serve 的参数
+        :param workers: 工作进程数
+        :param target: 工作进程入口，参数为 server_settings 和 WorkerMetrics，开始监听后需要调用 metrics.ready()
+        :param cpu_affinity: 是否将工作进程依次绑定到当前进程可用的 CPU
+        :param stats_interval: 工作进程上报统计数据的间隔，单位是秒
+        :param ready_timeout: 滚动重启时等待新进程开始监听的超时时间，单位是秒
+        :param stop_timeout: 停止工作进程时等待进程退出的超时时间，超时后强制结束，单位是秒
+        :param restart_delay: 工作进程异常退出后重启的延迟，单位是秒
+        """
+        self.server_settings = server_settings
+        self.workers = workers
+        self.target = target
+        if cpu_affinity and hasattr(os, "sched_getaffinity"):
+            self.cpus = sorted(os.sched_getaffinity(0))
+        else:
+            self.cpus = None
+        self.stats_interval = stats_interval
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.restart_delay = restart_delay
+        self.restarts = 0
+        self._workers = [None] * workers
+        self._restart_at = {}
+        # 已退出的工作进程的统计数据
+        self._retired = (0, 0, 0.0, 0.0)
+        self._selector = selectors.DefaultSelector()
+        self._mp = multiprocessing.get_context("fork")
+        self._stopping = False
+        self._restart_requested = False
+
+    def start_worker(self, index):
+        cpu = self.cpus[index % len(self.cpus)] if self.cpus else None
+        pipeline = SocketPairPipeline()
+        server_connector, client_connector = pipeline.create_connectors()
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(self.target, self.server_settings, client_connector, cpu, self.stats_interval),
+            daemon=True,
+        )
+        process.start()
+        server_connector.close_other_side()
+        worker = Worker(index, cpu, process, server_connector)
+        self._selector.register(server_connector.fileno, selectors.EVENT_READ, worker)
+        logger.info("Starting worker [%s] on cpu %s", process.pid, cpu)
+        return worker
+
+    def start(self):
+        for index in range(self.workers):
+            self._workers[index] = self.start_worker(index)
+
+    def _read(self, worker):
+        try:
+            data = worker.connector.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            self._unregister(worker)
+            worker.closed = True
+            return
+        buffer = worker.buffer + data
+        size = _MESSAGE.size
+        offset = 0
+        while len(buffer) - offset >= size:
+            kind, _, requests, errors, latency_total, latency_max = _MESSAGE.unpack_from(buffer, offset)
+            offset += size
+            if kind == MSG_READY:
+                worker.ready = True
+            worker.stats = (requests, errors, latency_total, latency_max)
+        worker.buffer = buffer[offset:]
+
+    def _unregister(self, worker):
+        self._selector.unregister(worker.connector.fileno)
+
+    def poll(self, timeout=0):
+        """读取工作进程上报的数据"""
+        for key, _ in self._selector.select(timeout):
+            self._read(key.data)
+
+    def _retire(self, worker):
+        # 读取进程退出前最后上报的数据，直到对端关闭
+        deadline = time.monotonic() + 1
+        while not worker.closed and time.monotonic() < deadline:
+            if select.select([worker.connector.fileno], [], [], 0.1)[0]:
+                self._read(worker)
+        if not worker.closed:
+            self._unregister(worker)
+        worker.connector.close()
+        requests, errors, latency_total, latency_max = self._retired
+        self._retired = (
+            requests + worker.stats[0],
+            errors + worker.stats[1],
+            latency_total + worker.stats[2],
+            max(latency_max, worker.stats[3]),
+        )
+
+    def stop_worker(self, worker, timeout=None):
+        """发送 SIGTERM 停止工作进程，超时后强制结束"""
+        timeout = self.stop_timeout if timeout is None else timeout
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout)
+        if worker.process.is_alive():
+            logger.warning("Worker [%s] did not stop in %ss, killing", worker.pid, timeout)
+            worker.process.kill()
+            worker.process.join()
+        self._retire(worker)
+
+    def reap(self):
+        """重启异常退出的工作进程"""
+        now = time.monotonic()
+        for index, worker in enumerate(self._workers):
+            if worker is not None and not worker.process.is_alive():
+                logger.warning("Worker [%s] exited with code %s", worker.pid, worker.process.exitcode)
+                worker.process.join()
+                self._retire(worker)
+                self._workers[index] = None
+                self._restart_at[index] = now + self.restart_delay
+        for index, restart_at in list(self._restart_at.items()):
+            if restart_at <= now and not self._stopping:
+                del self._restart_at[index]
+                self._workers[index] = self.start_worker(index)
+                self.restarts += 1
+
+    def wait_ready(self, workers, timeout):
+        """等待工作进程开始监听，进程退出或超时返回 False"""
+        deadline = time.monotonic() + timeout
+        while not all(worker.ready for worker in workers):
+            if self._stopping or time.monotonic() > deadline:
+                return False
+            if not all(worker.ready or worker.process.is_alive() for worker in workers):
+                return False
+            self.poll(0.05)
+        return True
+
+    def rolling_restart(self):
+        """逐个替换工作进程，新进程开始监听后再停止旧进程，返回是否全部替换成功"""
+        logger.info("Rolling restart of %s workers", self.workers)
+        for index in range(self.workers):
+            old = self._workers[index]
+            new = self.start_worker(index)
+            if not self.wait_ready([new], self.ready_timeout):
+                logger.error("Worker [%s] is not ready, abort rolling restart", new.pid)
+                self.stop_worker(new, timeout=0 if not new.process.is_alive() else None)
+                return False
+            self._workers[index] = new
+            self._restart_at.pop(index, None)
+            if old is not None:
+                self.stop_worker(old)
+        return True
+
+    def stop_all(self):
+        """停止所有工作进程，先全部发送 SIGTERM，再逐个等待退出"""
+        self._stopping = True
+        workers = [worker for worker in self._workers if worker is not None]
+        for worker in workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for worker in workers:
+            self.stop_worker(worker)
+        self._workers = [None] * self.workers
+        self._restart_at.clear()
+
+    def stats(self):
+        """汇总所有工作进程的统计数据，包含已退出的工作进程"""
+        workers = []
+        requests, errors, latency_total, latency_max = self._retired
+        for worker in self._workers:
+            if worker is None:
+                continue
+            w_requests, w_errors, w_latency_total, w_latency_max = worker.stats
+            workers.append(
+                {
+                    "index": worker.index,
+                    "pid": worker.pid,
+                    "cpu": worker.cpu,
+                    "ready": worker.ready,
+                    "requests": w_requests,
+                    "errors": w_errors,
+                    "latency_avg": w_latency_total / w_requests if w_requests else 0.0,
+                    "latency_max": w_latency_max,
+                }
+            )
+            requests += w_requests
+            errors += w_errors
+            latency_total += w_latency_total
+            latency_max = max(latency_max, w_latency_max)
+        return {
+            "workers": workers,
+            "requests": requests,
+            "errors": errors,
+            "latency_avg": latency_total / requests if requests else 0.0,
+            "latency_max": latency_max,
+            "restarts": self.restarts,
+        }
+
+    def stop(self, *args):
+        self._stopping = True
+
+    def request_restart(self, *args):
+        self._restart_requested = True
+
+    def run(self):
+        """在主线程中运行，SIGINT/SIGTERM 停止所有工作进程，SIGHUP 滚动重启"""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGHUP, self.request_restart)
+        self.start()
+        last_log = time.monotonic()
+        try:
+            while not self._stopping:
+                self.poll(self.POLL_INTERVAL)
+                self.reap()
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self.rolling_restart()
+                if time.monotonic() - last_log >= self.stats_interval:
+                    last_log = time.monotonic()
+                    stats = self.stats()
+                    logger.debug(
+                        "Workers stats: requests=%s errors=%s latency_avg=%.4fs latency_max=%.4fs restarts=%s",
+                        stats["requests"],
+                        stats["errors"],
+                        stats["latency_avg"],
+                        stats["latency_max"],
+                        stats["restarts"],
+                    )
+        finally:
+            self.stop_all()
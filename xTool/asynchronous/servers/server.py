@@ -6,15 +6,16 @@ from signal import SIG_IGN, SIGINT, SIGTERM, Signals
 from signal import signal as signal_func
 from socket import SO_REUSEADDR, SOL_SOCKET, socket
 
-from xTool.asynchronous.aiomisc import load_uvlopo
+from xTool.asynchronous.aiomisc import load_uvloop
 from xTool.asynchronous.servers.protocols.http_protocol import HttpProtocol
+from xTool.asynchronous.servers.reuseport import ReusePortSupervisor
 from xTool.asynchronous.servers.trigger import trigger_events
 from xTool.log import logger
 from xTool.misc import OS_IS_WINDOWS
-from xTool.servers.signal import Signal
+from xTool.net.servers.signal import Signal
 from xTool.utils.processes import ctrlc_workaround_for_windows
 
-load_uvlopo()
+load_uvloop()
 
 
 class AsyncioServer:
@@ -319,3 +320,29 @@ def serve_multiple(server_settings, workers):
     for process in processes:
         process.terminate()
     server_settings.get("sock").close()
+
+
+def serve_multiple_reuseport(server_settings, workers, cpu_affinity=True, stats_interval=5):
+    """Start multiple server processes, each listening on its own SO_REUSEPORT
+    socket so that the kernel balances connections across workers.
+
+    Workers are pinned to CPUs, report request/latency counters to this
+    process, are restarted when they exit unexpectedly and are replaced one
+    by one on SIGHUP.
+
+    :param server_settings: kw arguments to be passed to the serve function
+    :param workers: number of workers to launch
+    :param cpu_affinity: pin each worker to one of the available CPUs
+    :param stats_interval: seconds between worker metrics reports
+    :return: the supervisor, whose stats() holds the aggregated metrics
+    """
+    server_settings = dict(server_settings)
+    server_settings.pop("sock", None)
+    supervisor = ReusePortSupervisor(
+        server_settings,
+        workers,
+        cpu_affinity=cpu_affinity,
+        stats_interval=stats_interval,
+    )
+    supervisor.run()
+    return supervisor
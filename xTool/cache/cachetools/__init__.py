@@ -1,8 +1,10 @@
 from .cache import Cache
+from .concurrent import ConcurrentLRUCache, ConcurrentTTLCache
 from .fifo import FIFOCache
 from .keys import HashedTuple, hash_key, typed_key
 from .lfu import LFUCache
 from .lru import LRUCache
 from .mru import MRUCache
 from .rr import RRCache
+from .tinylfu import WTinyLFUCache
 from .ttl import TLRUCache, TTLCache
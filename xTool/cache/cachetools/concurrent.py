@@ -0,0 +1,323 @@
+import threading
+import time
+
+__all__ = ["ConcurrentLRUCache", "ConcurrentTTLCache"]
+
+_MISSING = object()
+
+# 每个分段最少保存的数据量，避免 maxsize 较小时分段过多，导致每个分段的容量太小
+MIN_SEGMENT_SIZE = 8
+# TTL 缓存每次写入时时钟指针检查的位置数，逐步删除过期的 key，避免不限容量时无限增长
+SWEEP_STEPS = 2
+
+
+class _Call:
+    """正在计算的 key，同一个 key 的其它调用方等待计算结果 ."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _Segment:
+    """使用 CLOCK 算法近似 LRU 的缓存分段
+
+    读取时只设置访问标记，不需要加锁，也不需要调整顺序；
+    写入和淘汰时加锁，时钟指针扫描环形数组，淘汰访问标记为 False 或已过期的 key，
+    访问标记为 True 的 key 清除标记后获得一次保留的机会。
+    """
+
+    __slots__ = ("capacity", "lock", "data", "ring", "free", "hand", "inflight", "hits", "misses")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # key 的 __eq__ 中可能再次调用缓存，需要使用可重入锁
+        self.lock = threading.RLock()
+        # key -> [value, 访问标记, 过期时间, 在环形数组中的位置]
+        self.data = {}
+        self.ring = []
+        self.free = []
+        self.hand = 0
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, now):
+        entry = self.data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[2] is not None and entry[2] <= now:
+            with self.lock:
+                # 加锁后再次确认，避免删除其他线程刚写入的数据
+                if self.data.get(key) is entry:
+                    self.delete(key)
+            return _MISSING
+        entry[1] = True
+        return entry[0]
+
+    def set(self, key, value, expires, now):
+        """需要在加锁后调用 ."""
+        if self.capacity == 0:
+            return
+        if expires is not None:
+            self.sweep(now)
+        entry = self.data.get(key)
+        if entry is not None:
+            entry[0] = value
+            entry[1] = True
+            entry[2] = expires
+            return
+        if self.capacity is not None and len(self.data) >= self.capacity:
+            slot = self.evict(now)
+        elif self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.ring)
+            self.ring.append(_MISSING)
+        self.ring[slot] = key
+        self.data[key] = [value, False, expires, slot]
+
+    def evict(self, now):
+        """淘汰一个 key，返回空出的位置 ."""
+        ring = self.ring
+        size = len(ring)
+        while True:
+            slot = self.hand
+            self.hand = (slot + 1) % size
+            key = ring[slot]
+            if key is _MISSING:
+                continue
+            entry = self.data[key]
+            if entry[1] and (entry[2] is None or entry[2] > now):
+                entry[1] = False
+                continue
+            del self.data[key]
+            return slot
+
+    def sweep(self, now, steps=SWEEP_STEPS):
+        """需要在加锁后调用，时钟指针前进 steps 个位置，删除其中过期的 key ."""
+        ring = self.ring
+        for _ in range(min(steps, len(ring))):
+            slot = self.hand
+            self.hand = (slot + 1) % len(ring)
+            key = ring[slot]
+            if key is _MISSING:
+                continue
+            entry = self.data[key]
+            if entry[2] is not None and entry[2] <= now:
+                self.delete(key)
+
+    def delete(self, key):
+        """需要在加锁后调用 ."""
+        entry = self.data.pop(key, None)
+        if entry is None:
+            return None
+        self.ring[entry[3]] = _MISSING
+        self.free.append(entry[3])
+        return entry
+
+    def expire(self, now):
+        """需要在加锁后调用 ."""
+        for key in [key for key, entry in self.data.items() if entry[2] is not None and entry[2] <= now]:
+            self.delete(key)
+
+    def clear(self):
+        self.data.clear()
+        self.ring.clear()
+        self.free.clear()
+        self.hand = 0
+        self.hits = self.misses = 0
+
+
+class ConcurrentLRUCache:
+    """分段加锁的线程安全 LRU 缓存
+
+    key 按 hash 值分布到 segments 个独立加锁的分段中，每个分段使用 CLOCK 算法近似 LRU，
+    读取不加锁；get_or_set 保证同一个 key 只计算一次。
+    """
+
+    def __init__(self, maxsize, segments=16):
+        """
+        :param maxsize: 最大条目数，为 None 时不限制
+        :param segments: 分段数量
+        """
+        self.__maxsize = maxsize
+        if maxsize is None:
+            capacities = [None] * segments
+        else:
+            segments = max(1, min(segments, maxsize // MIN_SEGMENT_SIZE))
+            capacities = [maxsize // segments + (1 if i < maxsize % segments else 0) for i in range(segments)]
+        self._segments = [_Segment(capacity) for capacity in capacities]
+
+    def __repr__(self):
+        return "{}(maxsize={!r}, curr_size={!r}, segments={!r})".format(
+            self.__class__.__name__, self.__maxsize, self.curr_size, len(self._segments)
+        )
+
+    def _segment(self, key):
+        return self._segments[hash(key) % len(self._segments)]
+
+    def _now(self):
+        return None
+
+    def _expires(self, now):
+        return None
+
+    def _get(self, segment, key):
+        value = segment.get(key, self._now())
+        if value is _MISSING:
+            segment.misses += 1
+        else:
+            segment.hits += 1
+        return value
+
+    def __getitem__(self, key):
+        value = self._get(self._segment(key), key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        segment = self._segment(key)
+        now = self._now()
+        with segment.lock:
+            segment.set(key, value, self._expires(now), now)
+
+    def __delitem__(self, key):
+        segment = self._segment(key)
+        with segment.lock:
+            if segment.delete(key) is None:
+                raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._segment(key).get(key, self._now()) is not _MISSING
+
+    def __len__(self):
+        return self.curr_size
+
+    def get(self, key, default=None):
+        value = self._get(self._segment(key), key)
+        return default if value is _MISSING else value
+
+    def pop(self, key, default=_MISSING):
+        segment = self._segment(key)
+        now = self._now()
+        with segment.lock:
+            value = segment.get(key, now)
+            if value is not _MISSING:
+                segment.delete(key)
+                return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def setdefault(self, key, default=None):
+        segment = self._segment(key)
+        now = self._now()
+        with segment.lock:
+            value = segment.get(key, now)
+            if value is _MISSING:
+                segment.set(key, default, self._expires(now), now)
+                value = default
+        return value
+
+    def get_or_set(self, key, factory):
+        """获取 key 的值，不存在时调用 factory 计算并缓存
+
+        多个线程同时获取不存在的 key 时，只有一个线程调用 factory，其它线程等待计算结果，
+        factory 抛出的异常也会抛给等待的线程
+        """
+        segment = self._segment(key)
+        value = self._get(segment, key)
+        if value is not _MISSING:
+            return value
+        with segment.lock:
+            value = segment.get(key, self._now())
+            if value is not _MISSING:
+                return value
+            call = segment.inflight.get(key)
+            leader = call is None
+            if leader:
+                call = segment.inflight[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = factory()
+            now = self._now()
+            with segment.lock:
+                segment.set(key, call.value, self._expires(now), now)
+        except BaseException as exc_info:
+            call.error = exc_info
+            raise
+        finally:
+            with segment.lock:
+                segment.inflight.pop(key, None)
+            call.event.set()
+        return call.value
+
+    def clear(self):
+        for segment in self._segments:
+            with segment.lock:
+                segment.clear()
+
+    @property
+    def maxsize(self):
+        return self.__maxsize
+
+    @property
+    def curr_size(self):
+        return sum(len(segment.data) for segment in self._segments)
+
+    @property
+    def hits(self):
+        return sum(segment.hits for segment in self._segments)
+
+    @property
+    def misses(self):
+        return sum(segment.misses for segment in self._segments)
+
+
+class ConcurrentTTLCache(ConcurrentLRUCache):
+    """分段加锁的线程安全 TTL 缓存
+
+    过期的 key 在读取时删除，淘汰时优先淘汰；每次写入时时钟指针顺带删除几个过期的 key，
+    不限容量时过期的 key 也不会一直占用内存。
+    """
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic, segments=16):
+        ConcurrentLRUCache.__init__(self, maxsize, segments)
+        self.__ttl = ttl
+        self.__timer = timer
+
+    def _now(self):
+        return self.__timer()
+
+    def _expires(self, now):
+        return now + self.__ttl
+
+    @property
+    def ttl(self):
+        return self.__ttl
+
+    @property
+    def timer(self):
+        return self.__timer
+
+    @property
+    def curr_size(self):
+        self.expire()
+        return ConcurrentLRUCache.curr_size.fget(self)
+
+    def expire(self, now=None):
+        """删除所有过期的 key ."""
+        now = self.__timer() if now is None else now
+        for segment in self._segments:
+            with segment.lock:
+                segment.expire(now)
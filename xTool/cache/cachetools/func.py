@@ -1,17 +1,22 @@
 import collections
 import functools
+import inspect
 import math
 import random
 import time
+from contextlib import nullcontext
 from threading import RLock
 
+from .concurrent import ConcurrentLRUCache, ConcurrentTTLCache
 from .fifo import FIFOCache
 from .keys import hash_key, typed_key
 from .lfu import LFUCache
 from .lru import LRUCache
 from .mru import MRUCache
 from .rr import RRCache
+from .tinylfu import WTinyLFUCache
 from .ttl import TTLCache
+from .utils import _call_and_store, _share
 
 _CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "maxsize", "curr_size"])
 
@@ -43,25 +48,43 @@ def _cache(cache, typed):
         hits = misses = 0
         lock = RLock()
 
-        def wrapper(*args, **kwargs):
-            nonlocal hits, misses
-            k = key(*args, **kwargs)
-            with lock:
-                try:
-                    v = cache[k]
-                    # 缓存命中次数
-                    hits += 1
-                    return v
-                except KeyError:
-                    # 缓存失效次数
-                    misses += 1
-            v = func(*args, **kwargs)
-            # in case of a race, prefer the item already in the cache
-            try:
+        if inspect.iscoroutinefunction(func):
+            pending = {}
+
+            async def wrapper(*args, **kwargs):
+                # 协程函数缓存 await 的结果，而不是协程对象
+                nonlocal hits, misses
+                k = key(*args, **kwargs)
+                with lock:
+                    try:
+                        v = cache[k]
+                        hits += 1
+                        return v
+                    except KeyError:
+                        misses += 1
+                return await _share(pending, k, lambda: _call_and_store(cache, k, lock, func(*args, **kwargs)))
+
+        else:
+
+            def wrapper(*args, **kwargs):
+                nonlocal hits, misses
+                k = key(*args, **kwargs)
                 with lock:
-                    return cache.setdefault(k, v)
-            except ValueError:
-                return v  # value too large
+                    try:
+                        v = cache[k]
+                        # 缓存命中次数
+                        hits += 1
+                        return v
+                    except KeyError:
+                        # 缓存失效次数
+                        misses += 1
+                v = func(*args, **kwargs)
+                # in case of a race, prefer the item already in the cache
+                try:
+                    with lock:
+                        return cache.setdefault(k, v)
+                except ValueError:
+                    return v  # value too large
 
         def cache_info():
             with lock:
@@ -86,6 +109,44 @@ def _cache(cache, typed):
     return decorator
 
 
+def _concurrent_cache(cache, typed):
+    maxsize = cache.maxsize
+
+    def decorator(func):
+        key = typed_key if typed else hash_key
+
+        if inspect.iscoroutinefunction(func):
+            pending = {}
+
+            async def wrapper(*args, **kwargs):
+                k = key(*args, **kwargs)
+                try:
+                    return cache[k]
+                except KeyError:
+                    pass
+                return await _share(pending, k, lambda: _call_and_store(cache, k, nullcontext(), func(*args, **kwargs)))
+
+        else:
+
+            def wrapper(*args, **kwargs):
+                # 分段加锁，同一个 key 只计算一次
+                return cache.get_or_set(key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        def cache_info():
+            return _CacheInfo(cache.hits, cache.misses, maxsize, cache.curr_size)
+
+        def cache_clear():
+            cache.clear()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_parameters = lambda: {"maxsize": maxsize, "typed": typed}
+        functools.update_wrapper(wrapper, func)
+        return wrapper
+
+    return decorator
+
+
 def fifo_cache(maxsize=128, typed=False):
     """Decorator to wrap a function with a memoizing callable that saves
     up to `maxsize` results based on a First In First Out (FIFO)
@@ -156,6 +217,18 @@ def rr_cache(maxsize=128, choice=random.choice, typed=False):
         return _cache(RRCache(maxsize, choice), typed)
 
 
+def wtinylfu_cache(maxsize=128, typed=False):
+    """Decorator to wrap a function with a memoizing callable that saves
+    up to `maxsize` results based on a Window TinyLFU admission policy.
+    """
+    if maxsize is None:
+        return _cache(_UnboundCache(), typed)
+    elif callable(maxsize):
+        return _cache(WTinyLFUCache(128), typed)(maxsize)
+    else:
+        return _cache(WTinyLFUCache(maxsize), typed)
+
+
 def ttl_cache(maxsize=128, ttl=600, timer=time.monotonic, typed=False):
     """Decorator to wrap a function with a memoizing callable that saves
     up to `maxsize` results based on a Least Recently Used (LRU)
@@ -167,3 +240,26 @@ def ttl_cache(maxsize=128, ttl=600, timer=time.monotonic, typed=False):
         return _cache(TTLCache(128, ttl, timer), typed)(maxsize)
     else:
         return _cache(TTLCache(maxsize, ttl, timer), typed)
+
+
+def concurrent_lru_cache(maxsize=128, typed=False, segments=16):
+    """Decorator to wrap a function with a memoizing callable that saves
+    up to `maxsize` results based on an approximate Least Recently Used
+    (CLOCK) algorithm, using lock striping for concurrent callers.
+    """
+    if callable(maxsize):
+        return _concurrent_cache(ConcurrentLRUCache(128, segments), typed)(maxsize)
+    else:
+        return _concurrent_cache(ConcurrentLRUCache(maxsize, segments), typed)
+
+
+def concurrent_ttl_cache(maxsize=128, ttl=600, timer=time.monotonic, typed=False, segments=16):
+    """Decorator to wrap a function with a memoizing callable that saves
+    up to `maxsize` results based on an approximate Least Recently Used
+    (CLOCK) algorithm with a per-item time-to-live (TTL) value, using lock
+    striping for concurrent callers.
+    """
+    if callable(maxsize):
+        return _concurrent_cache(ConcurrentTTLCache(128, ttl, timer, segments), typed)(maxsize)
+    else:
+        return _concurrent_cache(ConcurrentTTLCache(maxsize, ttl, timer, segments), typed)
@@ -0,0 +1,166 @@
+import collections
+
+from .cache import Cache
+
+_MASK64 = (1 << 64) - 1
+# 每一行使用不同的奇数乘数做乘法哈希
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+
+class CountMinSketch:
+    """近似统计 key 的访问频率
+
+    每个计数器最大为 15，使用保守更新，计数总次数达到 sample_size 后所有计数器减半，使旧的访问频率逐渐衰减
+    """
+
+    MAX_COUNT = 15
+
+    def __init__(self, width, sample_size=None):
+        width = max(16, width)
+        self.bits = (width - 1).bit_length()
+        self.width = 1 << self.bits
+        self.table = [[0] * self.width for _ in _SEEDS]
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key) & _MASK64
+        shift = 64 - self.bits
+        return [((h * seed) & _MASK64) >> shift for seed in _SEEDS]
+
+    def increment(self, key):
+        indexes = self._indexes(key)
+        # 保守更新：只增加最小的计数器，减少哈希冲突导致的高估
+        count = min(row[index] for row, index in zip(self.table, indexes))
+        if count < self.MAX_COUNT:
+            for row, index in zip(self.table, indexes):
+                if row[index] == count:
+                    row[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def frequency(self, key):
+        return min(row[index] for row, index in zip(self.table, self._indexes(key)))
+
+    def reset(self):
+        for row in self.table:
+            for i, count in enumerate(row):
+                row[i] = count >> 1
+        self.additions >>= 1
+
+
+class WTinyLFUCache(Cache):
+    """Window TinyLFU cache implementation.
+
+    新数据先进入占容量 window_ratio 的 LRU 窗口区，窗口区满时，窗口区中最久未使用的数据作为候选，
+    与主区试用段中最久未使用的数据比较访问频率，频率更高的保留，避免一次性的扫描淘汰热点数据。
+    主区分为试用段和保护段，试用段中的数据再次被访问后进入保护段，保护段满时降级到试用段。
+    """
+
+    def __init__(self, maxsize, get_sizeof=None, window_ratio=0.01, protected_ratio=0.8):
+        Cache.__init__(self, maxsize, get_sizeof)
+        self.__window_maxsize = max(1, int(maxsize * window_ratio))
+        self.__protected_maxsize = int((maxsize - self.__window_maxsize) * protected_ratio)
+        self.__window = collections.OrderedDict()
+        self.__probation = collections.OrderedDict()
+        self.__protected = collections.OrderedDict()
+        self.__window_size = 0
+        self.__protected_size = 0
+        # 每行的计数器数量为最大数据量的 4 倍，按字节限制容量时最多 2^16 个；每访问 10 倍最大数据量次后衰减
+        size = min(int(maxsize), 1 << 14)
+        self.__sketch = CountMinSketch(4 * size, sample_size=10 * max(size, 16))
+
+    def __getitem__(self, key, cache_getitem=Cache.__getitem__):
+        self.__sketch.increment(key)
+        value = cache_getitem(self, key)
+        if key in self:  # __missing__ may not store item
+            self.__touch(key)
+        return value
+
+    def __setitem__(self, key, value, cache_setitem=Cache.__setitem__):
+        self.__sketch.increment(key)
+        if key in self:
+            if self.get_sizeof(value) > self.maxsize:
+                raise ValueError("value too large")
+            # 先删除，避免腾出空间时淘汰自己，写入后放回原来的区
+            region = self.__remove(key)
+            Cache.__delitem__(self, key)
+            cache_setitem(self, key, value)
+            region[key] = None
+            if region is self.__window:
+                self.__window_size += self.get_size()[key]
+            elif region is self.__protected:
+                self.__protected_size += self.get_size()[key]
+                self.__demote()
+            return
+        cache_setitem(self, key, value)
+        self.__window[key] = None
+        self.__window_size += self.get_size()[key]
+        # 缓存未满时，窗口区超出容量的数据直接进入试用段
+        while self.__window_size > self.__window_maxsize and len(self.__window) > 1:
+            candidate = next(iter(self.__window))
+            del self.__window[candidate]
+            self.__window_size -= self.get_size()[candidate]
+            self.__probation[candidate] = None
+
+    def __delitem__(self, key, cache_delitem=Cache.__delitem__):
+        self.__remove(key)
+        cache_delitem(self, key)
+
+    def popitem(self):
+        """Remove and return the `(key, value)` pair evicted by the admission policy."""
+        victim = next(iter(self.__probation or self.__protected), None)
+        if self.__window and (victim is None or self.__window_size >= self.__window_maxsize):
+            candidate = next(iter(self.__window))
+            if victim is None or self.__sketch.frequency(candidate) <= self.__sketch.frequency(victim):
+                return self.__evict(candidate)
+            # 候选数据访问频率更高，进入试用段，淘汰主区的数据
+            del self.__window[candidate]
+            self.__window_size -= self.get_size()[candidate]
+            self.__probation[candidate] = None
+            return self.__evict(victim)
+        if victim is None:
+            raise KeyError("%s is empty" % type(self).__name__) from None
+        return self.__evict(victim)
+
+    def frequency(self, key):
+        """key 的近似访问频率 ."""
+        return self.__sketch.frequency(key)
+
+    def __touch(self, key):
+        if key in self.__window:
+            self.__window.move_to_end(key)
+        elif key in self.__protected:
+            self.__protected.move_to_end(key)
+        else:
+            # 试用段中的数据再次被访问，进入保护段
+            del self.__probation[key]
+            self.__protected[key] = None
+            self.__protected_size += self.get_size()[key]
+            self.__demote()
+
+    def __demote(self):
+        while self.__protected_size > self.__protected_maxsize and self.__protected:
+            key, _ = self.__protected.popitem(last=False)
+            self.__protected_size -= self.get_size()[key]
+            self.__probation[key] = None
+
+    def __evict(self, key):
+        # 不通过 self[key] 读取，避免淘汰时增加访问频率
+        value = Cache.__getitem__(self, key)
+        del self[key]
+        return key, value
+
+    def __remove(self, key):
+        """将 key 从所在的区中移除，返回所在的区 ."""
+        if key in self.__window:
+            del self.__window[key]
+            self.__window_size -= self.get_size()[key]
+            return self.__window
+        if key in self.__protected:
+            del self.__protected[key]
+            self.__protected_size -= self.get_size()[key]
+            return self.__protected
+        self.__probation.pop(key, None)
+        return self.__probation
@@ -1,8 +1,61 @@
+import asyncio
 import functools
+from contextlib import nullcontext
 
 from .keys import hash_key, method_key
 
 
+class _InFlight:
+    """正在执行的协程，同一个 key 的并发调用共享一个 Task ."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+async def _share(pending, k, create):
+    """等待 key 对应的 Task 执行完成，不存在时调用 create 创建
+
+    调用方被取消时不影响其它调用方，所有调用方都被取消时才取消 Task
+    """
+    loop = asyncio.get_running_loop()
+    inflight = pending.get(k)
+    # Task 只能在创建它的事件循环中等待
+    if inflight is None or inflight.task.get_loop() is not loop:
+        inflight = pending[k] = _InFlight(loop.create_task(create()))
+
+        def done(_):
+            if pending.get(k) is inflight:
+                del pending[k]
+
+        inflight.task.add_done_callback(done)
+    task = inflight.task
+    inflight.waiters += 1
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if inflight.waiters == 1 and not task.done():
+            task.cancel()
+            # Task 在下一次事件循环时才结束，之后的调用重新执行
+            if pending.get(k) is inflight:
+                del pending[k]
+        raise
+    finally:
+        inflight.waiters -= 1
+
+
+async def _call_and_store(cache, k, lock, coro):
+    v = await coro
+    try:
+        with lock:
+            cache[k] = v
+    except ValueError:
+        pass  # value too large
+    return v
+
+
 def cached(cache, key=hash_key, lock=None):
     """Decorator to wrap a function with a memoizing callable that saves
     results in a cache.
@@ -134,3 +187,91 @@ def cachedmethod(cache, key=method_key, lock=None):
         return functools.update_wrapper(wrapper, method)
 
     return decorator
+
+
+def acached(cache, key=hash_key, lock=None):
+    """Decorator to wrap a coroutine function with a memoizing callable
+    that saves awaited results in a cache.
+
+    同一个 key 的并发调用共享一次执行，过期由 cache 决定（例如 TTLCache）
+    """
+
+    def decorator(func):
+        pending = {}
+        cache_lock = nullcontext() if lock is None else lock
+
+        if cache is None:
+
+            async def wrapper(*args, **kwargs):
+                return await func(*args, **kwargs)
+
+            def clear():
+                pass
+
+        else:
+
+            async def wrapper(*args, **kwargs):
+                k = key(*args, **kwargs)
+                try:
+                    with cache_lock:
+                        return cache[k]
+                except KeyError:
+                    pass  # key not found
+                return await _share(pending, k, lambda: _call_and_store(cache, k, cache_lock, func(*args, **kwargs)))
+
+            def clear():
+                with cache_lock:
+                    cache.clear()
+
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_lock = lock
+        wrapper.cache_clear = clear
+
+        return functools.update_wrapper(wrapper, func)
+
+    return decorator
+
+
+def acachedmethod(cache, key=method_key, lock=None):
+    """Decorator to wrap a class or instance coroutine method with a
+    memoizing callable that saves awaited results in a cache.
+
+    """
+
+    def decorator(method):
+        pending = {}
+
+        def get_lock(self):
+            return nullcontext() if lock is None else lock(self)
+
+        async def wrapper(self, *args, **kwargs):
+            c = cache(self)
+            if c is None:
+                return await method(self, *args, **kwargs)
+            k = key(self, *args, **kwargs)
+            cache_lock = get_lock(self)
+            try:
+                with cache_lock:
+                    return c[k]
+            except KeyError:
+                pass  # key not found
+            # 不同实例的缓存相互独立
+            return await _share(
+                pending, (id(c), k), lambda: _call_and_store(c, k, cache_lock, method(self, *args, **kwargs))
+            )
+
+        def clear(self):
+            c = cache(self)
+            if c is not None:
+                with get_lock(self):
+                    c.clear()
+
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_lock = lock
+        wrapper.cache_clear = clear
+
+        return functools.update_wrapper(wrapper, method)
+
+    return decorator
@@ -2,6 +2,10 @@ from enum import Enum
 
 TASK_STORAGE_QUEUE = "task_storage"
 TASK_DELAY_QUEUE = "task_delay_queue"
+# 延时任务的重试次数
+TASK_RETRY_QUEUE = "task_retry"
+# 超过重试次数的任务
+TASK_DEAD_QUEUE = "task_dead"
 
 
 class CacheBackendType(Enum):
@@ -0,0 +1,288 @@
+"""
+BaseRedisCache.delay 写入的延时任务的消费者
+
+delay 将任务详情写入哈希表 {prefix}task_storage，任务ID写入有序集合 {prefix}task_delay_queue，分数为执行时间。
+消费者通过 lua 脚本原子地取出到期的任务，并将任务的分数改为可见性超时的截止时间：
+任务处理成功后删除；处理失败时按重试间隔重新入队，超过重试次数后移入 {prefix}task_dead；
+消费者异常退出时，未确认的任务在可见性超时后会被重新消费。
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson as json
+
+from xTool.cache.constants import (
+    TASK_DEAD_QUEUE,
+    TASK_DELAY_QUEUE,
+    TASK_RETRY_QUEUE,
+    TASK_STORAGE_QUEUE,
+)
+
+logger = logging.getLogger("cache")
+
+__all__ = ["DelayTask", "DelayQueueConsumer"]
+
+# 取出到期的任务，并设置可见性超时
+POP_DUE_TASKS_SCRIPT = """
+local task_ids = redis.call("zrangebyscore", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+local messages = {}
+for _, task_id in ipairs(task_ids) do
+    local message = redis.call("hget", KEYS[2], task_id)
+    if message then
+        redis.call("zadd", KEYS[1], ARGV[3], task_id)
+        table.insert(messages, message)
+    else
+        redis.call("zrem", KEYS[1], task_id)
+    end
+end
+return messages
+"""
+
+
+@dataclass
+class DelayTask:
+    task_id: str
+    cmd: str
+    queue: str
+    values: List[Any]
+    score: float
+    retries: int = 0
+    message: Any = field(default=None, repr=False)
+
+    @classmethod
+    def loads(cls, message) -> "DelayTask":
+        task_id, cmd, queue, values, score = json.loads(message)
+        return cls(task_id, cmd, queue, list(values), score, message=message)
+
+
+class DelayQueueConsumer:
+    """延时任务消费者
+
+    按任务的 cmd 分发到注册的处理函数，没有注册处理函数的 cmd 作为 redis 命令执行，
+    即 client.<cmd>(queue, *values)，例如 cmd 为 lpush 时将 values 推入 queue 列表
+    """
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "",
+        batch_size: int = 100,
+        visibility_timeout: float = 60,
+        max_retries: int = 3,
+        retry_delay: float = 5,
+        poll_interval: float = 0.5,
+    ):
+        """
+        :param client: redis 客户端或 BaseRedisCache，需要支持 eval
+        :param batch_size: 每次取出的最大任务数
+        :param visibility_timeout: 任务取出后未确认时重新可见的时间，单位：s
+        :param max_retries: 处理失败后的最大重试次数
+        :param retry_delay: 重试间隔，单位：s，按重试次数线性增加
+        :param poll_interval: 没有到期任务时的轮询间隔，单位：s
+        """
+        self.client = client
+        self.delay_queue = f"{prefix}{TASK_DELAY_QUEUE}"
+        self.storage_queue = f"{prefix}{TASK_STORAGE_QUEUE}"
+        self.retry_queue = f"{prefix}{TASK_RETRY_QUEUE}"
+        self.dead_queue = f"{prefix}{TASK_DEAD_QUEUE}"
+        self.batch_size = batch_size
+        self.visibility_timeout = visibility_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Callable] = {}
+        self.stats = {"popped": 0, "succeeded": 0, "failed": 0, "retried": 0, "dead": 0}
+        self._stats_lock = threading.Lock()
+        self.started_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _incr(self, name: str, count: int = 1) -> None:
+        # 异步消费时 ack/nack 在多个线程中执行
+        with self._stats_lock:
+            self.stats[name] += count
+
+    def register(self, cmd: str, handler: Optional[Callable] = None):
+        """
+        注册 cmd 的处理函数，处理函数的参数为 DelayTask，可以是协程函数（只能在 arun_forever 中使用）
+        """
+        if handler is not None:
+            self.handlers[cmd] = handler
+            return handler
+
+        def decorator(func):
+            self.handlers[cmd] = func
+            return func
+
+        return decorator
+
+    def pop_due(self, now: Optional[float] = None) -> List[DelayTask]:
+        """
+        原子地取出到期的任务
+        """
+        now = time.time() if now is None else now
+        messages = self.client.eval(
+            POP_DUE_TASKS_SCRIPT,
+            2,
+            self.delay_queue,
+            self.storage_queue,
+            now,
+            self.batch_size,
+            now + self.visibility_timeout,
+        )
+        tasks = []
+        for message in messages or []:
+            try:
+                tasks.append(DelayTask.loads(message))
+            except Exception as exc_info:  # noqa
+                logger.exception("invalid delay task %s: %s", message, exc_info)
+        if tasks:
+            retries = self.client.hmget(self.retry_queue, [task.task_id for task in tasks])
+            for task, retry in zip(tasks, retries):
+                task.retries = int(retry or 0)
+        self._incr("popped", len(tasks))
+        return tasks
+
+    def ack(self, task: DelayTask) -> None:
+        """
+        确认任务已处理完成
+        """
+        self.client.zrem(self.delay_queue, task.task_id)
+        self.client.hdel(self.storage_queue, task.task_id)
+        self.client.hdel(self.retry_queue, task.task_id)
+        self._incr("succeeded")
+
+    def nack(self, task: DelayTask, error: BaseException) -> None:
+        """
+        任务处理失败，重新入队或移入死信队列
+        """
+        self._incr("failed")
+        # 异步消费时在线程中调用，不在 except 块中，需要显式传入异常
+        logger.error("delay task %s failed: %s", task.task_id, error, exc_info=error)
+        if task.retries < self.max_retries:
+            self.client.hincrby(self.retry_queue, task.task_id, 1)
+            self.client.zadd(self.delay_queue, {task.task_id: time.time() + self.retry_delay * (task.retries + 1)})
+            self._incr("retried")
+            return
+        self.client.hset(self.dead_queue, task.task_id, task.message)
+        self.client.zrem(self.delay_queue, task.task_id)
+        self.client.hdel(self.storage_queue, task.task_id)
+        self.client.hdel(self.retry_queue, task.task_id)
+        self._incr("dead")
+
+    def get_handler(self, cmd: str) -> Callable:
+        handler = self.handlers.get(cmd)
+        if handler is not None:
+            return handler
+
+        def execute_command(task: DelayTask):
+            return getattr(self.client, task.cmd)(task.queue, *task.values)
+
+        return execute_command
+
+    def dispatch(self, task: DelayTask) -> bool:
+        try:
+            self.get_handler(task.cmd)(task)
+        except Exception as exc_info:  # noqa
+            self.nack(task, exc_info)
+            return False
+        self.ack(task)
+        return True
+
+    def run_once(self, now: Optional[float] = None) -> int:
+        """
+        处理一批到期的任务，返回处理的任务数
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        tasks = self.pop_due(now)
+        for task in tasks:
+            self.dispatch(task)
+        return len(tasks)
+
+    def throughput(self) -> float:
+        """
+        每秒处理成功的任务数
+        """
+        if self.started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.stats["succeeded"] / elapsed if elapsed > 0 else 0.0
+
+    def run_forever(self) -> None:
+        """
+        在当前线程中循环消费，直到调用 stop
+        """
+        while not self._stop_event.is_set():
+            try:
+                count = self.run_once()
+            except Exception as exc_info:  # noqa
+                logger.exception(exc_info)
+                count = 0
+            # 取满一批时立即继续消费
+            if count < self.batch_size:
+                self._stop_event.wait(self.poll_interval)
+
+    def start(self) -> threading.Thread:
+        """
+        在后台线程中消费
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="delay-queue-consumer", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def adispatch(self, task: DelayTask) -> bool:
+        handler = self.get_handler(task.cmd)
+        try:
+            if inspect.iscoroutinefunction(handler):
+                await handler(task)
+            else:
+                await asyncio.to_thread(handler, task)
+        except Exception as exc_info:  # noqa
+            await asyncio.to_thread(self.nack, task, exc_info)
+            return False
+        await asyncio.to_thread(self.ack, task)
+        return True
+
+    async def arun_once(self, concurrency: int = 10) -> int:
+        """
+        处理一批到期的任务，最多同时处理 concurrency 个任务
+        """
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        tasks = await asyncio.to_thread(self.pop_due)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def dispatch(task):
+            async with semaphore:
+                await self.adispatch(task)
+
+        await asyncio.gather(*(dispatch(task) for task in tasks))
+        return len(tasks)
+
+    async def arun_forever(self, concurrency: int = 10) -> None:
+        """
+        在事件循环中循环消费，直到调用 stop
+        """
+        while not self._stop_event.is_set():
+            try:
+                count = await self.arun_once(concurrency)
+            except Exception as exc_info:  # noqa
+                logger.exception(exc_info)
+                count = 0
+            if count < self.batch_size:
+                # 调用 stop 后立即返回
+                await asyncio.to_thread(self._stop_event.wait, self.poll_interval)
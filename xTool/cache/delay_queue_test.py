@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+
+import fakeredis
+import pytest
+
+from xTool.cache.delay_queue import DelayQueueConsumer
+from xTool.cache.storage.redis import RedisCache
+
+
+@pytest.fixture
+def client():
+    return RedisCache({}, redis_class=fakeredis.FakeStrictRedis)
+
+
+def test_run_once(client):
+    client.delay("lpush", "queue_a", "test:", 1, 2)
+    client.delay("lpush", "queue_a", "test:", 3, delay=60)
+    consumer = DelayQueueConsumer(client, prefix="test:")
+    assert consumer.run_once() == 1
+    assert client.lrange("queue_a", 0, -1) == ["2", "1"]
+    assert consumer.run_once() == 0
+    assert consumer.run_once(now=time.time() + 61) == 1
+    assert client.lrange("queue_a", 0, -1) == ["3", "2", "1"]
+    assert client.hlen("test:task_storage") == 0
+    assert consumer.stats["succeeded"] == 2
+
+
+def test_visibility_timeout(client):
+    task_id = client.delay("lpush", "queue_b", "test:", 1)
+    consumer = DelayQueueConsumer(client, prefix="test:", visibility_timeout=30)
+    assert [task.task_id for task in consumer.pop_due()] == [task_id]
+    # 未确认的任务在可见性超时前不会被重复取出
+    assert consumer.pop_due() == []
+    assert [task.task_id for task in consumer.pop_due(now=time.time() + 31)] == [task_id]
+
+
+def test_retry(client):
+    calls = []
+    consumer = DelayQueueConsumer(client, prefix="test:", max_retries=1, retry_delay=0)
+
+    @consumer.register("fail")
+    def fail(task):
+        calls.append(task.retries)
+        raise ValueError(task.values)
+
+    client.delay("fail", "queue_c", "test:", 1)
+    assert consumer.run_once() == 1
+    assert consumer.run_once() == 1
+    assert consumer.run_once() == 0
+    assert calls == [0, 1]
+    assert consumer.stats["retried"] == 1
+    assert consumer.stats["dead"] == 1
+    assert client.hlen("test:task_dead") == 1
+    assert client.zcard("test:task_delay_queue") == 0
+
+
+def test_start(client):
+    consumer = DelayQueueConsumer(client, prefix="test:", poll_interval=0.01)
+    consumer.start()
+    client.delay("rpush", "queue_d", "test:", "a")
+    for _ in range(100):
+        if client.llen("queue_d"):
+            break
+        time.sleep(0.01)
+    consumer.stop()
+    assert client.lrange("queue_d", 0, -1) == ["a"]
+
+
+def test_arun_once(client):
+    handled = []
+    consumer = DelayQueueConsumer(client, prefix="test:")
+
+    @consumer.register("handle")
+    async def handle(task):
+        handled.append(task.values)
+
+    for i in range(3):
+        client.delay("handle", "queue_e", "test:", i)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(consumer.arun_once()) == 3
+    finally:
+        loop.close()
+    assert sorted(handled) == [[0], [1], [2]]
+    assert consumer.throughput() > 0
+
+
+def test_anack_logs_traceback(client, caplog):
+    consumer = DelayQueueConsumer(client, prefix="test:")
+
+    @consumer.register("fail")
+    async def fail(task):
+        raise ValueError(task.values)
+
+    client.delay("fail", "queue_f", "test:", 1)
+    loop = asyncio.new_event_loop()
+    try:
+        with caplog.at_level(logging.ERROR, logger="cache"):
+            assert loop.run_until_complete(consumer.arun_once()) == 1
+    finally:
+        loop.close()
+    (record,) = caplog.records
+    assert isinstance(record.exc_info[1], ValueError)
+    assert "in fail" in caplog.text
+    assert consumer.stats["retried"] == 1
+
+
+def test_arun_forever_stop(client):
+    consumer = DelayQueueConsumer(client, prefix="test:", poll_interval=10)
+
+    async def run():
+        task = asyncio.ensure_future(consumer.arun_forever())
+        await asyncio.sleep(0.1)
+        start = time.monotonic()
+        consumer.stop()
+        await asyncio.wait_for(task, 2)
+        return time.monotonic() - start
+
+    loop = asyncio.new_event_loop()
+    try:
+        # 不需要等待轮询间隔结束
+        assert loop.run_until_complete(run()) < 1
+    finally:
+        loop.close()
@@ -1,9 +1,33 @@
+import os
+import sys
+import threading
 import time
-from typing import Any
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+def get_sizeof(value: Any, depth: int = 4) -> int:
+    """估算 value 占用的字节数，递归计算容器中的元素 ."""
+    size = sys.getsizeof(value)
+    if depth <= 0:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += get_sizeof(k, depth - 1) + get_sizeof(v, depth - 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += get_sizeof(item, depth - 1)
+    return size
 
 
 class InstanceCache:
-    """基于内存的缓冲 ."""
+    """基于内存的缓冲
+
+    - 按条目数 maxsize 和字节数 max_bytes 限制容量，超出时淘汰最久未使用的数据
+    - 读取时惰性删除过期数据，后台线程每隔 sweep_interval 秒增量扫描 sweep_batch 个数据，删除过期数据
+    - 读写操作都加锁：读取时需要更新最近使用顺序（move_to_end），写入时需要保证容量统计准确
+    """
 
     @classmethod
     def instance(cls, *args, **kwargs):
@@ -11,11 +35,52 @@ class InstanceCache:
             cls._instance = cls()
         return cls._instance
 
-    def __init__(self) -> None:
-        self.__cache = {}
+    def __init__(
+        self,
+        maxsize: Optional[int] = 100000,
+        max_bytes: Optional[int] = None,
+        get_sizeof: Optional[Callable[[Any], int]] = None,
+        sweep_interval: float = 60,
+        sweep_batch: int = 1000,
+    ) -> None:
+        """
+        :param maxsize: 最大条目数，为 None 时不限制
+        :param max_bytes: 最大字节数，为 None 时不限制也不计算 value 的大小
+        :param get_sizeof: 计算 value 字节数的函数
+        :param sweep_interval: 后台扫描过期数据的间隔，单位是秒，为 0 时不扫描
+        :param sweep_batch: 每次扫描的最大条目数
+        """
+        if get_sizeof:
+            self.get_sizeof = get_sizeof
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        # key -> (value, 过期时间, 字节数)，按访问顺序排列
+        self.__cache = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__sweep_keys = iter(())
+        self.__sweeper_pid = None
+        self.__sweeper_stop = None
+        self.curr_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self.__cache)
 
     def clear(self) -> None:
-        self.__cache = {}
+        with self.__lock:
+            self.__cache = OrderedDict()
+            self.__sweep_keys = iter(())
+            self.curr_bytes = 0
+
+    def get_expire_time(self, timeout: int, use_round: bool) -> float:
+        if not use_round:
+            return time.time() + timeout
+        return (time.time() + timeout) // timeout * timeout
 
     def set(self, key: str, value: Any, timeout: int = 0, use_round: bool = False) -> None:
         """
@@ -25,20 +90,55 @@ class InstanceCache:
         :param use_round: 时间是否需要向上取整，取整用于缓存时间同步
         :return:
         """
-        if not use_round:
-            timeout = time.time() + timeout
-        else:
-            timeout = (time.time() + timeout) // timeout * timeout
-        self.__cache[key] = (value, timeout)
+        self._set(key, value, self.get_expire_time(timeout, use_round))
+
+    def _set(self, key: str, value: Any, expire_time: float) -> None:
+        size = self.get_sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # 超过容量的数据不缓存
+            self.delete(key)
+            return
+        with self.__lock:
+            old = self.__cache.pop(key, None)
+            if old is not None:
+                self.curr_bytes -= old[2]
+            self.__cache[key] = (value, expire_time, size)
+            self.curr_bytes += size
+            self.__evict()
+        self.__ensure_sweeper()
+
+    def __evict(self) -> None:
+        cache = self.__cache
+        while cache and (
+            (self.maxsize is not None and len(cache) > self.maxsize)
+            or (self.max_bytes is not None and self.curr_bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = cache.popitem(last=False)
+            self.curr_bytes -= size
+            self.evictions += 1
+
+    def __expire(self, key: str, entry: tuple) -> None:
+        with self.__lock:
+            # 加锁后再次确认，避免删除其他线程刚写入的数据
+            if self.__cache.get(key) is entry:
+                del self.__cache[key]
+                self.curr_bytes -= entry[2]
+                self.expirations += 1
 
     def __get_raw(self, key: str) -> Any:
-        value = self.__cache.get(key)
-        if not value:
-            return None
-        if value[1] and time.time() > value[1]:
-            del self.__cache[key]
-            return None
-        return value
+        # move_to_end 会修改链表，需要与写入、删除和后台清理线程互斥
+        with self.__lock:
+            entry = self.__cache.get(key)
+            if not entry:
+                self.misses += 1
+                return None
+            if entry[1] and time.time() > entry[1]:
+                self.__expire(key, entry)
+                self.misses += 1
+                return None
+            self.__cache.move_to_end(key)
+            self.hits += 1
+            return entry
 
     def exists(self, key: str) -> bool:
         value = self.__get_raw(key)
@@ -49,7 +149,72 @@ class InstanceCache:
         return value and value[0]
 
     def delete(self, key: str) -> None:
-        try:
-            del self.__cache[key]
-        except KeyError:
-            pass
+        with self.__lock:
+            entry = self.__cache.pop(key, None)
+            if entry is not None:
+                self.curr_bytes -= entry[2]
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """增量扫描最多 limit 个数据，删除过期的数据，返回删除的数量 ."""
+        limit = limit or self.sweep_batch
+        now = time.time()
+        count = 0
+        with self.__lock:
+            for _ in range(limit):
+                key = next(self.__sweep_keys, None)
+                if key is None:
+                    # 一轮扫描结束，下次从头开始
+                    self.__sweep_keys = iter(list(self.__cache))
+                    break
+                entry = self.__cache.get(key)
+                if entry and entry[1] and now > entry[1]:
+                    del self.__cache[key]
+                    self.curr_bytes -= entry[2]
+                    self.expirations += 1
+                    count += 1
+        return count
+
+    def __ensure_sweeper(self) -> None:
+        # fork 后子进程中没有父进程的线程，需要重新启动
+        if not self.sweep_interval or self.__sweeper_pid == os.getpid():
+            return
+        with self.__lock:
+            if self.__sweeper_pid == os.getpid():
+                return
+            self.__sweeper_pid = os.getpid()
+            self.__sweeper_stop = stop = threading.Event()
+        # 后台线程只持有弱引用，缓存对象被回收后线程退出
+        ref = weakref.ref(self)
+        interval = self.sweep_interval
+
+        def run():
+            while not stop.wait(interval):
+                cache = ref()
+                if cache is None:
+                    return
+                cache.sweep()
+                del cache
+
+        threading.Thread(target=run, name="instance-cache-sweeper", daemon=True).start()
+
+    def stop_sweeper(self) -> None:
+        if self.__sweeper_stop is not None:
+            self.__sweeper_stop.set()
+        self.__sweeper_pid = None
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.__cache),
+            "bytes": self.curr_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    @staticmethod
+    def get_sizeof(value: Any) -> int:
+        """Return the size of a cache element's value."""
+        return get_sizeof(value)
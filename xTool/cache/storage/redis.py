@@ -90,7 +90,8 @@ class BaseRedisCache(abc.ABC):
         return handle
 
     def delay(self, cmd: str, queue: str, prefix: str = None, *values, **kwargs):
-        """延时推入队列 ."""
+        """延时推入队列，由 xTool.cache.delay_queue.DelayQueueConsumer 消费 ."""
+        prefix = prefix or ""
         # 任务的得分
         delay = kwargs.get("delay", 0)
         if delay < 0:
@@ -103,7 +104,8 @@ class BaseRedisCache(abc.ABC):
         # 将任务ID的详情存放到哈希表中
         self.hset(f"{prefix}{TASK_STORAGE_QUEUE}", task_id, message)
         # 将任务ID记录到有序集合，分数为入队时间戳
-        self.zadd(f"{prefix}{TASK_DELAY_QUEUE}", task_id, score)
+        self.zadd(f"{prefix}{TASK_DELAY_QUEUE}", {task_id: score})
+        return task_id
 
 
 class RedisCache(BaseRedisCache):
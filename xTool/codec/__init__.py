@@ -1,2 +1,3 @@
 from .bytes import *  # noqa
+from .canonical import *  # noqa
 from .md5 import *  # noqa
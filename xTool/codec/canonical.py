@@ -0,0 +1,87 @@
+"""
+计算嵌套参数的规范化哈希，用于生成缓存 key
+
+与 count_md5 相同，字典忽略 key 的顺序，list_sort 为 True 时列表忽略元素的顺序；
+不同的是先将参数编码为带类型和长度前缀的字节串，最后只计算一次哈希，
+不需要对每个子元素计算 md5，速度更快。结果与 count_md5 不兼容
+"""
+
+import hashlib
+from functools import lru_cache
+
+from .md5 import make_callable_hash
+
+__all__ = ["canonical_hash"]
+
+# 缓存不可变参数的哈希值的数量
+CANONICAL_HASH_CACHE_SIZE = 4096
+
+_MEMOIZABLE_TYPES = (str, bytes, int, type(None))
+
+
+def _hexdigest(data: bytes) -> str:
+    # 不使用 xxhash 等可选依赖，保证不同部署环境生成的缓存 key 一致
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _encode_str(content: str) -> bytes:
+    data = content.encode("utf-8", "surrogatepass")
+    return b"s%d:%s" % (len(data), data)
+
+
+def _encode(content, list_sort: bool) -> bytes:  # NOQA
+    content_type = type(content)
+    if content_type is str:
+        return _encode_str(content)
+    if content is None:
+        return b"N"
+    if content_type is bool:
+        return b"T" if content else b"F"
+    if content_type is int:
+        return b"i%d;" % content
+    if content_type is float:
+        return b"f%s;" % repr(content).encode()
+    if isinstance(content, dict):
+        # 与 count_md5 一致，字典的 key 按字符串比较
+        items = sorted(_encode_str(str(key)) + _encode(value, list_sort) for key, value in content.items())
+        return b"d%d{%s}" % (len(items), b"".join(items))
+    if isinstance(content, (list, tuple, set, frozenset)):
+        items = [_encode(item, list_sort) for item in content]
+        if list_sort or not isinstance(content, (list, tuple)):
+            # sorted 使用 timsort，对已经有序的输入只需要一次线性扫描
+            items.sort()
+        return b"l%d[%s]" % (len(items), b"".join(items))
+    if isinstance(content, (bytes, bytearray)):
+        return b"b%d:%s" % (len(content), content)
+    if callable(content):
+        return b"c%s;" % make_callable_hash(content).encode()
+    return b"o" + _encode_str(str(content))
+
+
+def _is_memoizable(content) -> bool:
+    """
+    只缓存类型严格的不可变参数，避免 1、1.0、True 这类相等但编码不同的参数共用缓存
+    """
+    content_type = type(content)
+    if content_type in _MEMOIZABLE_TYPES:
+        return True
+    if content_type is tuple:
+        return all(_is_memoizable(item) for item in content)
+    return False
+
+
+@lru_cache(maxsize=CANONICAL_HASH_CACHE_SIZE)
+def _memoized_canonical_hash(content, list_sort: bool) -> str:
+    return _hexdigest(_encode(content, list_sort))
+
+
+def canonical_hash(content, list_sort=True) -> str:
+    """
+    计算参数的规范化哈希，返回32位十六进制字符串
+
+    :param content: 字符串、数字、字节串、字典、列表、元组、集合及其嵌套结构，其他对象使用 str() 的结果
+    :param list_sort: 是否忽略列表中元素的顺序
+    """
+    if _is_memoizable(content):
+        return _memoized_canonical_hash(content, list_sort)
+    return _hexdigest(_encode(content, list_sort))
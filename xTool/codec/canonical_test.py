@@ -0,0 +1,12 @@
+from xTool.codec import canonical_hash
+
+
+def test_canonical_hash():
+    assert len(canonical_hash("1")) == 32
+    assert canonical_hash({"a": 1, "b": [1, 2]}) == canonical_hash({"b": [2, 1], "a": 1})
+    assert canonical_hash([1, 2], list_sort=False) != canonical_hash([2, 1], list_sort=False)
+    assert canonical_hash((1,)) != canonical_hash((True,))
+    assert canonical_hash((1,)) != canonical_hash(("1",))
+    assert canonical_hash(["ab", "c"]) != canonical_hash(["a", "bc"])
+    assert canonical_hash({"a": {"b": None}}) != canonical_hash({"a": {"b": "None"}})
+    assert canonical_hash(((1, "a"), 2)) == canonical_hash(((1, "a"), 2))
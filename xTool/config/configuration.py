@@ -310,9 +310,12 @@ DEFAULT_CONFIG = {
     "REQUEST_MAX_SIZE": 100000000,  # 100 megabytes
     "REQUEST_BUFFER_QUEUE_SIZE": 100,
     "REQUEST_TIMEOUT": 60,  # 60 seconds
+    "REQUEST_MULTIPART_STREAMING": False,  # 边接收边解析 multipart/form-data，不保存 request.body
+    "REQUEST_MULTIPART_SPOOL_SIZE": 2**20,  # 1 megabyte
     "RESPONSE_TIMEOUT": 60,  # 60 seconds
     "KEEP_ALIVE": True,
     "KEEP_ALIVE_TIMEOUT": 5,  # 5 seconds
+    "KEEP_ALIVE_PIPELINING": False,  # 按顺序处理同一个连接上连续发送的请求
     "WEBSOCKET_MAX_SIZE": 2**20,  # 1 megabyte
     "WEBSOCKET_MAX_QUEUE": 32,
     "WEBSOCKET_READ_LIMIT": 2**16,
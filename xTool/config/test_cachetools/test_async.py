@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+
+from xTool.cache.cachetools import LRUCache, TTLCache, func
+from xTool.cache.cachetools.utils import acached, acachedmethod
+
+
+class Timer:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+    def tick(self):
+        self.time += 1
+
+
+class ACachedTest(unittest.IsolatedAsyncioTestCase):
+    async def test_acached(self):
+        calls = []
+
+        @acached(LRUCache(maxsize=2))
+        async def get(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(*(get(1) for _ in range(5)))
+        self.assertEqual([1] * 5, results)
+        self.assertEqual(1, await get(1))
+        self.assertEqual([1], calls)
+        self.assertEqual(1, get.cache[(1,)])
+
+    async def test_ttl(self):
+        calls = []
+        cache = TTLCache(maxsize=2, ttl=1, timer=Timer())
+
+        @acached(cache)
+        async def get(value):
+            calls.append(value)
+            return value
+
+        await get(1)
+        await get(1)
+        cache.timer.tick()
+        await get(1)
+        self.assertEqual([1, 1], calls)
+
+    async def test_exception(self):
+        calls = []
+
+        @acached(LRUCache(maxsize=2))
+        async def get(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            raise ValueError(value)
+
+        results = await asyncio.gather(get(1), get(1), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        with self.assertRaises(ValueError):
+            await get(1)
+        self.assertEqual([1, 1], calls)
+
+    async def test_cancel(self):
+        calls = []
+
+        @acached(LRUCache(maxsize=2))
+        async def get(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+
+        first = asyncio.ensure_future(get(1))
+        second = asyncio.ensure_future(get(1))
+        await asyncio.sleep(0.01)
+        # 一个调用方被取消不影响其它调用方
+        first.cancel()
+        self.assertEqual(1, await second)
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual([1], calls)
+
+        # 所有调用方都被取消时取消执行，不缓存结果
+        task = asyncio.ensure_future(get(2))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertNotIn((2,), get.cache)
+        self.assertEqual(2, await get(2))
+        self.assertEqual([1, 2, 2], calls)
+
+    async def test_acachedmethod(self):
+        class Service:
+            def __init__(self):
+                self.cache = LRUCache(maxsize=2)
+                self.calls = 0
+
+            @acachedmethod(lambda self: self.cache)
+            async def get(self, value):
+                self.calls += 1
+                await asyncio.sleep(0.01)
+                return value
+
+        first, second = Service(), Service()
+        await asyncio.gather(first.get(1), first.get(1), second.get(1))
+        self.assertEqual(1, first.calls)
+        self.assertEqual(1, second.calls)
+        Service.get.cache_clear(first)
+        await first.get(1)
+        self.assertEqual(2, first.calls)
+
+    async def test_func(self):
+        calls = []
+
+        for decorator in (func.lru_cache(maxsize=2), func.concurrent_ttl_cache(maxsize=2)):
+
+            @decorator
+            async def get(value):
+                calls.append(value)
+                await asyncio.sleep(0.01)
+                return value
+
+            self.assertEqual([1, 1], await asyncio.gather(get(1), get(1)))
+            self.assertEqual(1, await get(1))
+        self.assertEqual([1, 1], calls)
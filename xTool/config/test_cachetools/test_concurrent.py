@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+
+from xTool.cache.cachetools import ConcurrentLRUCache, ConcurrentTTLCache
+
+
+class Timer:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+    def tick(self):
+        self.time += 1
+
+
+class ConcurrentLRUCacheTest(unittest.TestCase):
+    def test_insert(self):
+        cache = ConcurrentLRUCache(maxsize=2, segments=1)
+        cache[1] = 1
+        cache[2] = 2
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache[1])
+        # 2 没有被访问过，优先淘汰
+        cache[3] = 3
+        self.assertEqual(2, len(cache))
+        self.assertNotIn(2, cache)
+        self.assertEqual(1, cache[1])
+        self.assertEqual(3, cache[3])
+
+    def test_delete(self):
+        cache = ConcurrentLRUCache(maxsize=2)
+        cache[1] = 1
+        self.assertEqual(1, cache.pop(1))
+        self.assertEqual(None, cache.pop(1, None))
+        with self.assertRaises(KeyError):
+            del cache[1]
+        self.assertEqual(2, cache.setdefault(2, 2))
+        self.assertEqual(2, cache.setdefault(2, 3))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_maxsize(self):
+        cache = ConcurrentLRUCache(maxsize=100, segments=8)
+        for i in range(1000):
+            cache[i] = i
+        self.assertEqual(100, len(cache))
+        self.assertEqual(100, cache.maxsize)
+
+    def test_get_or_set(self):
+        cache = ConcurrentLRUCache(maxsize=10)
+        calls = []
+
+        def factory():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set("key", factory))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(["value"] * 5, results)
+        self.assertEqual([1], calls)
+
+    def test_get_or_set_error(self):
+        cache = ConcurrentLRUCache(maxsize=10)
+
+        def factory():
+            raise ValueError("error")
+
+        with self.assertRaises(ValueError):
+            cache.get_or_set("key", factory)
+        self.assertNotIn("key", cache)
+        self.assertEqual("value", cache.get_or_set("key", lambda: "value"))
+
+
+class ConcurrentTTLCacheTest(unittest.TestCase):
+    def test_ttl(self):
+        cache = ConcurrentTTLCache(maxsize=2, ttl=2, timer=Timer())
+        cache[1] = 1
+        cache.timer.tick()
+        cache[2] = 2
+        self.assertEqual(1, cache[1])
+        cache.timer.tick()
+        self.assertNotIn(1, cache)
+        self.assertEqual(2, cache[2])
+        self.assertEqual(1, len(cache))
+        cache.timer.tick()
+        self.assertEqual(0, len(cache))
+        self.assertEqual(2, cache.ttl)
+
+    def test_delete_expired_on_read(self):
+        cache = ConcurrentTTLCache(maxsize=None, ttl=1, timer=Timer(), segments=1)
+        cache[1] = 1
+        cache.timer.tick()
+        self.assertIsNone(cache.get(1))
+        self.assertEqual({}, cache._segments[0].data)
+
+    def test_unbounded_sweep(self):
+        cache = ConcurrentTTLCache(maxsize=None, ttl=1, timer=Timer(), segments=1)
+        for i in range(1000):
+            cache.timer.tick()
+            cache[i] = i
+        # 写入时逐步删除过期的 key，不会保留所有写入过的 key
+        segment = cache._segments[0]
+        self.assertLessEqual(len(segment.data), 2)
+        self.assertLessEqual(len(segment.ring), 4)
+        self.assertEqual(999, cache[999])
+
+    def test_evict_expired(self):
+        cache = ConcurrentTTLCache(maxsize=2, ttl=1, timer=Timer(), segments=1)
+        cache[1] = 1
+        cache[2] = 2
+        self.assertEqual(1, cache[1])
+        self.assertEqual(2, cache[2])
+        cache.timer.tick()
+        cache[3] = 3
+        self.assertEqual(3, cache[3])
@@ -121,3 +121,15 @@ class RRDecoratorTest(unittest.TestCase, DecoratorTestMixin):
 
 class TTLDecoratorTest(unittest.TestCase, DecoratorTestMixin):
     DECORATOR = staticmethod(func.ttl_cache)
+
+
+class ConcurrentLRUDecoratorTest(unittest.TestCase, DecoratorTestMixin):
+    DECORATOR = staticmethod(func.concurrent_lru_cache)
+
+
+class ConcurrentTTLDecoratorTest(unittest.TestCase, DecoratorTestMixin):
+    DECORATOR = staticmethod(func.concurrent_ttl_cache)
+
+
+class WTinyLFUDecoratorTest(unittest.TestCase, DecoratorTestMixin):
+    DECORATOR = staticmethod(func.wtinylfu_cache)
@@ -0,0 +1,63 @@
+import time
+
+from xTool.cache.storage.memory import InstanceCache, get_sizeof
+
+
+class TestInstanceCache:
+    def test_get(self):
+        cache = InstanceCache(sweep_interval=0)
+        cache.set("a", 1, timeout=10)
+        assert cache.get("a") == 1
+        assert cache.exists("a")
+        assert cache.get("b") is None
+        cache.delete("a")
+        assert not cache.exists("a")
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["hit_ratio"] == 0.5
+
+    def test_expire(self):
+        cache = InstanceCache(sweep_interval=0)
+        cache.set("a", 1, timeout=0.05)
+        time.sleep(0.1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert cache.stats()["expirations"] == 1
+
+    def test_maxsize(self):
+        cache = InstanceCache(maxsize=2, sweep_interval=0)
+        cache.set("a", 1, timeout=10)
+        cache.set("b", 2, timeout=10)
+        assert cache.get("a") == 1
+        cache.set("c", 3, timeout=10)
+        # 淘汰最久未使用的 b
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_max_bytes(self):
+        value = "a" * 1000
+        size = get_sizeof(value)
+        cache = InstanceCache(maxsize=None, max_bytes=size * 2, sweep_interval=0)
+        cache.set("a", value, timeout=10)
+        cache.set("b", value, timeout=10)
+        assert cache.stats()["bytes"] == size * 2
+        cache.set("c", value, timeout=10)
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        cache.set("d", value * 3, timeout=10)
+        assert cache.get("d") is None
+        cache.delete("b")
+        assert cache.stats()["bytes"] == size
+
+    def test_sweep(self):
+        cache = InstanceCache(sweep_interval=0.02, sweep_batch=10)
+        for i in range(20):
+            cache.set(i, i, timeout=0.01)
+        cache.set("a", 1, timeout=10)
+        time.sleep(0.5)
+        assert len(cache) == 1
+        assert cache.stats()["expirations"] == 20
+        cache.stop_sweeper()
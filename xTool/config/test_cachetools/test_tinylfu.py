@@ -0,0 +1,47 @@
+import unittest
+
+from xTool.cache.cachetools import WTinyLFUCache
+from xTool.cache.cachetools.tinylfu import CountMinSketch
+from xTool.cache.cachetools.utils import cached
+
+from .mixin import CacheTestMixin
+
+
+class WTinyLFUCacheTest(unittest.TestCase, CacheTestMixin):
+    Cache = WTinyLFUCache
+
+    def test_sketch(self):
+        sketch = CountMinSketch(64, sample_size=100)
+        for _ in range(20):
+            sketch.increment("hot")
+        sketch.increment("cold")
+        self.assertEqual(15, sketch.frequency("hot"))
+        self.assertEqual(1, sketch.frequency("cold"))
+        for i in range(80):
+            sketch.increment(i)
+        # 计数达到 sample_size 后减半
+        self.assertEqual(7, sketch.frequency("hot"))
+
+    def test_scan_resistant(self):
+        cache = WTinyLFUCache(maxsize=100)
+        for _ in range(5):
+            for key in range(50):
+                cache[key] = key
+                self.assertEqual(key, cache[key])
+        # 一次性扫描的数据访问频率低，不会淘汰热点数据
+        for key in range(1000, 2000):
+            cache[key] = key
+        self.assertEqual(100, len(cache))
+        self.assertTrue(all(key in cache for key in range(50)))
+
+    def test_cached(self):
+        calls = []
+
+        @cached(WTinyLFUCache(maxsize=2))
+        def func(value):
+            calls.append(value)
+            return value
+
+        self.assertEqual(1, func(1))
+        self.assertEqual(1, func(1))
+        self.assertEqual([1], calls)
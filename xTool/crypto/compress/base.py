@@ -10,3 +10,5 @@ class CompressType(Enum):
     GZIP = 3
 
     SNAPPY = 4
+    ZSTD = 5
+    LZ4 = 6
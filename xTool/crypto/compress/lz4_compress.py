@@ -0,0 +1,22 @@
+from typing import Optional
+
+import lz4.frame
+
+from xTool.plugin import PluginType, register_plugin
+
+from .base import CompressType
+
+
+@register_plugin(PluginType.COMPRESS, CompressType.LZ4)
+class Lz4Compress:
+    @classmethod
+    def compress(cls, data: bytes, compression_level: int = 0) -> Optional[bytes]:
+        if data is None:
+            return data
+        return lz4.frame.compress(data, compression_level=compression_level)
+
+    @classmethod
+    def decompress(cls, data: bytes) -> Optional[bytes]:
+        if data is None:
+            return data
+        return lz4.frame.decompress(data)
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("lz4.frame")
+
+from xTool.crypto.compress.lz4_compress import Lz4Compress  # noqa: E402
+
+
+class TestLz4Compress:
+    def test_compress(self):
+        value = b"123456"
+        actual = Lz4Compress.compress(value)
+        assert actual.startswith(b"\x04\x22\x4d\x18")
+
+        actual = Lz4Compress.decompress(actual)
+        expect = value
+        assert actual == expect
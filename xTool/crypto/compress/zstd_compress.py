@@ -0,0 +1,22 @@
+from typing import Optional
+
+import zstandard
+
+from xTool.plugin import PluginType, register_plugin
+
+from .base import CompressType
+
+
+@register_plugin(PluginType.COMPRESS, CompressType.ZSTD)
+class ZstdCompress:
+    @classmethod
+    def compress(cls, data: bytes, compression_level: int = 3) -> Optional[bytes]:
+        if data is None:
+            return data
+        return zstandard.ZstdCompressor(level=compression_level).compress(data)
+
+    @classmethod
+    def decompress(cls, data: bytes) -> Optional[bytes]:
+        if data is None:
+            return data
+        return zstandard.ZstdDecompressor().decompress(data)
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("zstandard")
+
+from xTool.crypto.compress.zstd_compress import ZstdCompress  # noqa: E402
+
+
+class TestZstdCompress:
+    def test_compress(self):
+        value = b"123456"
+        actual = ZstdCompress.compress(value)
+        assert actual.startswith(b"\x28\xb5\x2f\xfd")
+
+        actual = ZstdCompress.decompress(actual)
+        expect = value
+        assert actual == expect
@@ -1,8 +1,12 @@
-from typing import Dict
+import json
+from functools import lru_cache
+from typing import Callable, Dict, List
 
 from xTool.eval.constants import OP
 from xTool.eval.operators import BINARY_OPERATORS, AndOperator, Operator, OrOperator
 
+EXPRESSION_CACHE_SIZE = 1024
+
 
 def make_expression(data: Dict) -> Operator:
     """创建一个表达式对象 ."""
@@ -22,3 +26,32 @@ def make_expression(data: Dict) -> Operator:
     value = data["value"]
 
     return operator(field, value)
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def _make_cached_expression(key: str) -> Operator:
+    expression = make_expression(json.loads(key))
+    expression.compile()
+    return expression
+
+
+def make_cached_expression(data: Dict) -> Operator:
+    """创建一个已编译的表达式对象，相同内容的表达式只会创建和编译一次 ."""
+    try:
+        key = json.dumps(data, sort_keys=True)
+    except TypeError:
+        # 无法序列化的表达式不缓存
+        expression = make_expression(data)
+        expression.compile()
+        return expression
+    return _make_cached_expression(key)
+
+
+def compile_expression(data: Dict) -> Callable:
+    """将表达式编译为 fn(obj_set) -> bool ."""
+    return make_cached_expression(data).compile()
+
+
+def eval_many(data: Dict, obj_sets: List) -> List:
+    """使用同一个表达式批量计算多个 obj_set ."""
+    return make_cached_expression(data).eval_many(obj_sets)
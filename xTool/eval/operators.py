@@ -6,6 +6,7 @@ from xTool.eval.constants import OP
 class Operator(metaclass=ABCMeta):
     def __init__(self, op):
         self.op = op
+        self._compiled = None
 
     @abstractmethod
     def expr(self):
@@ -14,6 +15,23 @@ class Operator(metaclass=ABCMeta):
     def __repr__(self):
         return "operator:{}".format(self.op)
 
+    def compile(self):
+        """
+        编译为一个闭包 fn(obj_set) -> bool，结果与 eval 一致，编译结果会被缓存
+        """
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    def _compile(self):
+        return self.eval
+
+    def eval_many(self, obj_sets):
+        """
+        批量计算，返回每个 obj_set 的计算结果
+        """
+        return list(map(self.compile(), obj_sets))
+
 
 class LogicalOperator(Operator, metaclass=ABCMeta):
     def __init__(self, op, content):
@@ -34,11 +52,44 @@ class LogicalOperator(Operator, metaclass=ABCMeta):
     def eval(self, obj_set):
         pass
 
+    def _eval_many_masked(self, obj_sets, short_circuit_value):
+        """
+        按列计算：依次计算每个子表达式，已经得出结果的行不再参与后续子表达式的计算
+        """
+        results = [not short_circuit_value] * len(obj_sets)
+        pending = list(range(len(obj_sets)))
+        for c in self.content:
+            if not pending:
+                break
+            values = c.eval_many([obj_sets[i] for i in pending])
+            next_pending = []
+            for i, value in zip(pending, values):
+                if bool(value) == short_circuit_value:
+                    results[i] = short_circuit_value
+                else:
+                    next_pending.append(i)
+            pending = next_pending
+        return results
+
 
 class AndOperator(LogicalOperator):
     def __init__(self, content):
         super().__init__(OP.AND, content)
 
+    def _compile(self):
+        functions = [c.compile() for c in self.content]
+
+        def evaluate(obj_set):
+            for function in functions:
+                if not function(obj_set):
+                    return False
+            return True
+
+        return evaluate
+
+    def eval_many(self, obj_sets):
+        return self._eval_many_masked(obj_sets, False)
+
     def eval(self, obj_set):
         # return all([c.eval(obj_set) for c in self.content])
         # Short-circuit evaluation
@@ -52,6 +103,20 @@ class OrOperator(LogicalOperator):
     def __init__(self, content):
         super().__init__(OP.OR, content)
 
+    def _compile(self):
+        functions = [c.compile() for c in self.content]
+
+        def evaluate(obj_set):
+            for function in functions:
+                if function(obj_set):
+                    return True
+            return False
+
+        return evaluate
+
+    def eval_many(self, obj_sets):
+        return self._eval_many_masked(obj_sets, True)
+
     def eval(self, obj_set):
         # return any([c.eval(obj_set) for c in self.content])
         # Short-circuit evaluation
@@ -243,6 +308,88 @@ class BinaryOperator(Operator, metaclass=ABCMeta):
         else:
             return self._eval_positive(attr, attr_is_array, value, value_is_array)
 
+    def _compile_calculate(self):
+        """
+        IN/NOT_IN 的值为可哈希元素的列表时，转换为集合判断
+        """
+        value = self.value
+        if self.op not in (OP.IN, OP.NOT_IN) or not isinstance(value, (list, tuple)):
+            return self.calculate
+        try:
+            value_set = frozenset(value)
+        except TypeError:
+            return self.calculate
+
+        calculate = self.calculate
+        negative = self.op == OP.NOT_IN
+
+        def calculate_in_set(left, right):
+            try:
+                return (left not in value_set) if negative else (left in value_set)
+            except TypeError:
+                return calculate(left, right)
+
+        return calculate_in_set
+
+    def _compile(self):  # NOQA
+        """
+        将与数据无关的判断（操作符类型、value 是否为数组）提前到编译阶段，
+        生成的闭包只需要判断 attr 是否为数组
+        """
+        field = self.field
+        value = self.value
+        calculate = self._compile_calculate()
+        value_is_array = isinstance(value, (list, tuple))
+        # positive 命中一个即返回 True，negative 需要全部满足才返回 True
+        negative = self.op.startswith("not_")
+        reduce = all if negative else any
+        array_types = (list, tuple)
+
+        if self.op == OP.ANY:
+
+            def evaluate(obj_set):
+                return calculate(obj_set.get(field), value)
+
+        elif self.op in (OP.IN, OP.NOT_IN):
+            # value 整体参与计算，只展开 attr
+
+            def evaluate(obj_set):
+                attr = obj_set.get(field)
+                if isinstance(attr, array_types):
+                    return reduce(calculate(a, value) for a in attr)
+                return calculate(attr, value)
+
+        elif self.op in (OP.CONTAINS, OP.NOT_CONTAINS):
+            # attr 整体参与计算，只展开 value
+            if value_is_array:
+
+                def evaluate(obj_set):
+                    attr = obj_set.get(field)
+                    return reduce(calculate(attr, v) for v in value)
+
+            else:
+
+                def evaluate(obj_set):
+                    return calculate(obj_set.get(field), value)
+
+        elif value_is_array:
+
+            def evaluate(obj_set):
+                attr = obj_set.get(field)
+                if isinstance(attr, array_types):
+                    return reduce(calculate(a, v) for a in attr for v in value)
+                return reduce(calculate(attr, v) for v in value)
+
+        else:
+
+            def evaluate(obj_set):
+                attr = obj_set.get(field)
+                if isinstance(attr, array_types):
+                    return reduce(calculate(a, value) for a in attr)
+                return calculate(attr, value)
+
+        return evaluate
+
 
 class EqualOperator(BinaryOperator):
     def __init__(self, field, value):
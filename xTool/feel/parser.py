@@ -1,13 +1,54 @@
-from typing import Dict
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List
 
 from lark import Lark
 
 from .transformer import FEELTransformer
 
+# 解析结果缓存的表达式数量
+AST_CACHE_SIZE = 1024
+
+_parser = None
+_parser_lock = threading.Lock()
+
+
+def get_parser() -> Lark:
+    """获得进程内共享的 FEEL 语法解析器 .
+
+    LALR 分析表只构建一次，并通过 lark 的 cache 序列化到临时目录，
+    语法文件变化时 lark 会根据内容的哈希值重新生成，新启动的进程可以直接加载
+    """
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = Lark.open("FEEL.lark", rel_to=__file__, parser="lalr", cache=True)
+    return _parser
+
+
+@lru_cache(maxsize=AST_CACHE_SIZE)
+def _parse_ast(expr: str):
+    tree = get_parser().parse(expr)
+    return FEELTransformer().transform(tree)
+
+
+def parse_ast(expr: str):
+    """解析表达式，相同的表达式文本只解析一次 .
+
+    返回的 ast 会被多次求值共享，求值时不能修改 ast
+    """
+    return _parse_ast(expr.strip())
+
 
 def parse_expression(expr: str, context: Dict):
-    tree = Lark.open("FEEL.lark", rel_to=__file__, parser="lalr").parse(expr.strip())
-    ast = FEELTransformer().transform(tree)
+    ast = parse_ast(expr)
     result = ast.evaluate(context or {})
 
     return result
+
+
+def evaluate_many(expr: str, contexts: Iterable[Dict]) -> List:
+    """使用同一个表达式批量计算多个上下文，表达式只解析一次 ."""
+    ast = parse_ast(expr)
+    return [ast.evaluate(context or {}) for context in contexts]
@@ -15,6 +15,16 @@ _ipv6 = "(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}"
 _ipv6_re = re.compile(_ipv6)
 _host_re = re.compile(r"((?:\[" + _ipv6 + r"\])|[a-zA-Z0-9.\-]{1,253})(?::(\d{1,5}))?")
 
+# 预先编码的状态行
+_status_lines: Dict[int, bytes] = {}
+# 值的种类较少的常用响应头部，缓存编码后的头部行
+# Content-Length 几乎每个响应都不同，缓存后会占满缓存，导致其它头部无法缓存
+CACHEABLE_HEADERS = frozenset(
+    ("Connection", "Keep-Alive", "Content-Type", "Transfer-Encoding", "Server", "Cache-Control")
+)
+HEADER_LINES_MAXSIZE = 4096
+_header_lines: Dict[Tuple[str, Any], bytes] = {}
+
 # RFC's quoted-pair escapes are mostly ignored by browsers. Chrome, Firefox and
 # curl all have different escaping, that we try to handle as well as possible,
 # even though no client espaces in a way that would allow perfect handling.
@@ -164,13 +174,49 @@ def parse_host(host: str) -> Tuple[Optional[str], Optional[int]]:
     return host.lower(), int(port) if port is not None else None
 
 
+def status_line(status: int) -> bytes:
+    """Return the encoded HTTP/1.1 status line, cached per status code."""
+    line = _status_lines.get(status)
+    if line is None:
+        line = b"HTTP/1.1 %d %b\r\n" % (status, STATUS_CODES.get(status, b"UNKNOWN"))
+        if 100 <= status < 600:
+            _status_lines[status] = line
+    return line
+
+
+def _format_header_lines(headers: HeaderIterable) -> List[bytes]:
+    lines = []
+    for name, val in headers:
+        if name not in CACHEABLE_HEADERS:
+            lines.append(f"{name}: {val}\r\n".encode())
+            continue
+        line = _header_lines.get((name, val))
+        if line is None:
+            line = f"{name}: {val}\r\n".encode()
+            if len(_header_lines) < HEADER_LINES_MAXSIZE:
+                _header_lines[(name, val)] = line
+        lines.append(line)
+    return lines
+
+
 def format_http1(headers: HeaderIterable) -> bytes:
     """Convert a headers iterable into HTTP/1 header format.
 
     - Outputs UTF-8 bytes where each header line ends with \\r\\n.
     - Values are converted into strings if necessary.
     """
-    return "".join(f"{name}: {val}\r\n" for name, val in headers).encode()
+    return b"".join(_format_header_lines(headers))
+
+
+def format_http1_head(status: int, headers: HeaderIterable) -> bytes:
+    """Format the status line and headers of an HTTP/1.1 response.
+
+    - The body is not included so that it can be written separately.
+    """
+    lines = _format_header_lines(headers)
+    lines.insert(0, status_line(status))
+    lines.append(b"\r\n")
+    return b"".join(lines)
 
 
 def format_http1_response(status: int, headers: HeaderIterable, body=b"") -> bytes:
@@ -178,10 +224,4 @@ def format_http1_response(status: int, headers: HeaderIterable, body=b"") -> byt
 
     - If `body` is included, content-length must be specified in headers.
     """
-    headerbytes = format_http1(headers)
-    return b"HTTP/1.1 %d %b\r\n%b\r\n%b" % (
-        status,
-        STATUS_CODES.get(status, b"UNKNOWN"),
-        headerbytes,
-        body,
-    )
+    return format_http1_head(status, headers) + body
@@ -1 +1,2 @@
+from .redis_lock import LockStats, RedisLock, lock_stats  # noqa
 from .service_lock import share_lock  # noqa
@@ -0,0 +1,231 @@
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("lock")
+
+__all__ = ["RedisLock", "LockStats", "lock_stats"]
+
+# 比较 token 后再删除，保证只释放自己持有的锁
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+# 比较 token 后再续期，锁已被其他调用方持有时返回 0
+EXTEND_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+else
+    return 0
+end
+"""
+
+
+class LockStats:
+    """
+    按锁的名称统计加锁次数、失败次数、丢失次数、等待耗时和持有耗时
+
+    名称默认为锁的 key，key 包含参数时应指定取值有限的名称；超过 maxsize 时淘汰最久未更新的统计
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._stats = OrderedDict()
+
+    def _get(self, name: str) -> Dict:
+        stats = self._stats.get(name)
+        if stats is not None:
+            self._stats.move_to_end(name)
+            return stats
+        if len(self._stats) >= self.maxsize:
+            self._stats.popitem(last=False)
+        stats = self._stats[name] = {
+            "acquired": 0,
+            "failed": 0,
+            "lost": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "hold_seconds_total": 0.0,
+            "hold_seconds_max": 0.0,
+        }
+        return stats
+
+    def record_acquire(self, name: str, acquired: bool, wait_seconds: float) -> None:
+        with self._lock:
+            stats = self._get(name)
+            stats["acquired" if acquired else "failed"] += 1
+            stats["wait_seconds_total"] += wait_seconds
+            stats["wait_seconds_max"] = max(stats["wait_seconds_max"], wait_seconds)
+
+    def record_release(self, name: str, hold_seconds: float, lost: bool) -> None:
+        with self._lock:
+            stats = self._get(name)
+            stats["hold_seconds_total"] += hold_seconds
+            stats["hold_seconds_max"] = max(stats["hold_seconds_max"], hold_seconds)
+            if lost:
+                stats["lost"] += 1
+
+    def get(self, name: str) -> Dict:
+        with self._lock:
+            return dict(self._stats[name]) if name in self._stats else {}
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+lock_stats = LockStats()
+
+
+class RedisLock:
+    """基于 redis 的分布式锁
+
+    - 使用随机 token 加锁，释放和续期时通过 lua 脚本比较 token，不会误删其他调用方的锁
+    - 阻塞加锁时使用带随机抖动的指数退避重试
+    - renew_interval 不为空时，由后台线程定期续期，适用于执行时间不确定的长任务
+    """
+
+    def __init__(
+        self,
+        client,
+        key: str,
+        ttl: int = 600,
+        renew_interval: Optional[float] = None,
+        min_backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        metrics_hook: Optional[Callable[[str, str, float], None]] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        :param client: redis 客户端，需要支持 set(nx, ex) 和 eval
+        :param ttl: 锁的过期时间，单位：s
+        :param renew_interval: 续期间隔，单位：s
+        :param metrics_hook: 指标回调 (key, 指标名 wait/hold, 耗时)
+        :param name: lock_stats 中统计使用的名称，为空时使用 key
+        """
+        self.client = client
+        self.key = key
+        self.name = name or key
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.metrics_hook = metrics_hook
+        self.token = None
+        self.acquired_at = None
+        self.lost = False
+        self._renew_stop = None
+        self._renew_thread = None
+
+    def acquire(self, blocking: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        加锁
+
+        :param blocking: 加锁失败时是否等待
+        :param timeout: 最长等待时间，单位：s，为空时一直等待
+        """
+        token = uuid.uuid4().hex
+        start = time.monotonic()
+        backoff = self.min_backoff
+        while True:
+            acquired = bool(self.client.set(self.key, token, ex=self.ttl, nx=True))
+            elapsed = time.monotonic() - start
+            if acquired or not blocking or (timeout is not None and elapsed >= timeout):
+                break
+            sleep_seconds = backoff * (0.5 + random.random())
+            if timeout is not None:
+                sleep_seconds = min(sleep_seconds, timeout - elapsed)
+            time.sleep(sleep_seconds)
+            backoff = min(backoff * 2, self.max_backoff)
+
+        lock_stats.record_acquire(self.name, acquired, elapsed)
+        self._observe("wait", elapsed)
+        if not acquired:
+            return False
+
+        self.token = token
+        self.acquired_at = time.monotonic()
+        self.lost = False
+        if self.renew_interval:
+            self._start_renew()
+        return True
+
+    def extend(self) -> bool:
+        """
+        续期，锁已丢失时返回 False
+        """
+        if self.token is None:
+            return False
+        return bool(self.client.eval(EXTEND_LOCK_SCRIPT, 1, self.key, self.token, int(self.ttl * 1000)))
+
+    def release(self) -> bool:
+        """
+        释放锁，锁已过期或被其他调用方持有时返回 False
+        """
+        if self.token is None:
+            return False
+        self._stop_renew()
+        try:
+            released = bool(self.client.eval(RELEASE_LOCK_SCRIPT, 1, self.key, self.token))
+        finally:
+            hold_seconds = time.monotonic() - self.acquired_at
+            self.token = None
+        if not released:
+            self.lost = True
+            logger.warning("lock %s expired before release, hold %.3fs", self.key, hold_seconds)
+        lock_stats.record_release(self.name, hold_seconds, self.lost)
+        self._observe("hold", hold_seconds)
+        return released
+
+    def _observe(self, name: str, seconds: float) -> None:
+        if self.metrics_hook is None:
+            return
+        try:
+            self.metrics_hook(self.key, name, seconds)
+        except Exception as exc_info:  # noqa
+            logger.exception(exc_info)
+
+    def _start_renew(self) -> None:
+        stop = self._renew_stop = threading.Event()
+
+        def renew():
+            while not stop.wait(self.renew_interval):
+                try:
+                    if not self.extend():
+                        self.lost = True
+                        logger.warning("lock %s lost, stop renewing", self.key)
+                        return
+                except Exception as exc_info:  # noqa
+                    # 网络异常时继续重试，直到锁过期
+                    logger.exception(exc_info)
+
+        self._renew_thread = threading.Thread(target=renew, name=f"lock-renew:{self.key}", daemon=True)
+        self._renew_thread.start()
+
+    def _stop_renew(self) -> None:
+        if self._renew_stop is None:
+            return
+        self._renew_stop.set()
+        if self._renew_thread is not threading.current_thread():
+            self._renew_thread.join()
+        self._renew_stop = None
+        self._renew_thread = None
+
+    def __enter__(self):
+        self.acquire(blocking=True)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from xTool.lock import LockStats, RedisLock, lock_stats, share_lock
+from xTool.lock.service_lock import ShareLockError
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeStrictRedis(decode_responses=True)
+
+
+def test_release_only_own_lock(client):
+    lock = RedisLock(client, "test_release", ttl=1)
+    assert lock.acquire()
+    assert not RedisLock(client, "test_release").acquire()
+    # 锁过期后被其他调用方持有，释放时不能删除其他调用方的锁
+    client.delete("test_release")
+    other = RedisLock(client, "test_release")
+    assert other.acquire()
+    assert not lock.release()
+    assert lock.lost
+    assert client.get("test_release") == other.token
+    assert other.release()
+
+
+def test_blocking_acquire(client):
+    lock = RedisLock(client, "test_blocking")
+    assert lock.acquire()
+    threading.Timer(0.1, lock.release).start()
+    other = RedisLock(client, "test_blocking")
+    assert not other.acquire(blocking=True, timeout=0.01)
+    assert other.acquire(blocking=True, timeout=2)
+    other.release()
+    stats = lock_stats.get("test_blocking")
+    assert stats["acquired"] == 2
+    assert stats["failed"] == 1
+
+
+def test_renew(client):
+    with RedisLock(client, "test_renew", ttl=1, renew_interval=0.1) as lock:
+        time.sleep(0.3)
+        assert 800 < client.pttl("test_renew") <= 1000
+    assert not lock.lost
+    assert client.get("test_renew") is None
+
+
+def test_share_lock(client):
+    observed = []
+
+    @share_lock(client, identify="test_share_lock", metrics_hook=lambda *args: observed.append(args[:2]))
+    def run_task():
+        return isinstance(run_task(), ShareLockError)
+
+    assert run_task()
+    assert client.get("test_share_lock") is None
+    assert observed == [("test_share_lock", "wait"), ("test_share_lock", "wait"), ("test_share_lock", "hold")]
+
+
+def test_share_lock_stats_by_function(client):
+    @share_lock(client, hash_param=True, key_prefix="test_stats")
+    def run_task(value):
+        return value
+
+    lock_stats.clear()
+    for i in range(10):
+        assert run_task(i) == i
+    # 每组参数的 key 不同，按函数汇总统计
+    name = f"test_stats:{run_task.__module__}:run_task"
+    assert len(lock_stats) == 1
+    assert lock_stats.get(name)["acquired"] == 10
+
+
+def test_lock_stats_maxsize():
+    stats = LockStats(maxsize=2)
+    stats.record_acquire("a", True, 0.1)
+    stats.record_acquire("b", True, 0.1)
+    stats.record_release("a", 0.2, False)
+    stats.record_acquire("c", False, 0.1)
+    # 淘汰最久未更新的统计
+    assert len(stats) == 2
+    assert stats.get("b") == {}
+    assert stats.get("a")["hold_seconds_total"] == 0.2
+    assert stats.get("c")["failed"] == 1
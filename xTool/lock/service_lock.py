@@ -1,10 +1,11 @@
 import functools
-import time
-from typing import Optional
+from typing import Callable, Optional
 
 from xTool.cache.cachetools import hash_key, typed_key
 from xTool.codec import md5
 
+from .redis_lock import RedisLock
+
 
 class ShareLockError(Exception):
 
@@ -18,8 +19,22 @@ def share_lock(
     hash_param: bool = False,
     typed: bool = False,
     key_prefix="share_lock",
+    blocking: bool = False,
+    timeout: Optional[float] = None,
+    renew: bool = False,
+    metrics_hook: Optional[Callable[[str, str, float], None]] = None,
 ):
+    """
+    :param blocking: 加锁失败时是否等待锁释放
+    :param timeout: 最长等待时间，单位：s
+    :param renew: 任务执行期间是否在后台自动续期，续期间隔为 ttl 的 1/3
+    :param metrics_hook: 记录等待和持有耗时的回调 (key, 指标名 wait/hold, 耗时)
+    """
+
     def wrapper(func):
+        # 统计使用的名称，hash_param 时每组参数的 key 不同，按函数统计
+        name = str(identify or f"{key_prefix}:{func.__module__}:{func.__name__}")
+
         @functools.wraps(func)
         def _inner(*args, **kwargs):
             if identify:
@@ -32,19 +47,23 @@ def share_lock(
                 cache_key = f"{key_prefix}:{func.__module__}:{func.__name__}"
             cache_key = str(cache_key)
             func._cache_key = cache_key
-            token = str(time.time())
-            lock_success = cache.set(cache_key, token, ex=ttl, nx=True)
+            lock = RedisLock(
+                cache,
+                cache_key,
+                ttl=ttl,
+                renew_interval=ttl / 3 if renew else None,
+                metrics_hook=metrics_hook,
+                name=name,
+            )
             # 在ttl时间范围内加锁失败，则终止任务执行，保证任务的唯一性
-            if not lock_success:
+            if not lock.acquire(blocking=blocking, timeout=timeout):
                 return ShareLockError()
 
             try:
                 return func(*args, **kwargs)
             finally:
-                # 任务执行完毕后解锁
-                if cache.get(cache_key) == token:
-                    # 解锁失败会导致同时间的另一个任务在ttl内卡死
-                    cache.delete(cache_key)
+                # 任务执行完毕后解锁，只会删除自己持有的锁
+                lock.release()
 
         return _inner
 
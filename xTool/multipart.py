@@ -0,0 +1,256 @@
+"""
+multipart/form-data 增量解析
+
+请求体按块传入 MultipartParser.feed，不需要等待请求体接收完成，也不需要将整个请求体放在内存中，
+文件内容写入 SpooledTemporaryFile，超过 spool_max_size 后写入磁盘
+"""
+
+import email.utils
+from collections import deque, namedtuple
+from tempfile import SpooledTemporaryFile
+from urllib.parse import unquote
+
+from xTool.exceptions import InvalidUsage
+from xTool.headers import parse_content_header
+from xTool.log import logger
+
+# 文件内容在内存中的最大字节数，超过后写入临时文件
+DEFAULT_SPOOL_MAX_SIZE = 1024 * 1024
+# 每个 part 的头部最大字节数
+DEFAULT_MAX_HEADER_SIZE = 16 * 1024
+
+File = namedtuple("File", ["type", "body", "name"])
+
+
+class SpooledFile(File):
+    """内容存放在 SpooledTemporaryFile 中的上传文件，读取 body 时才读入内存"""
+
+    __slots__ = ()
+
+    @property
+    def file(self):
+        return tuple.__getitem__(self, 1)
+
+    @property
+    def body(self):
+        self.file.seek(0)
+        return self.file.read()
+
+
+class MultipartPart:
+    """multipart 中的一个字段或文件"""
+
+    __slots__ = ("headers", "name", "filename", "content_type", "charset", "size", "_buffer", "_file")
+
+    def __init__(self, headers, spool_max_size=DEFAULT_SPOOL_MAX_SIZE):
+        self.headers = headers
+        self.name = None
+        self.filename = None
+        self.content_type = "text/plain"
+        self.charset = "utf-8"
+        self.size = 0
+        for header_name, header_value in headers:
+            value, parameters = parse_content_header(header_value)
+            if header_name == "content-disposition":
+                self.name = parameters.get("name")
+                self.filename = parameters.get("filename")
+                # non-ASCII filenames in RFC2231, "filename*" format
+                if self.filename is None and parameters.get("filename*"):
+                    encoding, _, filename = email.utils.decode_rfc2231(parameters["filename*"])
+                    self.filename = unquote(filename, encoding=encoding)
+            elif header_name == "content-type":
+                self.content_type = value
+                self.charset = parameters.get("charset", "utf-8")
+        self._buffer = bytearray() if self.filename is None else None
+        self._file = None if self.filename is None else SpooledTemporaryFile(max_size=spool_max_size)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: name={self.name!r} filename={self.filename!r} size={self.size}>"
+
+    @property
+    def is_file(self):
+        return self.filename is not None
+
+    @property
+    def file(self):
+        """文件内容，字段返回 None"""
+        if self._file is not None:
+            self._file.seek(0)
+        return self._file
+
+    @property
+    def value(self):
+        """字段的值，文件返回 None"""
+        if self._buffer is None:
+            return None
+        return self._buffer.decode(self.charset)
+
+    def write(self, data):
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._buffer += data
+        self.size += len(data)
+
+    def read(self):
+        if self._file is not None:
+            return self.file.read()
+        return bytes(self._buffer)
+
+    def to_file(self):
+        return SpooledFile(type=self.content_type, body=self.file, name=self.filename)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class MultipartParser:
+    """multipart/form-data 增量解析器
+
+    - feed 可以传入任意大小的块，解析完成的 part 放入 parts 队列
+    - collect 为 True 时同时按字段名保存到 fields 和 files 中，与 parse_multipart_form 的结果一致
+    """
+
+    PREAMBLE, DELIMITER, HEADERS, BODY, DONE = range(5)
+
+    def __init__(
+        self,
+        boundary,
+        spool_max_size=DEFAULT_SPOOL_MAX_SIZE,
+        max_header_size=DEFAULT_MAX_HEADER_SIZE,
+        collect=True,
+    ):
+        """
+        :param boundary: bytes multipart boundary
+        :param spool_max_size: 文件内容在内存中的最大字节数
+        :param max_header_size: 每个 part 的头部最大字节数
+        :param collect: 是否按字段名保存解析完成的 part
+        """
+        self.delimiter = b"--" + boundary
+        self.body_delimiter = b"\r\n--" + boundary
+        self.spool_max_size = spool_max_size
+        self.max_header_size = max_header_size
+        self.collect = collect
+        self.parts = deque()
+        self.fields = {}
+        self.files = {}
+        self._state = self.PREAMBLE
+        self._buffer = bytearray()
+        self._part = None
+
+    @property
+    def done(self):
+        return self._state == self.DONE
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        while True:
+            if self._state == self.PREAMBLE:
+                index = buffer.find(self.delimiter)
+                if index == -1:
+                    # 保留可能是分隔符前缀的尾部
+                    del buffer[: max(len(buffer) - len(self.delimiter) + 1, 0)]
+                    return
+                del buffer[: index + len(self.delimiter)]
+                self._state = self.DELIMITER
+            elif self._state == self.DELIMITER:
+                if len(buffer) < 2:
+                    return
+                if buffer[:2] == b"--":
+                    # 结束分隔符之后的内容忽略
+                    buffer.clear()
+                    self._state = self.DONE
+                    return
+                # 分隔符后面可能有空白字符
+                index = buffer.find(b"\r\n")
+                if index == -1:
+                    if len(buffer) > self.max_header_size:
+                        raise InvalidUsage("Invalid multipart boundary")
+                    return
+                del buffer[: index + 2]
+                self._state = self.HEADERS
+            elif self._state == self.HEADERS:
+                if buffer[:2] == b"\r\n":
+                    # 没有头部的 part
+                    raw_headers = b""
+                    del buffer[:2]
+                else:
+                    index = buffer.find(b"\r\n\r\n")
+                    if index == -1:
+                        if len(buffer) > self.max_header_size:
+                            raise InvalidUsage("Multipart header too large")
+                        return
+                    raw_headers = bytes(buffer[:index])
+                    del buffer[: index + 4]
+                self._part = MultipartPart(self.parse_headers(raw_headers), self.spool_max_size)
+                self._state = self.BODY
+            elif self._state == self.BODY:
+                index = buffer.find(self.body_delimiter)
+                if index == -1:
+                    # 保留可能是分隔符前缀的尾部，其余内容写入 part
+                    size = len(buffer) - len(self.body_delimiter) + 1
+                    if size > 0:
+                        self._part.write(buffer[:size])
+                        del buffer[:size]
+                    return
+                self._part.write(buffer[:index])
+                del buffer[: index + len(self.body_delimiter)]
+                self.finish_part(self._part)
+                self._part = None
+                self._state = self.DELIMITER
+            else:
+                buffer.clear()
+                return
+
+    @staticmethod
+    def parse_headers(raw_headers):
+        headers = []
+        for line in raw_headers.split(b"\r\n"):
+            if not line:
+                continue
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError:
+                line = line.decode("latin_1")
+            name, _, value = line.partition(":")
+            headers.append((name.strip().lower(), value.strip()))
+        return headers
+
+    def finish_part(self, part):
+        if not part.name:
+            logger.debug("Form-data field does not have a 'name' parameter " "in the Content-Disposition header")
+            part.close()
+            return
+        self.parts.append(part)
+        if not self.collect:
+            return
+        if part.is_file:
+            self.files.setdefault(part.name, []).append(part.to_file())
+        else:
+            self.fields.setdefault(part.name, []).append(part.value)
+
+    def close(self):
+        """请求体接收完成，没有结束分隔符时抛出异常"""
+        if self._state != self.DONE:
+            if self._part is not None:
+                self._part.close()
+                self._part = None
+            raise InvalidUsage("Incomplete multipart body")
+
+
+async def iter_multipart(stream, boundary, spool_max_size=DEFAULT_SPOOL_MAX_SIZE):
+    """从异步迭代的请求体中逐个返回解析完成的 part
+
+    :param stream: 异步迭代的请求体，例如 Request.stream
+    :param boundary: bytes multipart boundary
+    """
+    parser = MultipartParser(boundary, spool_max_size, collect=False)
+    async for chunk in stream:
+        parser.feed(chunk)
+        while parser.parts:
+            yield parser.parts.popleft()
+    parser.close()
+    while parser.parts:
+        yield parser.parts.popleft()
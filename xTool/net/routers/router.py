@@ -1,11 +1,14 @@
+import itertools
 import re
 import uuid
 from collections import defaultdict, namedtuple
 from collections.abc import Iterable
 from functools import lru_cache
+from operator import itemgetter
 from urllib.parse import unquote
 
 from xTool.exceptions import MethodNotSupported, NotFound
+from xTool.net.routers.tree import RouteTree
 from xTool.views import CompositionView
 
 Route = namedtuple("Route", ["handler", "methods", "pattern", "parameters", "name", "uri"])
@@ -82,6 +85,14 @@ class Router:
         self.routes_dynamic = defaultdict(list)
         self.routes_always_check = []
         self.hosts = set()
+        # 动态路由优先使用前缀树匹配，不支持前缀树的路由使用正则匹配
+        self.route_tree_dynamic = RouteTree()
+        self.route_tree_always_check = RouteTree()
+        self.routes_regex_dynamic = defaultdict(list)
+        self.routes_regex_always_check = []
+        # 动态路由的注册顺序，用于保持与逐个正则匹配时相同的优先级
+        self.routes_order = {}
+        self._route_counter = itertools.count()
 
     @classmethod
     def parse_parameter_string(cls, parameter_string):
@@ -246,6 +257,7 @@ class Router:
             route = route._replace(handler=view, methods=methods.union(route.methods))
             return route
 
+        ndx = -1
         if parameters:
             # TODO: This is too complex, we need to reduce the complexity
             if properties["unhashable"]:
@@ -254,9 +266,6 @@ class Router:
             else:
                 routes_to_check = self.routes_dynamic[url_hash(uri)]
                 ndx, route = self.check_dynamic_route_exists(pattern, routes_to_check, parameters)
-            if ndx != -1:
-                # Pop the ndx of the route, no dups of the same route
-                routes_to_check.pop(ndx)
         else:
             route = self.routes_all.get(uri)
 
@@ -277,6 +286,10 @@ class Router:
 
         if route:
             route = merge_route(route, methods, handler)
+            if ndx != -1:
+                # Pop the ndx of the route only after merging succeeded,
+                # no dups of the same route
+                routes_to_check.pop(ndx)
         else:
             route = Route(
                 handler=handler,
@@ -300,12 +313,24 @@ class Router:
 
         if properties["unhashable"]:
             self.routes_always_check.append(route)
+            self._index_dynamic_route(route, self.route_tree_always_check, self.routes_regex_always_check)
         elif parameters:
             self.routes_dynamic[url_hash(uri)].append(route)
+            self._index_dynamic_route(route, self.route_tree_dynamic, self.routes_regex_dynamic[url_hash(uri)])
         else:
             self.routes_static[uri] = route
         return route
 
+    def _index_dynamic_route(self, route, route_tree, routes_regex):
+        """将动态路由加入前缀树，不支持前缀树的路由加入正则匹配列表
+
+        合并后的路由会替换旧的路由，并排在最后
+        """
+        self.routes_order[route.uri] = next(self._route_counter)
+        routes_regex[:] = [item for item in routes_regex if item.uri != route.uri]
+        if not route_tree.add(route.uri, route, self.routes_order[route.uri]):
+            routes_regex.append(route)
+
     @staticmethod
     def check_dynamic_route_exists(pattern, routes_to_check, parameters):
         """
@@ -381,45 +406,59 @@ class Router:
         url = unquote(host + url)
         # Check against known static routes
         route = self.routes_static.get(url)
-        method_not_supported = MethodNotSupported(
-            f"Method {method} not allowed for URL {url}",
-            method=method,
-            allowed_methods=self.get_supported_methods(url),
-        )
-
         if route:
             if route.methods and method not in route.methods:
-                raise method_not_supported
-            match = route.pattern.match(url)
+                raise self._method_not_supported(url, method)
+            kwargs = {}
         else:
-            route_found = False
-            # Move on to testing all regex routes
-            for route in self.routes_dynamic[url_hash(url)]:
-                match = route.pattern.match(url)
-                route_found |= match is not None
-                # Do early method checking
-                if match and method in route.methods:
-                    break
-            else:
-                # Lastly, check against all regex routes that cannot be hashed
-                for route in self.routes_always_check:
-                    match = route.pattern.match(url)
-                    route_found |= match is not None
-                    # Do early method checking
-                    if match and method in route.methods:
-                        break
-                else:
-                    # Route was found but the methods didn't match
-                    if route_found:
-                        raise method_not_supported
-                    raise NotFound(f"Requested URL {url} not found")
-
-        kwargs = {p.name: p.cast(value) for value, p in zip(match.groups(1), route.parameters)}
+            route, kwargs = self._get_dynamic(url, method)
+
         route_handler = route.handler
         if hasattr(route_handler, "handlers"):
             route_handler = route_handler.handlers[method]
         return route_handler, [], kwargs, route.uri, route.name
 
+    def _method_not_supported(self, url, method):
+        return MethodNotSupported(
+            f"Method {method} not allowed for URL {url}",
+            method,
+            self.get_supported_methods(url),
+        )
+
+    def _get_dynamic(self, url, method):
+        """匹配动态路由
+
+        先匹配可以计算 url_hash 的路由，再匹配所有需要检查的路由，
+        同一组内按注册顺序选择第一个支持请求方法的路由
+
+        :return: route, keyword arguments
+        """
+        route_found = False
+        segments = url.split("/")
+        for route_tree, routes_regex in (
+            (self.route_tree_dynamic, self.routes_regex_dynamic.get(url_hash(url), ())),
+            (self.route_tree_always_check, self.routes_regex_always_check),
+        ):
+            candidates = route_tree.match(segments)
+            for route in routes_regex:
+                match = route.pattern.match(url)
+                if match:
+                    candidates.append((self.routes_order[route.uri], route, match.groups(1)))
+            if not candidates:
+                continue
+
+            route_found = True
+            candidates.sort(key=itemgetter(0))
+            for _, route, values in candidates:
+                # Do early method checking
+                if not route.methods or method in route.methods:
+                    return route, {p.name: p.cast(value) for value, p in zip(values, route.parameters)}
+
+        # Route was found but the methods didn't match
+        if route_found:
+            raise self._method_not_supported(url, method)
+        raise NotFound(f"Requested URL {url} not found")
+
     def is_stream_handler(self, request):
         """Handler for request is stream or not.
         :param request: Request object
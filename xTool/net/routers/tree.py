@@ -0,0 +1,152 @@
+import re
+from collections import namedtuple
+
+RouteParameterType = namedtuple("RouteParameterType", ["check", "is_path"])
+
+
+def _fullmatch(pattern):
+    return re.compile(pattern).fullmatch
+
+
+# 前缀树支持的参数类型，与 REGEX_TYPES 的正则保持一致
+TREE_PARAMETER_TYPES = {
+    "string": RouteParameterType(check=bool, is_path=False),
+    "int": RouteParameterType(check=_fullmatch(r"-?\d+"), is_path=False),
+    "number": RouteParameterType(check=_fullmatch(r"-?(?:\d+(?:\.\d*)?|\.\d+)"), is_path=False),
+    "alpha": RouteParameterType(check=_fullmatch(r"[A-Za-z]+"), is_path=False),
+    "uuid": RouteParameterType(
+        check=_fullmatch(r"[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}"),
+        is_path=False,
+    ),
+    "path": RouteParameterType(check=bool, is_path=True),
+}
+
+_segment_parameter_pattern = re.compile(r"<([^<>/]+)>")
+
+
+class RouteNode:
+    __slots__ = ("static", "params", "routes")
+
+    def __init__(self):
+        # 静态分段 -> 子节点
+        self.static = {}
+        # [(参数类型名, 参数类型, 子节点)]
+        self.params = []
+        # uri -> (注册顺序, 路由)
+        self.routes = {}
+
+    def get_param_child(self, type_name):
+        for name, _, child in self.params:
+            if name == type_name:
+                return child
+        child = RouteNode()
+        self.params.append((type_name, TREE_PARAMETER_TYPES[type_name], child))
+        return child
+
+
+class RouteTree:
+    """按 "/" 分段组织的路由前缀树
+
+    每个分段要么是静态字符串，要么是一个完整的类型参数（如 ``<id:int>``），
+    匹配时逐段查找，不需要对每个路由执行正则。
+    分段内混合了静态字符串与参数，或者使用自定义正则的路由不能加入前缀树，
+    由调用方使用正则匹配。
+    """
+
+    def __init__(self):
+        self.root = RouteNode()
+
+    @staticmethod
+    def parse(uri):
+        """将 uri 解析为分段列表 [(是否参数, 静态字符串或参数类型名)]
+
+        :return: 不支持的 uri 返回 None
+        """
+        segments = []
+        for segment in uri.split("/"):
+            if "<" not in segment and ">" not in segment:
+                segments.append((False, segment))
+                continue
+            match = _segment_parameter_pattern.fullmatch(segment)
+            if not match:
+                return None
+            parameter_string = match.group(1)
+            type_name = "string"
+            if ":" in parameter_string:
+                type_name = parameter_string.split(":", 1)[1]
+            if type_name not in TREE_PARAMETER_TYPES:
+                return None
+            segments.append((True, type_name))
+        return segments
+
+    def _find_node(self, segments, create=False):
+        node = self.root
+        for is_param, value in segments:
+            if is_param:
+                if create:
+                    node = node.get_param_child(value)
+                    continue
+                node = next((child for name, _, child in node.params if name == value), None)
+            elif create:
+                node = node.static.setdefault(value, RouteNode())
+            else:
+                node = node.static.get(value)
+            if node is None:
+                return None
+        return node
+
+    def add(self, uri, route, order):
+        """添加路由，相同的 uri 会替换旧的路由
+
+        :return: uri 不支持前缀树时返回 False
+        """
+        segments = self.parse(uri)
+        if segments is None:
+            return False
+        self._find_node(segments, create=True).routes[uri] = (order, route)
+        return True
+
+    def remove(self, uri):
+        segments = self.parse(uri)
+        if segments is None:
+            return
+        node = self._find_node(segments)
+        if node is not None:
+            node.routes.pop(uri, None)
+
+    def match(self, segments):
+        """查找与 url 分段匹配的所有路由
+
+        :param segments: url.split("/")
+        :return: [(注册顺序, 路由, 参数值列表)]
+        """
+        results = []
+        self._match(self.root, segments, 0, [], results)
+        return results
+
+    def _match(self, node, segments, index, values, results):
+        if index == len(segments):
+            for order, route in node.routes.values():
+                results.append((order, route, list(values)))
+            return
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            self._match(child, segments, index + 1, values, results)
+
+        for _, parameter_type, child in node.params:
+            if not parameter_type.is_path:
+                if parameter_type.check(segment):
+                    values.append(segment)
+                    self._match(child, segments, index + 1, values, results)
+                    values.pop()
+                continue
+
+            # path 参数可以匹配多个分段，但不能以 "/" 开头
+            if not segment:
+                continue
+            for end in range(index + 1, len(segments) + 1):
+                values.append("/".join(segments[index:end]))
+                self._match(child, segments, end, values, results)
+                values.pop()
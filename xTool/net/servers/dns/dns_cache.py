@@ -62,6 +62,13 @@ class DNSCacheTable:
 
         return self._timestamps[key] + self._ttl < monotonic()
 
+    def age(self, key: Tuple[str, int]) -> float:
+        """地址添加后经过的时间，单位是s ."""
+        if self._ttl is None:
+            return 0.0
+
+        return monotonic() - self._timestamps[key]
+
 
 def clear_dns_cache(cached_hosts: DNSCacheTable, host: Optional[str] = None, port: Optional[int] = None) -> None:
     """Remove specified host/port or clear all dns local cache.
@@ -1,9 +1,8 @@
 import asyncio
-import email.utils
-from collections import defaultdict, namedtuple
+from collections import defaultdict
 from http.cookies import SimpleCookie
 from types import SimpleNamespace
-from urllib.parse import parse_qs, parse_qsl, unquote, urlunparse
+from urllib.parse import parse_qs, parse_qsl, urlunparse
 
 from httptools import parse_url  # type: ignore
 
@@ -14,7 +13,13 @@ from xTool.headers import (
     parse_host,
     parse_xforwarded,
 )
-from xTool.log import error_logger, logger
+from xTool.log import error_logger
+from xTool.multipart import (  # noqa: F401
+    DEFAULT_SPOOL_MAX_SIZE,
+    File,
+    MultipartParser,
+    iter_multipart,
+)
 
 try:
     from orjson import loads as json_loads  # type: ignore
@@ -91,6 +96,7 @@ class Request:
         "endpoint",
         "headers",
         "method",
+        "multipart",
         "parsed_args",
         "parsed_not_grouped_args",
         "parsed_files",
@@ -128,6 +134,7 @@ class Request:
         self._cookies = None
         self.stream = None
         self.endpoint = None
+        self.multipart = None
 
     def __repr__(self):
         class_name = self.__class__.__name__
@@ -139,11 +146,63 @@ class Request:
 
     def body_push(self, data):
         """.. deprecated:: 20.3"""
+        if self.multipart is not None:
+            self.multipart.feed(data)
+            return
         self.body.append(data)
 
     def body_finish(self):
         """.. deprecated:: 20.3"""
         self.body = b"".join(self.body)
+        if self.multipart is None:
+            return
+        self.parsed_form = RequestParameters()
+        self.parsed_files = RequestParameters()
+        try:
+            self.multipart.close()
+        except Exception:
+            error_logger.exception("Failed when parsing form")
+            return
+        self.parsed_form.update(self.multipart.fields)
+        self.parsed_files.update(self.multipart.files)
+
+    def enable_multipart_streaming(self, spool_max_size=DEFAULT_SPOOL_MAX_SIZE):
+        """接收请求体时增量解析 multipart/form-data，文件内容写入临时文件，不再保存 request.body
+
+        :return: 请求是否为 multipart/form-data
+        """
+        content_type = self.headers.get("Content-Type", DEFAULT_HTTP_CONTENT_TYPE)
+        content_type, parameters = parse_content_header(content_type)
+        if content_type != "multipart/form-data" or "boundary" not in parameters:
+            return False
+        self.multipart = MultipartParser(parameters["boundary"].encode("utf-8"), spool_max_size)
+        return True
+
+    async def iter_parts(self, spool_max_size=DEFAULT_SPOOL_MAX_SIZE):
+        """流式处理函数中逐个获取 multipart/form-data 的字段和文件
+
+        async for part in request.iter_parts():
+            if part.filename:
+                shutil.copyfileobj(part.file, dst)
+        """
+        content_type = self.headers.get("Content-Type", DEFAULT_HTTP_CONTENT_TYPE)
+        content_type, parameters = parse_content_header(content_type)
+        if content_type != "multipart/form-data":
+            raise InvalidUsage("Request is not multipart/form-data")
+        boundary = parameters["boundary"].encode("utf-8")
+        if self.multipart is not None:
+            # 接收请求体时已经增量解析，request.body 为空
+            for part in self.multipart.parts:
+                yield part
+            return
+        if self.stream is None:
+            parser = MultipartParser(boundary, spool_max_size, collect=False)
+            parser.feed(self.body)
+            for part in parser.parts:
+                yield part
+            return
+        async for part in iter_multipart(self.stream, boundary, spool_max_size):
+            yield part
 
     async def receive_body(self):
         """Receive request.body, if not already received.
@@ -205,7 +264,6 @@ class Request:
                 if content_type == "application/x-www-form-urlencoded":
                     self.parsed_form = RequestParameters(parse_qs(self.body.decode("utf-8")))
                 elif content_type == "multipart/form-data":
-                    # TODO: Stream this instead of reading to/from memory
                     boundary = parameters["boundary"].encode("utf-8")
                     self.parsed_form, self.parsed_files = parse_multipart_form(self.body, boundary)
             except Exception:
@@ -497,9 +555,6 @@ class Request:
         return self.app.url_for(view_name, _external=True, _scheme=scheme, _server=netloc, **kwargs)
 
 
-File = namedtuple("File", ["type", "body", "name"])
-
-
 def parse_multipart_form(body, boundary):
     """Parse a request body and returns fields and files
 
@@ -507,56 +562,6 @@ def parse_multipart_form(body, boundary):
     :param boundary: bytes multipart boundary
     :return: fields (RequestParameters), files (RequestParameters)
     """
-    files = RequestParameters()
-    fields = RequestParameters()
-
-    form_parts = body.split(boundary)
-    for form_part in form_parts[1:-1]:
-        file_name = None
-        content_type = "text/plain"
-        content_charset = "utf-8"
-        field_name = None
-        line_index = 2
-        line_end_index = 0
-        while not line_end_index == -1:
-            line_end_index = form_part.find(b"\r\n", line_index)
-            form_line = form_part[line_index:line_end_index].decode("utf-8")
-            line_index = line_end_index + 2
-
-            if not form_line:
-                break
-
-            colon_index = form_line.index(":")
-            form_header_field = form_line[0:colon_index].lower()
-            form_header_value, form_parameters = parse_content_header(form_line[colon_index + 2 :])
-
-            if form_header_field == "content-disposition":
-                field_name = form_parameters.get("name")
-                file_name = form_parameters.get("filename")
-
-                # non-ASCII filenames in RFC2231, "filename*" format
-                if file_name is None and form_parameters.get("filename*"):
-                    encoding, _, value = email.utils.decode_rfc2231(form_parameters["filename*"])
-                    file_name = unquote(value, encoding=encoding)
-            elif form_header_field == "content-type":
-                content_type = form_header_value
-                content_charset = form_parameters.get("charset", "utf-8")
-
-        if field_name:
-            post_data = form_part[line_index:-4]
-            if file_name is None:
-                value = post_data.decode(content_charset)
-                if field_name in fields:
-                    fields[field_name].append(value)
-                else:
-                    fields[field_name] = [value]
-            else:
-                form_file = File(type=content_type, name=file_name, body=post_data)
-                if field_name in files:
-                    files[field_name].append(form_file)
-                else:
-                    files[field_name] = [form_file]
-        else:
-            logger.debug("Form-data field does not have a 'name' parameter " "in the Content-Disposition header")
-
-    return fields, files
+    parser = MultipartParser(boundary)
+    parser.feed(body)
+    return RequestParameters(parser.fields), RequestParameters(parser.files)
@@ -1,14 +1,14 @@
 import warnings
 from functools import partial
 from mimetypes import guess_type
-from os import path
+from os import fstat, path
 from urllib.parse import quote_plus
 
-from xTool.algorithms.collections.header import Header
-from xTool.asynchronous.aiomisc import open_async
-from xTool.cookies.cookies import CookieJar
+from xTool.asynchronous.aiomisc import get_running_loop, open_async
+from xTool.collections.header import Header
 from xTool.header import remove_entity_headers
-from xTool.headers import format_http1, format_http1_response
+from xTool.headers import format_http1, format_http1_head
+from xTool.net.cookies.cookies import CookieJar
 from xTool.status import has_message_body
 
 try:
@@ -20,6 +20,9 @@ except ImportError:
     # kept consistent across both orjson and inbuilt json usage.
     json_dumps = partial(dumps, separators=(",", ":"))
 
+# 分块发送文件时的最大块大小
+MAX_CHUNK_SIZE = 1024 * 1024
+
 
 class BaseHTTPResponse:
     def __init__(self, *args, **kwargs):
@@ -47,7 +50,10 @@ class BaseHTTPResponse:
     ):
         """.. deprecated:: 20.3:
         This function is not public API and will be removed."""
+        return self.get_head(version, keep_alive, keep_alive_timeout) + body
 
+    def get_head(self, version="1.1", keep_alive=False, keep_alive_timeout=None):
+        """返回状态行和头部，不包含 body ."""
         # self.headers get priority over content_type
         if self.content_type and "Content-Type" not in self.headers:
             self.headers["Content-Type"] = self.content_type
@@ -62,7 +68,7 @@ class BaseHTTPResponse:
         if self.status in (304, 412):
             self.headers = remove_entity_headers(self.headers)
 
-        return format_http1_response(self.status, self.headers.items(), body)
+        return format_http1_head(self.status, self.headers.items())
 
 
 class StreamingHTTPResponse(BaseHTTPResponse):
@@ -132,6 +138,75 @@ class StreamingHTTPResponse(BaseHTTPResponse):
         return super().get_headers(version, keep_alive, keep_alive_timeout)
 
 
+class FileHTTPResponse(StreamingHTTPResponse):
+    """文件响应
+
+    协议支持 sendfile 时由 loop.sendfile 直接从文件描述符发送，数据不经过 Python，
+    否则使用逐渐增大的块读取文件发送
+    """
+
+    __slots__ = ("location", "offset", "count", "chunk_size")
+
+    def __init__(
+        self,
+        location,
+        offset=0,
+        count=None,
+        status=200,
+        headers=None,
+        content_type="application/octet-stream",
+        chunk_size=4096,
+    ):
+        super().__init__(None, status=status, headers=headers, content_type=content_type, chunked=False)
+        self.location = location
+        self.offset = offset
+        self.count = count
+        self.chunk_size = chunk_size
+
+    async def stream(self, version="1.1", keep_alive=False, keep_alive_timeout=None):
+        # 在线程池中打开文件，避免阻塞事件循环；文件大小由 fstat 从同一个描述符获取
+        loop = get_running_loop()
+        f = await loop.run_in_executor(None, partial(open, self.location, mode="rb"))
+        with f:
+            if self.count is None:
+                self.count = max(fstat(f.fileno()).st_size - self.offset, 0)
+            self.headers["Content-Length"] = self.count
+            headers = self.get_headers(
+                version,
+                keep_alive=keep_alive,
+                keep_alive_timeout=keep_alive_timeout,
+            )
+            await self.protocol.push_data(headers)
+            if not has_message_body(self.status) or not self.count:
+                return
+            sendfile = getattr(self.protocol, "sendfile", None)
+            if sendfile is not None:
+                await sendfile(f, self.offset, self.count)
+                return
+            await self.protocol.drain()
+            f.seek(self.offset)
+            await write_file_chunks(self, partial(loop.run_in_executor, None, f.read), self.count, self.chunk_size)
+
+
+async def write_file_chunks(response, read, size=None, chunk_size=4096):
+    """分块发送文件，块大小从 chunk_size 开始每次翻倍，直到 MAX_CHUNK_SIZE
+
+    小文件只需要少量的小块，大文件使用大块减少读取和写入的次数
+
+    :param read: 异步读取函数，如 aiofiles 文件对象的 read
+    :param size: 发送的字节数，为 None 时发送到文件末尾
+    """
+    to_send = size
+    while to_send is None or to_send > 0:
+        content = await read(chunk_size if to_send is None else min(to_send, chunk_size))
+        if not content:
+            break
+        if to_send is not None:
+            to_send -= len(content)
+        await response.write(content)
+        chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+
+
 class HTTPResponse(BaseHTTPResponse):
     __slots__ = ("body", "status", "content_type", "headers", "_cookies")
 
@@ -150,12 +225,17 @@ class HTTPResponse(BaseHTTPResponse):
         self._cookies = None
 
     def output(self, version="1.1", keep_alive=False, keep_alive_timeout=None):
+        return b"".join(self.output_buffers(version, keep_alive, keep_alive_timeout))
+
+    def output_buffers(self, version="1.1", keep_alive=False, keep_alive_timeout=None):
+        """返回头部和 body 两个缓冲区，由 transport.writelines 发送，不需要拼接 body ."""
         body = b""
         if has_message_body(self.status):
             body = self.body
             self.headers["Content-Length"] = self.headers.get("Content-Length", len(self.body))
 
-        return self.get_headers(version, keep_alive, keep_alive_timeout, body)
+        head = self.get_head(version, keep_alive, keep_alive_timeout)
+        return [head, body] if body else [head]
 
     @property
     def cookies(self):
@@ -343,19 +423,9 @@ async def file_stream(
         async with await open_async(location, mode="rb") as f:
             if _range:
                 await f.seek(_range.start)
-                to_send = _range.size
-                while to_send > 0:
-                    content = await f.read(min((_range.size, chunk_size)))
-                    if len(content) < 1:
-                        break
-                    to_send -= len(content)
-                    await response.write(content)
+                await write_file_chunks(response, f.read, _range.size, chunk_size)
             else:
-                while True:
-                    content = await f.read(chunk_size)
-                    if len(content) < 1:
-                        break
-                    await response.write(content)
+                await write_file_chunks(response, f.read, None, chunk_size)
 
     return StreamingHTTPResponse(
         streaming_fn=_streaming_fn,
@@ -366,6 +436,48 @@ async def file_stream(
     )
 
 
+def sendfile(
+    location,
+    status=200,
+    mime_type=None,
+    headers=None,
+    filename=None,
+    chunk_size=4096,
+    _range=None,
+):
+    """Return a response object which sends the file with ``loop.sendfile``.
+
+    不需要将文件读入内存，适用于大文件下载，需要由 HttpProtocol.stream_response 发送
+
+    :param location: Location of file on system.
+    :param mime_type: Specific mime_type.
+    :param headers: Custom Headers.
+    :param filename: Override filename.
+    :param chunk_size: The initial chunk size when sendfile is not supported
+    :param _range:
+    """
+    headers = headers or {}
+    if filename:
+        headers.setdefault("Content-Disposition", f'attachment; filename="{filename}"')
+    filename = filename or path.split(location)[-1]
+    mime_type = mime_type or guess_type(filename)[0] or "text/plain"
+    offset, count = 0, None
+    if _range:
+        offset, count = _range.start, _range.size
+        headers["Content-Range"] = f"bytes {_range.start}-{_range.end}/{_range.total}"
+        status = 206
+
+    return FileHTTPResponse(
+        location,
+        offset=offset,
+        count=count,
+        status=status,
+        headers=headers,
+        content_type=mime_type,
+        chunk_size=chunk_size,
+    )
+
+
 def stream(
     streaming_fn,
     status=200,
@@ -9,20 +9,41 @@ Python 2 and on systems lacking support for synchronization mechanisms:
 These helpers work like Python 3's map, with two differences:
 
 - They don't guarantee the order of processing of
-  the elements of the iterable.
+  the elements of the iterable unless ordered is True.
 - The underlying process/thread pools chop the iterable into
-  a number of chunks, so that for very long iterables using
-  a large value for chunksize can make the job complete much faster
-  than using the default value of 1.
+  a number of chunks. When chunksize is None it is tuned from the
+  measured cost per element, so that each chunk runs for about
+  TARGET_CHUNK_TIME seconds.
+
+The pools are created once per process and reused by later calls, see
+get_pool and shutdown_pools. Results are streamed: at most max_inflight
+elements are submitted before their results are consumed.
 """
 
-__all__ = ["map_multiprocess", "map_multithread"]
+__all__ = ["map_multiprocess", "map_multithread", "PersistentPool", "get_pool", "shutdown_pools"]
 
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
+from itertools import islice
 from multiprocessing import Pool as ProcessPool
 from multiprocessing import pool
 from multiprocessing.dummy import Pool as ThreadPool
-from typing import Callable, Iterable, Iterator, TypeVar, Union
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar, Union
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 Pool = Union[pool.Pool, pool.ThreadPool]
 S = TypeVar("S")
@@ -40,6 +61,12 @@ else:
 # Incredibly large timeout to work around bpo-8296 on Python 2.
 TIMEOUT = 2000000
 
+# 自动调整 chunksize 时每个块的目标耗时，单位是秒
+TARGET_CHUNK_TIME = 0.01
+MAX_CHUNKSIZE = 1024
+# 进程池中大于该字节数的 bytes/numpy 参数通过共享内存传递
+SHARED_MEMORY_THRESHOLD = 1024 * 1024
+
 
 @contextmanager
 def closing(pool: Pool) -> Iterator[Pool]:
@@ -54,7 +81,14 @@ def closing(pool: Pool) -> Iterator[Pool]:
         pool.terminate()
 
 
-def _map_fallback(func: Callable[[S], T], iterable: Iterable[S], chunksize: int = 1, pool_size=10) -> Iterator[T]:
+def _map_fallback(
+    func: Callable[[S], T],
+    iterable: Iterable[S],
+    chunksize: Optional[int] = None,
+    pool_size=10,
+    ordered: bool = False,
+    max_inflight: Optional[int] = None,
+) -> Iterator[T]:
     """Make an iterator applying func to each element in iterable.
 
     This function is the sequential fallback either on Python 2
@@ -64,28 +98,261 @@ def _map_fallback(func: Callable[[S], T], iterable: Iterable[S], chunksize: int
     return map(func, iterable)
 
 
-def _map_multiprocess(func: Callable[[S], T], iterable: Iterable[S], chunksize: int = 1, pool_size=10) -> Iterator[T]:
-    """Chop iterable into chunks and submit them to a process pool.
+class _ChunkSizeTuner:
+    """按测得的每个元素的平均耗时调整 chunksize，使每个块的耗时接近 TARGET_CHUNK_TIME"""
+
+    def __init__(self, chunksize: Optional[int] = None) -> None:
+        self.fixed = chunksize is not None
+        self.chunksize = chunksize or 1
+        self.cost = None
+
+    def update(self, elapsed: float, size: int) -> None:
+        if self.fixed:
+            return
+        cost = elapsed / size
+        # 指数加权平均，减少单个块的耗时波动的影响
+        self.cost = cost if self.cost is None else self.cost * 0.7 + cost * 0.3
+        chunksize = int(TARGET_CHUNK_TIME / self.cost) if self.cost > 0 else MAX_CHUNKSIZE
+        self.chunksize = max(1, min(chunksize, MAX_CHUNKSIZE))
+
+
+class _SharedArg:
+    """通过共享内存传递给子进程的参数"""
+
+    __slots__ = ("name", "size", "dtype", "shape")
+
+    def __init__(self, name: str, size: int, dtype=None, shape=None) -> None:
+        self.name = name
+        self.size = size
+        self.dtype = dtype
+        self.shape = shape
+
+    def load(self, opened: list):
+        shm = shared_memory.SharedMemory(name=self.name)
+        opened.append(shm)
+        if self.dtype is None:
+            return bytes(shm.buf[: self.size])
+        # numpy 数组直接使用共享内存，不复制
+        return numpy.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+
+def _share(item, shms: list):
+    """将大的 bytes/numpy 参数复制到共享内存中，创建共享内存失败时仍然通过 pickle 传递 ."""
+    if isinstance(item, (bytes, bytearray)):
+        if len(item) < SHARED_MEMORY_THRESHOLD:
+            return item
+        try:
+            shm = shared_memory.SharedMemory(create=True, size=len(item))
+        except OSError:
+            return item
+        shms.append(shm)
+        shm.buf[: len(item)] = item
+        return _SharedArg(shm.name, len(item))
+    if numpy is not None and isinstance(item, numpy.ndarray):
+        if item.nbytes < SHARED_MEMORY_THRESHOLD or item.dtype.hasobject:
+            return item
+        try:
+            shm = shared_memory.SharedMemory(create=True, size=item.nbytes)
+        except OSError:
+            return item
+        shms.append(shm)
+        numpy.ndarray(item.shape, dtype=item.dtype, buffer=shm.buf)[...] = item
+        return _SharedArg(shm.name, item.nbytes, item.dtype, item.shape)
+    return item
+
+
+def _run_chunk(func: Callable[[S], T], items: list) -> Tuple[list, float]:
+    """在池中执行一个块，返回结果和耗时 ."""
+    start = time.perf_counter()
+    opened = []
+    try:
+        results = [func(item.load(opened) if isinstance(item, _SharedArg) else item) for item in items]
+    finally:
+        for shm in opened:
+            try:
+                shm.close()
+            except BufferError:
+                # 结果中引用了共享内存，由垃圾回收关闭
+                pass
+    return results, time.perf_counter() - start
+
+
+class _Chunk:
+    __slots__ = ("size", "shms", "result")
 
-    For very long iterables using a large value for chunksize can make
-    the job complete much faster than using the default value of 1.
+    def __init__(self, size: int, shms: list) -> None:
+        self.size = size
+        self.shms = shms
+        self.result = None
 
-    Return an unordered iterator of the results.
+    def release(self) -> None:
+        for shm in self.shms:
+            shm.close()
+            shm.unlink()
+        self.shms = []
+
+
+class PersistentPool:
+    """长期运行的进程池或线程池
+
+    第一次使用时创建，在 fork 出的子进程中使用时重新创建；
+    imap 分块提交任务并流式返回结果，最多同时提交 max_inflight 个元素。
     """
-    with closing(ProcessPool(pool_size)) as pool:
-        return pool.imap_unordered(func, iterable, chunksize)
 
+    def __init__(self, pool_size: int = 10, threads: bool = False) -> None:
+        self.pool_size = pool_size
+        self.threads = threads
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> Pool:
+        if self._pool is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pid != os.getpid():
+                    self._pool = ThreadPool(self.pool_size) if self.threads else ProcessPool(self.pool_size)
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _submit(self, func: Callable[[S], T], items: list, completed) -> _Chunk:
+        shms = []
+        if not self.threads and shared_memory is not None:
+            items = [_share(item, shms) for item in items]
+        chunk = _Chunk(len(items), shms)
+        callback = None if completed is None else (lambda _: completed.put(chunk))
+        chunk.result = self.pool.apply_async(_run_chunk, (func, items), callback=callback, error_callback=callback)
+        return chunk
+
+    def imap(
+        self,
+        func: Callable[[S], T],
+        iterable: Iterable[S],
+        chunksize: Optional[int] = None,
+        ordered: bool = True,
+        max_inflight: Optional[int] = None,
+    ) -> Iterator[T]:
+        """Apply func to each element in iterable, streaming the results.
+
+        :param chunksize: 每个块的元素数，为 None 时按每个元素的耗时自动调整
+        :param ordered: 是否按 iterable 的顺序返回结果
+        :param max_inflight: 已提交但结果还没有返回的最大元素数，为 None 时最多同时提交 pool_size 的 2 倍个块
+        """
+        tuner = _ChunkSizeTuner(chunksize)
+        iterator = iter(iterable)
+        max_chunks = 2 * self.pool_size
+        completed = None if ordered else queue.SimpleQueue()
+        chunks = deque() if ordered else set()
+        inflight = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(chunks) < max_chunks and (max_inflight is None or inflight < max_inflight):
+                    size = tuner.chunksize
+                    if max_inflight is not None:
+                        size = min(size, max_inflight - inflight)
+                    items = list(islice(iterator, size))
+                    if not items:
+                        exhausted = True
+                        break
+                    chunk = self._submit(func, items, completed)
+                    if ordered:
+                        chunks.append(chunk)
+                    else:
+                        chunks.add(chunk)
+                    inflight += chunk.size
+                if not chunks:
+                    return
+                if ordered:
+                    chunk = chunks.popleft()
+                else:
+                    chunk = completed.get()
+                    chunks.remove(chunk)
+                try:
+                    results, elapsed = chunk.result.get(TIMEOUT)
+                finally:
+                    chunk.release()
+                inflight -= chunk.size
+                tuner.update(elapsed, chunk.size)
+                yield from results
+        finally:
+            # 提前结束时释放还没有返回的块的共享内存
+            for chunk in chunks:
+                chunk.release()
+
+    def close(self) -> None:
+        """等待已提交的任务完成后关闭池 ."""
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.close()
+            self._pool.join()
+        self._pool = None
+
+    def terminate(self) -> None:
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.terminate()
+        self._pool = None
+
+    def __enter__(self) -> "PersistentPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+_pools: Dict[Tuple[int, bool], PersistentPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(pool_size: int = 10, threads: bool = False) -> PersistentPool:
+    """Return the shared persistent pool of the given size and kind."""
+    key = (pool_size, threads)
+    persistent_pool = _pools.get(key)
+    if persistent_pool is None:
+        with _pools_lock:
+            persistent_pool = _pools.setdefault(key, PersistentPool(pool_size, threads))
+    return persistent_pool
+
+
+@atexit.register
+def shutdown_pools() -> None:
+    """Terminate all shared persistent pools."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for persistent_pool in pools:
+        persistent_pool.terminate()
+
+
+def _map_multiprocess(
+    func: Callable[[S], T],
+    iterable: Iterable[S],
+    chunksize: Optional[int] = None,
+    pool_size=10,
+    ordered: bool = False,
+    max_inflight: Optional[int] = None,
+) -> Iterator[T]:
+    """Chop iterable into chunks and submit them to a persistent process pool.
+
+    Large bytes and NumPy arguments are passed through shared memory.
+
+    Return an iterator of the results, in order if ordered is True.
+    """
+    return get_pool(pool_size).imap(func, iterable, chunksize, ordered=ordered, max_inflight=max_inflight)
 
-def _map_multithread(func: Callable[[S], T], iterable: Iterable[S], chunksize: int = 1, pool_size=10) -> Iterator[T]:
-    """Chop iterable into chunks and submit them to a thread pool.
 
-    For very long iterables using a large value for chunksize can make
-    the job complete much faster than using the default value of 1.
+def _map_multithread(
+    func: Callable[[S], T],
+    iterable: Iterable[S],
+    chunksize: Optional[int] = None,
+    pool_size=10,
+    ordered: bool = False,
+    max_inflight: Optional[int] = None,
+) -> Iterator[T]:
+    """Chop iterable into chunks and submit them to a persistent thread pool.
 
-    Return an unordered iterator of the results.
+    Return an iterator of the results, in order if ordered is True.
     """
-    with closing(ThreadPool(pool_size)) as pool:
-        return pool.imap_unordered(func, iterable, chunksize)
+    return get_pool(pool_size, threads=True).imap(func, iterable, chunksize, ordered=ordered, max_inflight=max_inflight)
 
 
 if LACK_SEM_OPEN:
@@ -0,0 +1,116 @@
+import os
+import time
+
+import pytest
+
+from xTool.utils import parallel
+from xTool.utils.parallel import (
+    SHARED_MEMORY_THRESHOLD,
+    PersistentPool,
+    _ChunkSizeTuner,
+    get_pool,
+    map_multiprocess,
+    map_multithread,
+    shutdown_pools,
+)
+
+
+def square(x):
+    return x * x
+
+
+def getpid(_):
+    return os.getpid()
+
+
+def checksum(data):
+    return len(data), data[:4], data[-4:]
+
+
+def fail_on_three(x):
+    if x == 3:
+        raise ValueError(x)
+    return x
+
+
+@pytest.fixture(autouse=True)
+def shutdown():
+    yield
+    shutdown_pools()
+
+
+@pytest.mark.parametrize("map_func", [map_multiprocess, map_multithread])
+def test_map_unordered(map_func):
+    assert sorted(map_func(square, range(100), pool_size=2)) == [x * x for x in range(100)]
+
+
+@pytest.mark.parametrize("map_func", [map_multiprocess, map_multithread])
+@pytest.mark.parametrize("chunksize", [None, 1, 7])
+def test_map_ordered(map_func, chunksize):
+    result = map_func(square, range(100), chunksize=chunksize, pool_size=2, ordered=True)
+    assert list(result) == [x * x for x in range(100)]
+
+
+def test_pool_is_reused():
+    pids = set(map_multiprocess(getpid, range(20), pool_size=2))
+    assert get_pool(2) is get_pool(2)
+    pids |= set(map_multiprocess(getpid, range(20), pool_size=2))
+    assert len(pids) <= 2
+
+
+def test_max_inflight():
+    consumed = []
+
+    def produce():
+        for i in range(50):
+            # 已提交但没有被消费的元素不超过 max_inflight
+            assert i - len(consumed) <= 5
+            yield i
+
+    with PersistentPool(2, threads=True) as pool:
+        for result in pool.imap(square, produce(), chunksize=2, ordered=True, max_inflight=5):
+            consumed.append(result)
+    assert consumed == [x * x for x in range(50)]
+
+
+def test_error_is_raised():
+    with PersistentPool(2) as pool:
+        with pytest.raises(ValueError):
+            list(pool.imap(fail_on_three, range(10), chunksize=1))
+
+
+def test_chunksize_tuner():
+    tuner = _ChunkSizeTuner()
+    assert tuner.chunksize == 1
+    tuner.update(0.0001, 1)
+    assert tuner.chunksize == 100
+    tuner.update(10, 100)
+    assert tuner.chunksize == 1
+
+    cheap = _ChunkSizeTuner()
+    cheap.update(0, 10)
+    assert cheap.chunksize == parallel.MAX_CHUNKSIZE
+
+    fixed = _ChunkSizeTuner(8)
+    fixed.update(10, 8)
+    assert fixed.chunksize == 8
+
+
+def test_autotune_chunksize_grows_for_cheap_items():
+    with PersistentPool(2) as pool:
+        start = time.perf_counter()
+        assert sum(pool.imap(square, range(20000), ordered=False)) == sum(x * x for x in range(20000))
+        assert time.perf_counter() - start < 30
+
+
+def test_shared_memory_bytes():
+    data = [bytes([i]) * (SHARED_MEMORY_THRESHOLD + i) for i in range(3)]
+    result = list(map_multiprocess(checksum, data, pool_size=2, ordered=True))
+    assert result == [(len(d), d[:4], d[-4:]) for d in data]
+
+
+def test_shared_memory_numpy():
+    numpy = pytest.importorskip("numpy")
+    arrays = [numpy.full(SHARED_MEMORY_THRESHOLD // 8 + 1, i, dtype=numpy.float64) for i in range(3)]
+    result = list(map_multiprocess(numpy.sum, arrays, pool_size=2, ordered=True))
+    assert result == [array.sum() for array in arrays]